@@ -1,16 +1,38 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import sqlite3
 import paho.mqtt.client as mqtt
 import json
 import uuid
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import base64
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import threading
+import time
 import logging
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import anyio
 import google.generativeai as genai
 
+from correlation import Correlator
+from db import get_pool, close_pool
+from events import broker
+from hierarchy import HierarchyCache
+from jobs import JobQueue, is_locked
+from reanalysis import ReanalysisJob
+import retention
+import responses
+import search
+import trigger_rules
+from retention import RetentionJob
+from sequences import SequenceAllocator
+from suggestion_store import EXPIRED_BY, SuggestionExpiryJob, dedup_key, upsert_suggestions
+from write_behind import CoalescingBuffer, SamplingRingBuffer, WriteBehindQueue
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +43,41 @@ genai.configure(api_key=GEMINI_API_KEY)
 # Use gemini-2.5-pro - most capable model with advanced reasoning
 gemini_model = genai.GenerativeModel('gemini-2.5-pro')
 
+# Gemini calls are slow blocking network calls (often 20+ seconds). They run on
+# their own small executor so they never hold the event loop or the worker
+# threads that serve the cheap database endpoints.
+LLM_MAX_CONCURRENCY = 4
+LLM_TIMEOUT_SECONDS = 60
+GEMINI_SAFETY_SETTINGS = {
+    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
+}
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="gemini")
+
+# Worker threads for the synchronous (database) endpoints
+API_THREADPOOL_SIZE = 16
+
+async def generate_content(prompt: str):
+    """
+    Call Gemini without blocking the event loop.
+    At most LLM_MAX_CONCURRENCY calls run at once; each is bounded by LLM_TIMEOUT_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(
+        gemini_model.generate_content,
+        prompt,
+        safety_settings=GEMINI_SAFETY_SETTINGS,
+        request_options={"timeout": LLM_TIMEOUT_SECONDS},
+    )
+    try:
+        # The outer timeout also covers time spent queued behind other LLM calls
+        return await asyncio.wait_for(loop.run_in_executor(llm_executor, call),
+                                      timeout=LLM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Gemini call exceeded {LLM_TIMEOUT_SECONDS}s")
+
 app = FastAPI(title="Military Hierarchy Backend", version="1.0.0")
 
 # Enable CORS for frontend
@@ -39,9 +96,174 @@ DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "
 # Global MQTT client
 mqtt_client = None
 
-def get_db_connection():
-    """Get a database connection."""
-    return sqlite3.connect(DB_PATH)
+def db_read():
+    """Borrow a pooled reader connection: `with db_read() as conn: ...`"""
+    return get_pool(DB_PATH).read()
+
+def db_write():
+    """Use the pooled writer connection; commits on success, rolls back on error."""
+    return get_pool(DB_PATH).write()
+
+# Units and soldiers change rarely; their read endpoints are served from memory
+hierarchy_cache = HierarchyCache(db_read)
+
+# ===== KEYSET PAGINATION =====
+# List endpoints page on (timestamp, id) rather than OFFSET, so every page is an
+# index seek and deep pages cost the same as the first one. Cursors are opaque
+# to clients: base64url-encoded JSON of the last row's sort key.
+
+REPORT_LIST_COLUMNS = ["report_id", "soldier_id", "unit_id", "timestamp", "report_type", 
+                       "structured_json", "confidence", "soldier_name", "unit_name", "row_version"]
+
+REPORT_LIST_QUERY = """
+    SELECT r.report_id, r.soldier_id, r.unit_id, r.timestamp, r.report_type,
+           r.structured_json, r.confidence, s.name as soldier_name, u.name as unit_name,
+           r.row_version
+    FROM reports r
+    JOIN soldiers s ON r.soldier_id = s.soldier_id
+    JOIN units u ON r.unit_id = u.unit_id
+"""
+
+def report_projection(fields: Optional[str], columns: List[str] = REPORT_LIST_COLUMNS) -> List[int]:
+    """
+    Positions of the requested `fields` (comma-separated) in `columns`, or all
+    of them when fields is not given; raises a 400 for an unknown field.
+    """
+    if not fields:
+        return list(range(len(columns)))
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. "
+                                                    f"Available: {', '.join(columns)}")
+    return [columns.index(name) for name in names]
+
+def report_dicts(rows: List[tuple], projection: List[int], parse_json: bool = False,
+                 columns: List[str] = REPORT_LIST_COLUMNS) -> List[Dict[str, Any]]:
+    """
+    Report rows as dicts holding only the projected columns. With parse_json,
+    structured_json is sent as an object instead of the stored string.
+    """
+    json_index = columns.index("structured_json")
+    parse = parse_json and json_index in projection
+    names = [(index, columns[index]) for index in projection]
+    reports = []
+    for row in rows:
+        report = {name: row[index] for index, name in names}
+        if parse and row[json_index]:
+            try:
+                report["structured_json"] = responses.loads(row[json_index])
+            except ValueError:
+                pass  # leave a malformed blob as the raw string
+        reports.append(report)
+    return reports
+
+def encode_cursor(timestamp: str, row_id: str) -> str:
+    """Encode a (timestamp, id) sort key as an opaque cursor."""
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_cursor(); raises a 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        return str(timestamp), str(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(rows: List[tuple], limit: int, timestamp_index: int, id_index: int):
+    """
+    Trim a page fetched with LIMIT limit + 1 and build the cursor for the next page.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[timestamp_index], last[id_index])
+
+# ===== END KEYSET PAGINATION =====
+
+# ===== REPORT FIELD FILTERS =====
+# casualties, enemy_count, severity and location are generated columns over
+# reports.structured_json (see add_report_json_columns.sql), so reports can be
+# filtered on them in SQL. The casualty and enemy indexes are partial: each
+# condition repeats `> 0` so SQLite knows it may use them.
+
+def report_field_conditions(start: Optional[str] = None, min_casualties: Optional[int] = None,
+                            min_enemy_count: Optional[int] = None, severity: Optional[str] = None):
+    """WHERE conditions and their params for the report field filters that are set."""
+    conditions = []
+    params = []
+    if start:
+        conditions.append("r.timestamp >= ?")
+        params.append(start)
+    if min_casualties is not None:
+        conditions.append("r.casualties > 0 AND r.casualties >= ?")
+        params.append(min_casualties)
+    if min_enemy_count is not None:
+        conditions.append("r.enemy_count > 0 AND r.enemy_count >= ?")
+        params.append(min_enemy_count)
+    if severity:
+        conditions.append("r.severity = ?")
+        params.append(severity.strip().lower())
+    return conditions, params
+
+# structured_json keys the suggest endpoints read that have a generated column
+REPORT_FIELD_COLUMNS = {"casualties": "r.casualties", "casualty_count": "r.casualties",
+                        "enemy_count": "r.enemy_count", "severity": "r.severity", "location": "r.location"}
+
+def recent_unit_reports(unit_id: str, condition: str, fields: List[str], limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Newest reports in a unit's subtree matching `condition`, shaped like the
+    report dicts the dashboard sends, with only `fields` of structured_json,
+    extracted in SQL.
+    """
+    columns = ", ".join(REPORT_FIELD_COLUMNS.get(field, f"json_extract(r.structured_json, '$.{field}')")
+                        for field in fields)
+    query = f"""
+        SELECT r.report_id, r.soldier_id, r.timestamp, r.report_type, {columns}
+        FROM reports r
+        WHERE r.unit_id IN ({SUBTREE_UNITS}) AND json_valid(r.structured_json) AND ({condition})
+        ORDER BY r.timestamp DESC LIMIT ?
+    """
+    with db_read() as conn:
+        rows = conn.execute(query, (unit_id, limit)).fetchall()
+    return [
+        {"report_id": row[0], "soldier_id": row[1], "timestamp": row[2], "report_type": row[3],
+         "structured_json": {field: value for field, value in zip(fields, row[4:]) if value is not None}}
+        for row in rows
+    ]
+
+# ===== END REPORT FIELD FILTERS =====
+
+# ===== DELTA FEEDS =====
+# The dashboard polls /reports and /api/suggestions every few seconds. Each
+# response carries a `watermark`; passing it back as `since` returns only rows
+# inserted or changed after it. Every write to reports and suggestions bumps
+# change_counter (see add_change_tracking.sql), so an idle poll costs a single
+# primary-key lookup. The watermark doubles as the ETag for If-None-Match.
+
+def read_watermark(conn: sqlite3.Connection) -> int:
+    """Current value of the change counter."""
+    return conn.execute("SELECT value FROM change_counter WHERE id = 1").fetchone()[0]
+
+def watermark_etag(watermark: int) -> str:
+    return f'W/"{watermark}"'
+
+def trim_changes(rows: List[tuple], limit: int, version_index: int, watermark: int):
+    """
+    Trim a change feed fetched with LIMIT limit + 1 (oldest change first).
+    Returns (rows, watermark); when the feed was cut short the watermark is the
+    last returned row's version, so the next poll picks up where this one stopped.
+    """
+    if len(rows) <= limit:
+        return rows, watermark
+    rows = rows[:limit]
+    return rows, rows[-1][version_index]
+
+# ===== END DELTA FEEDS =====
 
 def generate_report_description(report_type: str, structured_json: Dict[str, Any]) -> str:
     """
@@ -110,11 +332,11 @@ def generate_report_description(report_type: str, structured_json: Dict[str, Any
 
 # ===== SMART NOTIFICATIONS SYSTEM - LEVEL 2 =====
 
-def analyze_report_triggers(report_id: str, soldier_id: str, unit_id: str, 
-                            report_type: str, structured_json: Dict[str, Any], 
-                            text_content: str = ""):
+def detect_report_triggers(report_id: str, soldier_id: str, unit_id: str, 
+                           report_type: str, structured_json: Dict[str, Any], 
+                           text_content: str = "") -> List[Dict[str, Any]]:
     """
-    Analyze newly created report for triggers that should generate suggestions.
+    Analyze a report for triggers that should generate suggestions (no database access).
     Level 2: Smart Notifications - suggests report creation to user.
     Level 3: Auto-Drafts - automatically generates draft reports (future).
     """
@@ -125,29 +347,25 @@ def analyze_report_triggers(report_id: str, soldier_id: str, unit_id: str,
         if not structured_json:
             structured_json = {}
         
+        # Keyword categories found in the text and description, in one pass
+        # (see trigger_rules.RULES)
+        keywords = trigger_rules.matcher.match(str(text_content), str(structured_json.get("description", "")))
+        
         # CASEVAC TRIGGERS - Detect casualty situations
-        if report_type in ["CASUALTY", "CONTACT", "SITREP"]:
+        if report_type in trigger_rules.CASEVAC_REPORT_TYPES:
             try:
-                casualties = structured_json.get("casualties", 0)
+                casualties = trigger_rules.report_count(structured_json, *trigger_rules.CASUALTY_FIELDS)
                 severity = str(structured_json.get("severity", "")).lower()
-                description = str(structured_json.get("description", "")).lower()
-                text_lower = str(text_content).lower()
                 
                 # Check for casualties or injury keywords
-                injury_keywords = ["wounded", "injured", "casualty", "casualties", "medevac", 
-                                  "kia", "killed", "wia", "gunshot", "bleeding", "critical"]
-                has_injury_keywords = any(keyword in text_lower or keyword in description 
-                                         for keyword in injury_keywords)
-                
-                if casualties > 0 or has_injury_keywords:
+                if casualties > 0 or "injury" in keywords:
                     # Determine urgency
                     urgency = "MEDIUM"
                     confidence = 0.75
                     reason = f"Potential casualties detected"
                     
                     # URGENT triggers
-                    urgent_keywords = ["critical", "severe", "life-threatening", "kia", "killed"]
-                    if any(kw in text_lower or kw in description for kw in urgent_keywords):
+                    if "urgent" in keywords:
                         urgency = "URGENT"
                         confidence = 0.95
                         reason = f"URGENT: Critical casualties detected"
@@ -171,20 +389,13 @@ def analyze_report_triggers(report_id: str, soldier_id: str, unit_id: str,
                 logger.error(f"Error in CASEVAC trigger detection: {e}")
         
         # EOINCREP TRIGGERS - Detect enemy contact or explosive ordnance
-        if report_type in ["CONTACT", "INTELLIGENCE", "SITREP"]:
+        if report_type in trigger_rules.EOINCREP_REPORT_TYPES:
             try:
-                enemy_count = int(structured_json.get("enemy_count", 0))
-                vehicle_count = int(structured_json.get("vehicle_count", 0))
-                description = str(structured_json.get("description", "")).lower()
-                text_lower = str(text_content).lower()
+                enemy_count = trigger_rules.report_count(structured_json, "enemy_count")
+                vehicle_count = trigger_rules.report_count(structured_json, "vehicle_count")
                 
                 # Enemy contact keywords
-                enemy_keywords = ["enemy", "hostile", "contact", "engagement", "patrol", 
-                                 "infantry", "armor", "artillery"]
-                has_enemy_keywords = any(keyword in text_lower or keyword in description 
-                                        for keyword in enemy_keywords)
-                
-                if enemy_count > 0 or has_enemy_keywords:
+                if enemy_count > 0 or "enemy" in keywords:
                     # Determine urgency based on enemy size
                     urgency = "MEDIUM"
                     confidence = 0.80
@@ -211,15 +422,7 @@ def analyze_report_triggers(report_id: str, soldier_id: str, unit_id: str,
         
         # EOD EOINCREP TRIGGERS - Detect explosive devices
         try:
-            eod_keywords = ["ied", "mine", "unexploded", "booby trap", "explosive", 
-                           "ordnance", "bomb", "explosive device"]
-            description = str(structured_json.get("description", "")).lower()
-            text_lower = str(text_content).lower()
-            
-            has_eod_keywords = any(keyword in text_lower or keyword in description 
-                                   for keyword in eod_keywords)
-            
-            if has_eod_keywords:
+            if "eod" in keywords:
                 triggers.append({
                     "type": "EOINCREP_EOD",
                     "urgency": "HIGH",
@@ -230,49 +433,230 @@ def analyze_report_triggers(report_id: str, soldier_id: str, unit_id: str,
         except Exception as e:
             logger.error(f"Error in EOD trigger detection: {e}")
         
-        # Save triggers to suggestions table
-        if triggers:
-            create_suggestions(triggers, unit_id)
-            logger.info(f"Created {len(triggers)} suggestions for report {report_id}")
-        
     except Exception as e:
         logger.error(f"Error analyzing report triggers: {e}", exc_info=True)
     
     return triggers
 
-def create_suggestions(triggers: List[Dict[str, Any]], unit_id: str):
-    """Save triggered suggestions to database."""
+def publish_suggestions(saved: List[Tuple[str, Dict[str, Any]]], unit_id: str):
+    """Announce committed suggestions to event subscribers, as created or updated."""
+    for suggestion_id, trigger in saved:
+        if trigger.get("created", True):
+            broker.publish("suggestion-created", {
+                "suggestion_id": suggestion_id,
+                "suggestion_type": trigger["type"],
+                "urgency": trigger["urgency"],
+                "unit_id": unit_id
+            })
+        else:
+            broker.publish("suggestion-updated", {"suggestion_id": suggestion_id, "status": "pending"})
+
+def publish_expired_suggestions(expired: List[Tuple[str, Optional[str]]]):
+    """Announce suggestions the expiry job dismissed."""
+    for suggestion_id, _ in expired:
+        broker.publish("suggestion-dismissed", {"suggestion_id": suggestion_id, "dismissed_by": EXPIRED_BY})
+
+# ===== END SMART NOTIFICATIONS SYSTEM =====
+
+# ===== REPORT ANALYSIS QUEUE =====
+# New reports are analysed for triggers by worker threads once the POST has
+# returned, so a report POST is a single transaction. That transaction also
+# marks the report 'queued' in report_analysis; a worker saves the
+# suggestions for everything it picked up and marks those reports 'done' in
+# one transaction, retrying while another process holds the database lock.
+# Reports still 'queued' at startup (the queue was full, or the process
+# stopped first) are queued again.
+
+REPORT_ANALYSIS_WORKERS = 2
+REPORT_ANALYSIS_QUEUE_SIZE = 10000
+REPORT_ANALYSIS_BATCH_SIZE = 100
+REPORT_ANALYSIS_MAX_ATTEMPTS = 5
+
+def mark_analysis_queued(conn, report_ids: List[str]):
+    """Record reports as waiting for analysis, in the transaction that inserts them."""
+    now = datetime.now().isoformat()
+    conn.executemany("INSERT OR REPLACE INTO report_analysis (report_id, status, queued_at) VALUES (?, 'queued', ?)",
+                     [(report_id, now) for report_id in report_ids])
+
+def save_report_analysis(conn, reports: List[Dict[str, Any]],
+                         attempt: int = 1) -> List[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]:
+    """
+    Analyse reports and, in the caller's transaction, save their suggestions
+    and mark them 'done'. Repeat reports are merged into a pending suggestion
+    and reports already recorded in one are skipped (see suggestion_store.py).
+    Returns (report, saved suggestions) pairs; each trigger is marked
+    "created" or merged.
+    """
+    triggers = [detect_report_triggers(report["report_id"], report["soldier_id"], report["unit_id"],
+                                       report["report_type"], report["structured_json"], report.get("text_content", ""))
+                for report in reports]
+    suggestions = [
+        dict(trigger, unit_id=report["unit_id"],
+             dedup_key=dedup_key(trigger["type"], report["unit_id"], report["report_id"], report.get("timestamp")))
+        for report, report_triggers in zip(reports, triggers) for trigger in report_triggers
+    ]
+    outcomes = iter(upsert_suggestions(conn, suggestions))
+    
+    results = []
+    for report, report_triggers in zip(reports, triggers):
+        report_saved = []
+        for trigger in report_triggers:
+            result = next(outcomes)
+            if result is not None:
+                trigger["created"] = result[1]
+                report_saved.append((result[0], trigger))
+        results.append((report, report_saved))
+    now = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT INTO report_analysis (report_id, status, attempts, suggestions, queued_at, analyzed_at)
+        VALUES (?, 'done', ?, ?, ?, ?)
+        ON CONFLICT(report_id) DO UPDATE SET status = 'done', attempts = excluded.attempts,
+            suggestions = excluded.suggestions, error = NULL, analyzed_at = excluded.analyzed_at
+    """, [(report["report_id"], attempt, len(saved), now, now) for report, saved in results])
+    return results
+
+def publish_report_analysis(results: List[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]):
+    """Announce the suggestions save_report_analysis() saved, once committed."""
+    for report, saved in results:
+        if saved:
+            logger.info(f"Saved {len(saved)} suggestions for report {report['report_id']}")
+            publish_suggestions(saved, report["unit_id"])
+
+def run_report_analysis(reports: List[Dict[str, Any]], attempt: int):
+    """Analyse queued reports and save their suggestions in one transaction (worker thread)."""
+    with db_write() as conn:
+        results = save_report_analysis(conn, reports, attempt)
+    publish_report_analysis(results)
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        for trigger in triggers:
-            suggestion_id = str(uuid.uuid4())
-            
-            c.execute("""
-                INSERT INTO suggestions 
-                (suggestion_id, suggestion_type, urgency, reason, confidence, 
-                 source_reports, status, unit_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)
-            """, (
-                suggestion_id,
-                trigger["type"],
-                trigger["urgency"],
-                trigger["reason"],
-                trigger["confidence"],
-                json.dumps(trigger["source_reports"]),
-                unit_id,
-                datetime.now().isoformat()
-            ))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Saved {len(triggers)} suggestions to database")
-        
+        correlate_report_analysis(results)
     except Exception as e:
-        logger.error(f"Error creating suggestions: {e}")
+        # The reports' own suggestions are saved; don't retry them for this
+        logger.error(f"Error correlating report triggers: {e}", exc_info=True)
+
+def report_analysis_failed(reports: List[Dict[str, Any]], error: Exception, attempts: int):
+    """Record reports whose analysis kept failing (worker thread)."""
+    with db_write() as conn:
+        conn.executemany("""
+            UPDATE report_analysis SET status = 'failed', attempts = ?, error = ?, analyzed_at = ?
+            WHERE report_id = ?
+        """, [(attempts, str(error), datetime.now().isoformat(), report["report_id"]) for report in reports])
+
+report_analysis_queue = JobQueue(
+    "report-analysis", run_report_analysis, report_analysis_failed,
+    workers=REPORT_ANALYSIS_WORKERS,
+    maxsize=REPORT_ANALYSIS_QUEUE_SIZE,
+    batch_size=REPORT_ANALYSIS_BATCH_SIZE,
+    max_attempts=REPORT_ANALYSIS_MAX_ATTEMPTS,
+)
 
-# ===== END SMART NOTIFICATIONS SYSTEM =====
+# Triggers of reports from different units that arrive close together are
+# combined into one stronger suggestion for their parent unit, from state
+# kept in memory by the analysis workers (see correlation.py). Reanalysis
+# of older reports does not feed it.
+
+def unit_parent(unit_id: str) -> Optional[str]:
+    unit = hierarchy_cache.get().units.get(unit_id)
+    return unit["parent_unit_id"] if unit else None
+
+report_correlator = Correlator(unit_parent)
+correlation_lock = threading.Lock()
+
+def report_epoch(timestamp: Optional[str]) -> Optional[float]:
+    """Epoch seconds of a report timestamp, or None if it does not parse."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def save_correlations(conn, correlations: List[Dict[str, Any]]):
+    """Insert or update correlated suggestions; ones no longer pending are left alone."""
+    now = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT INTO suggestions
+        (suggestion_id, suggestion_type, urgency, reason, confidence,
+         source_reports, status, unit_id, created_at, refreshed_at)
+        VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)
+        ON CONFLICT(suggestion_id) DO UPDATE SET
+            urgency = excluded.urgency, reason = excluded.reason, confidence = excluded.confidence,
+            source_reports = excluded.source_reports, refreshed_at = excluded.refreshed_at
+        WHERE suggestions.status = 'pending'
+    """, [(correlation["suggestion_id"], correlation["type"], correlation["urgency"], correlation["reason"],
+           correlation["confidence"], json.dumps(correlation["source_reports"]), correlation["unit_id"], now, now)
+          for correlation in correlations])
+
+def correlate_report_analysis(results: List[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]):
+    """Feed newly saved suggestions to the correlator and save what it combines (worker thread)."""
+    # One worker at a time, so updates to a correlation are written in order
+    with correlation_lock:
+        correlations = {}
+        for report, saved in results:
+            at = report_epoch(report.get("timestamp"))
+            for _, trigger in saved:
+                for correlation in report_correlator.observe(report["report_id"], report["unit_id"], trigger, at):
+                    # Keep the latest state of each correlation, but remember it is new
+                    previous = correlations.get(correlation["suggestion_id"])
+                    if previous is not None and previous["created"]:
+                        correlation["created"] = True
+                    correlations[correlation["suggestion_id"]] = correlation
+        if not correlations:
+            return
+        with db_write() as conn:
+            save_correlations(conn, list(correlations.values()))
+    for correlation in correlations.values():
+        if correlation["created"]:
+            logger.info(f"Correlated {len(correlation['source_reports'])} {correlation['type']} reports "
+                        f"for unit {correlation['unit_id']}")
+        publish_suggestions([(correlation["suggestion_id"], correlation)], correlation["unit_id"])
+
+# Catches up on reports the queue never saw (see reanalysis.py)
+reanalysis_job = ReanalysisJob(db_read, db_write, save_report_analysis, publish_report_analysis)
+
+def queue_report_analysis(reports: List[Dict[str, Any]]):
+    """Hand committed reports to the analysis workers."""
+    for report in reports:
+        report_analysis_queue.put(report)
+
+def requeue_pending_analysis() -> int:
+    """Queue every report still marked 'queued' (startup). Returns how many."""
+    with db_read() as conn:
+        rows = conn.execute("""
+            SELECT r.report_id, r.soldier_id, r.unit_id, r.report_type, r.structured_json, r.timestamp
+            FROM report_analysis a JOIN reports r ON r.report_id = a.report_id
+            WHERE a.status = 'queued'
+            ORDER BY a.queued_at
+        """).fetchall()
+    for report_id, soldier_id, unit_id, report_type, structured_json, timestamp in rows:
+        try:
+            structured_json = json.loads(structured_json) if structured_json else {}
+        except ValueError:
+            structured_json = {}
+        # The request's text_content is not stored; the description is still scanned
+        report_analysis_queue.put({
+            "report_id": report_id, "soldier_id": soldier_id, "unit_id": unit_id,
+            "report_type": report_type, "structured_json": structured_json, "text_content": "",
+            "timestamp": timestamp
+        })
+    if rows:
+        logger.info(f"Queued {len(rows)} report(s) left unanalysed for trigger analysis")
+    return len(rows)
+
+@app.get("/reports/{report_id}/analysis")
+def get_report_analysis(report_id: str):
+    """Trigger analysis status of a report: queued, done (with the number of suggestions) or failed."""
+    try:
+        with db_read() as conn:
+            row = conn.execute("""
+                SELECT report_id, status, attempts, suggestions, error, queued_at, analyzed_at
+                FROM report_analysis WHERE report_id = ?
+            """, (report_id,)).fetchone()
+    except Exception as e:
+        logger.error(f"Error fetching report analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if row is None:
+        raise HTTPException(status_code=404, detail="No analysis recorded for this report")
+    return dict(zip(("report_id", "status", "attempts", "suggestions", "error", "queued_at", "analyzed_at"), row))
+
+# ===== END REPORT ANALYSIS QUEUE =====
 
 # MQTT callback functions
 def on_connect(client, userdata, flags, rc):
@@ -285,55 +669,219 @@ def on_connect(client, userdata, flags, rc):
 
 def on_message(client, userdata, msg):
     """Handle incoming MQTT messages from soldier devices."""
+    topic = msg.topic
+    payload = None
+    error = None
     try:
         payload = json.loads(msg.payload.decode())
-        topic = msg.topic
         
         if topic == "soldiers/inputs":
             handle_soldier_input(payload)
         elif topic == "soldiers/heartbeat":
             handle_soldier_heartbeat(payload)
-            
+    
+    except ValueError as e:
+        error = str(e)
+        logger.warning(f"Rejected MQTT message on {topic}: {e}")
     except Exception as e:
+        error = str(e)
         logger.error(f"Error processing MQTT message: {e}")
+    
+    record_comm(topic, len(msg.payload), payload, error)
 
-def handle_soldier_input(payload: Dict[str, Any]):
-    """Save soldier input to database."""
-    try:
-        soldier_id = payload.get('soldier_id')
-        timestamp = payload.get('timestamp', datetime.now().isoformat())
-        raw_text = payload.get('raw_text', '')
-        audio_ref = payload.get('audio_file_ref')
+# ===== COMMUNICATION LOG =====
+# Every MQTT message is recorded in comm_log. Recording only appends a tuple
+# to an in-memory ring buffer; a flusher thread batch-inserts them, and under
+# backlog the buffer samples instead of slowing down the MQTT loop.
 
-        if not soldier_id or not raw_text:
-            logger.warning("Invalid soldier input: missing soldier_id or raw_text")
-            return
+COMM_MESSAGE_TYPES = {"soldiers/inputs": "input", "soldiers/heartbeat": "heartbeat"}
 
-        conn = get_db_connection()
-        c = conn.cursor()
-        input_id = str(uuid.uuid4())
-        
-        c.execute("""
+def record_comm(topic: str, message_size: int, payload: Any = None, error: Optional[str] = None):
+    """Record one MQTT message (or publish result) in the comm_log buffer."""
+    if isinstance(payload, dict):
+        device_id = payload.get('device_id')
+        soldier_id = payload.get('soldier_id')
+    else:
+        device_id = soldier_id = None
+    comm_log_buffer.record(
+        (time.time(), device_id, soldier_id, topic, COMM_MESSAGE_TYPES.get(topic, "status"),
+         message_size, error is None, error),
+        always_keep=error is not None
+    )
+
+def save_comm_log(entries: List[tuple]):
+    """Batch-insert buffered comm_log entries (flusher thread)."""
+    with db_write() as conn:
+        conn.executemany("""
+            INSERT INTO comm_log (log_id, device_id, soldier_id, topic, message_type, message_size,
+                                  timestamp, success, error_message)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (str(uuid.uuid4()), device_id, soldier_id, topic, message_type, size,
+             datetime.fromtimestamp(recorded_at).isoformat(), success, error)
+            for recorded_at, device_id, soldier_id, topic, message_type, size, success, error in entries
+        ])
+
+COMM_LOG_CAPACITY = 8192
+COMM_LOG_FLUSH_INTERVAL = 1.0  # seconds
+
+comm_log_buffer = SamplingRingBuffer("comm-log", save_comm_log,
+                                     capacity=COMM_LOG_CAPACITY, interval=COMM_LOG_FLUSH_INTERVAL)
+
+# ===== END COMMUNICATION LOG =====
+
+# Moves reports, raw inputs and closed suggestions older than RETENTION_DAYS
+# into per-week archive files (see retention.py). Off unless
+# RETENTION_ENABLED is set, so old data is never archived by surprise.
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", retention.RETENTION_DAYS))
+retention_job = RetentionJob(db_write, lambda: DB_PATH, days=RETENTION_DAYS, enabled=RETENTION_ENABLED)
+
+# Dismisses pending suggestions nothing has raised again for
+# suggestion_store.SUGGESTION_TTL_HOURS (see suggestion_store.py)
+suggestion_expiry_job = SuggestionExpiryJob(db_write, publish_expired_suggestions)
+
+# FRAGO, CASEVAC and EOINCREP numbers (see sequences.py). Blocks are reserved
+# in the database so several backend processes never hand out the same number;
+# a process that dies loses the rest of its block.
+REPORT_NUMBER_BLOCK_SIZE = 10
+report_numbers = SequenceAllocator(db_write, REPORT_NUMBER_BLOCK_SIZE)
+
+def message_timestamp(value: Any) -> str:
+    """An MQTT payload timestamp as a string: ISO strings as sent, epoch seconds converted, missing is now."""
+    if value is None or value == "":
+        return datetime.now().isoformat()
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value).isoformat()
+        except (OverflowError, OSError, ValueError):
+            pass
+    raise ValueError(f"Invalid timestamp: {value!r}")
+
+def handle_soldier_input(payload: Dict[str, Any]):
+    """Validate a soldier input and queue it for the batched writer."""
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid soldier input: payload is not an object")
+    soldier_id = payload.get('soldier_id')
+    raw_text = payload.get('raw_text', '')
+    audio_ref = payload.get('audio_file_ref')
+
+    if not soldier_id or not raw_text:
+        raise ValueError("Invalid soldier input: missing soldier_id or raw_text")
+    # Checked here: one bad row would fail the writer's whole batch
+    if not isinstance(soldier_id, str) or not isinstance(raw_text, str):
+        raise ValueError("Invalid soldier input: soldier_id and raw_text must be strings")
+    if audio_ref is not None and not isinstance(audio_ref, str):
+        raise ValueError("Invalid soldier input: audio_file_ref must be a string")
+    timestamp = message_timestamp(payload.get('timestamp'))
+
+    if not soldier_input_queue.put((str(uuid.uuid4()), soldier_id, timestamp, raw_text, audio_ref)):
+        raise RuntimeError("Soldier input queue full, input dropped")
+
+def save_soldier_inputs(rows: List[tuple]):
+    """Write a batch of queued soldier inputs in one transaction (writer thread)."""
+    with db_write() as conn:
+        conn.executemany("""
             INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text, raw_audio_ref)
             VALUES (?, ?, ?, ?, ?)
-        """, (input_id, soldier_id, timestamp, raw_text, audio_ref))
-        
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"Saved input from soldier {soldier_id} at {timestamp}")
-        
-        # Optionally trigger AI processing here
-        # process_with_ai(input_id, raw_text)
-        
-    except Exception as e:
-        logger.error(f"Error saving soldier input: {e}")
+        """, rows)
+    
+    logger.info(f"Saved {len(rows)} soldier input(s)")
+    if len(rows) == 1:
+        input_id, soldier_id, timestamp = rows[0][:3]
+        broker.publish("raw-input-created", {"input_id": input_id, "soldier_id": soldier_id, "timestamp": timestamp})
+    else:
+        broker.publish("raw-inputs-created", {"count": len(rows), "soldier_ids": sorted({row[1] for row in rows})})
+
+# MQTT inputs are committed in groups instead of one transaction per message,
+# so bursts neither stall the paho network thread nor pay a commit per row.
+SOLDIER_INPUT_QUEUE_SIZE = 10000
+SOLDIER_INPUT_BATCH_SIZE = 500
+SOLDIER_INPUT_MAX_DELAY = 0.005  # seconds
+
+soldier_input_queue = WriteBehindQueue(
+    "soldier-inputs", save_soldier_inputs,
+    maxsize=SOLDIER_INPUT_QUEUE_SIZE,
+    batch_size=SOLDIER_INPUT_BATCH_SIZE,
+    max_delay=SOLDIER_INPUT_MAX_DELAY,
+)
 
 def handle_soldier_heartbeat(payload: Dict[str, Any]):
-    """Handle soldier device heartbeat."""
+    """Record a device heartbeat in the coalescing buffer (no database write)."""
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid heartbeat: payload is not an object")
     soldier_id = payload.get('soldier_id')
-    timestamp = payload.get('timestamp', datetime.now().isoformat())
-    logger.info(f"Heartbeat from soldier {soldier_id} at {timestamp}")
+    device_id = payload.get('device_id')
+    if not soldier_id and not device_id:
+        raise ValueError("Invalid heartbeat: missing soldier_id and device_id")
+    if not isinstance(soldier_id, (str, type(None))) or not isinstance(device_id, (str, type(None))):
+        raise ValueError("Invalid heartbeat: soldier_id and device_id must be strings")
+    # A string, so save_heartbeats() can compare timestamps across devices
+    timestamp = message_timestamp(payload.get('timestamp'))
+    
+    location = payload.get('location')
+    if not isinstance(location, dict):
+        location = {}
+    heartbeat_buffer.update((device_id, soldier_id), (
+        timestamp,
+        payload.get('battery_level'),
+        payload.get('signal_strength'),
+        location.get('lat', payload.get('location_lat')),
+        location.get('lon', payload.get('location_lon')),
+        location.get('accuracy', payload.get('location_accuracy')),
+    ))
+
+def save_heartbeats(entries: Dict[tuple, tuple]):
+    """Upsert the latest heartbeat per device into device_status and soldiers.last_seen (flusher thread)."""
+    snapshot = hierarchy_cache.get()
+    device_rows = []
+    last_seen = {}
+    for (device_id, soldier_id), (timestamp, battery, signal, lat, lon, accuracy) in entries.items():
+        if device_id is None:
+            # Heartbeats without a device_id belong to the soldier's registered device
+            soldier = snapshot.soldiers.get(soldier_id)
+            device_id = (soldier and soldier["device_id"]) or soldier_id
+        device_rows.append((device_id, soldier_id, timestamp, battery, signal, lat, lon, accuracy))
+        if soldier_id and timestamp > last_seen.get(soldier_id, ""):
+            last_seen[soldier_id] = timestamp
+    
+    with db_write() as conn:
+        conn.executemany("""
+            INSERT INTO device_status (device_id, soldier_id, status, last_heartbeat, battery_level,
+                                       signal_strength, location_lat, location_lon, location_accuracy, updated_at)
+            VALUES (?, ?, 'active', ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(device_id) DO UPDATE SET
+                soldier_id = COALESCE(excluded.soldier_id, device_status.soldier_id),
+                status = CASE WHEN device_status.status = 'offline' THEN 'active' ELSE device_status.status END,
+                last_heartbeat = excluded.last_heartbeat,
+                battery_level = COALESCE(excluded.battery_level, device_status.battery_level),
+                signal_strength = COALESCE(excluded.signal_strength, device_status.signal_strength),
+                location_lat = COALESCE(excluded.location_lat, device_status.location_lat),
+                location_lon = COALESCE(excluded.location_lon, device_status.location_lon),
+                location_accuracy = COALESCE(excluded.location_accuracy, device_status.location_accuracy),
+                updated_at = excluded.updated_at
+            WHERE device_status.last_heartbeat IS NULL OR excluded.last_heartbeat >= device_status.last_heartbeat
+        """, device_rows)
+        changes = conn.total_changes
+        conn.executemany("""
+            UPDATE soldiers SET last_seen = ?
+            WHERE soldier_id = ? AND (last_seen IS NULL OR last_seen < ?)
+        """, [(timestamp, soldier_id, timestamp) for soldier_id, timestamp in last_seen.items()])
+        soldiers_changed = conn.total_changes != changes
+    
+    if soldiers_changed:
+        # last_seen is part of the cached GET /hierarchy body
+        hierarchy_cache.update_last_seen(last_seen)
+    logger.debug(f"Saved heartbeats for {len(device_rows)} device(s)")
+
+# Devices heartbeat every ~30 s. Only the newest heartbeat per device is kept
+# and written once per interval, so database load tracks the number of
+# devices rather than the message rate.
+HEARTBEAT_FLUSH_INTERVAL = 5.0  # seconds
+
+heartbeat_buffer = CoalescingBuffer("heartbeats", save_heartbeats, interval=HEARTBEAT_FLUSH_INTERVAL)
 
 def start_mqtt_client():
     """Start the MQTT client in a separate thread."""
@@ -357,259 +905,518 @@ async def root():
     return {
         "message": "Military Hierarchy Backend API",
         "status": "running",
-        "mqtt_connected": mqtt_client.is_connected() if mqtt_client else False
+        "mqtt_connected": mqtt_client.is_connected() if mqtt_client else False,
+        "event_subscribers": broker.subscriber_count,
+        "soldier_input_queue": soldier_input_queue.stats(),
+        "report_analysis_queue": report_analysis_queue.stats(),
+        "report_correlator": report_correlator.stats(),
+        "heartbeat_buffer": heartbeat_buffer.stats(),
+        "comm_log": comm_log_buffer.stats(),
+        "retention": retention_job.stats(),
+        "suggestion_expiry": suggestion_expiry_job.stats(),
+        "report_numbers": report_numbers.stats()
     }
 
 @app.get("/units")
-async def get_units():
+def get_units():
     """Get all military units."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM units ORDER BY level, name")
-    rows = c.fetchall()
-    conn.close()
-    
-    columns = ["unit_id", "name", "parent_unit_id", "level"]
-    return {"units": [dict(zip(columns, row)) for row in rows]}
+    return Response(content=hierarchy_cache.get().units_body, media_type="application/json")
 
 @app.get("/units/{unit_id}/soldiers")
-async def get_soldiers_by_unit(unit_id: str):
+def get_soldiers_by_unit(unit_id: str):
     """Get all soldiers in a specific unit."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT s.*, u.name as unit_name 
-        FROM soldiers s 
-        JOIN units u ON s.unit_id = u.unit_id 
-        WHERE s.unit_id = ?
-        ORDER BY s.rank, s.name
-    """, (unit_id,))
-    rows = c.fetchall()
-    conn.close()
-    
-    columns = ["soldier_id", "name", "rank", "unit_id", "device_id", "unit_name"]
-    return {"soldiers": [dict(zip(columns, row)) for row in rows]}
+    snapshot = hierarchy_cache.get()
+    body = snapshot.unit_soldiers_bodies.get(unit_id, snapshot.empty_soldiers_body)
+    return Response(content=body, media_type="application/json")
 
 @app.get("/soldiers")
-async def get_all_soldiers():
+def get_all_soldiers():
     """Get all soldiers."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT s.*, u.name as unit_name, u.level as unit_level
-        FROM soldiers s 
-        JOIN units u ON s.unit_id = u.unit_id 
-        ORDER BY u.level, s.rank, s.name
-    """)
-    rows = c.fetchall()
-    conn.close()
-    
-    columns = ["soldier_id", "name", "rank", "unit_id", "device_id", "unit_name", "unit_level"]
-    return {"soldiers": [dict(zip(columns, row)) for row in rows]}
+    return Response(content=hierarchy_cache.get().soldiers_body, media_type="application/json")
 
 @app.get("/hierarchy")
-async def get_hierarchy():
-    """Get the complete military hierarchy with nested structure."""
-    conn = get_db_connection()
-    c = conn.cursor()
+def get_hierarchy():
+    """Get the complete military hierarchy: every unit with its soldiers."""
+    return Response(content=hierarchy_cache.get().hierarchy_body, media_type="application/json")
+
+@app.get("/soldiers/{soldier_id}/raw_inputs")
+def get_soldier_raw_inputs(soldier_id: str, limit: int = Query(500, ge=1), cursor: Optional[str] = None):
+    """Get raw inputs from a specific soldier, newest first. Pass `next_cursor` back as `cursor` for the next page."""
+    query = """
+        SELECT input_id, soldier_id, timestamp, raw_text, raw_audio_ref
+        FROM soldier_raw_inputs 
+        WHERE soldier_id = ?
+    """
+    params = [soldier_id]
+    if cursor:
+        query += " AND (timestamp, input_id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY timestamp DESC, input_id DESC LIMIT ?"
+    params.append(limit + 1)
     
-    # Get all units with their hierarchy information
-    c.execute("""
-        SELECT u.unit_id, u.name, u.parent_unit_id, u.level, u.created_at
-        FROM units u
-        ORDER BY u.level, u.name
-    """)
-    units = c.fetchall()
+    with db_read() as conn:
+        rows = conn.execute(query, params).fetchall()
     
-    # Get all soldiers grouped by unit
-    c.execute("""
-        SELECT s.soldier_id, s.name, s.rank, s.unit_id, s.device_id, s.status, s.created_at, s.last_seen
-        FROM soldiers s
-        ORDER BY s.unit_id, s.name
-    """)
-    soldiers = c.fetchall()
+    rows, next_cursor = paginate(rows, limit, timestamp_index=2, id_index=0)
+    columns = ["input_id", "soldier_id", "timestamp", "raw_text", "raw_audio_ref"]
+    return {
+        "soldier_id": soldier_id, 
+        "raw_inputs": [dict(zip(columns, row)) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+@app.get("/soldiers/{soldier_id}/reports")
+def get_soldier_reports(soldier_id: str, request: Request, limit: int = Query(500, ge=1),
+                        cursor: Optional[str] = None, fields: Optional[str] = None, parse_json: bool = False):
+    """
+    Get structured reports from a specific soldier, newest first. Pass `next_cursor` back as `cursor` for the next page.
+    `fields` and `parse_json` shape the rows like GET /reports.
+    """
+    projection = report_projection(fields)
+    query = REPORT_LIST_QUERY + " WHERE r.soldier_id = ?"
+    params = [soldier_id]
+    if cursor:
+        query += " AND (r.timestamp, r.report_id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY r.timestamp DESC, r.report_id DESC LIMIT ?"
+    params.append(limit + 1)
     
-    conn.close()
+    with db_read() as conn:
+        rows = conn.execute(query, params).fetchall()
     
-    # Group soldiers by unit
-    soldiers_by_unit = {}
-    for soldier in soldiers:
-        unit_id = soldier[3]
-        if unit_id not in soldiers_by_unit:
-            soldiers_by_unit[unit_id] = []
-        soldiers_by_unit[unit_id].append({
-            "soldier_id": soldier[0],
-            "name": soldier[1],
-            "rank": soldier[2],
-            "unit_id": soldier[3],
-            "device_id": soldier[4],
-            "status": soldier[5],
-            "created_at": soldier[6],
-            "last_seen": soldier[7]
-        })
+    rows, next_cursor = paginate(rows, limit, timestamp_index=3, id_index=0)
+    return responses.json_response(request, {
+        "soldier_id": soldier_id, 
+        "reports": report_dicts(rows, projection, parse_json),
+        "next_cursor": next_cursor
+    })
+
+def query_report_feed(request: Request, response: Response, limit: int, cursor: Optional[str],
+                      since: Optional[int], conditions: Tuple[str, ...] = (),
+                      params: Tuple[Any, ...] = (), fields: Optional[str] = None,
+                      parse_json: bool = False):
+    """
+    Shared body of the report list endpoints: a keyset page (newest first) or,
+    with `since`, the delta feed (oldest change first). `conditions` are ANDed
+    into the WHERE clause of REPORT_LIST_QUERY and `params` fill their placeholders.
+    `fields` and `parse_json` shape the rows (see report_dicts).
+    """
+    if cursor and since is not None:
+        raise HTTPException(status_code=400, detail="cursor and since cannot be combined")
+    projection = report_projection(fields)
+    
+    conditions = list(conditions)
+    params = list(params)
+    with db_read() as conn:
+        # Read the watermark and the rows from the same snapshot
+        conn.execute("BEGIN")
+        watermark = read_watermark(conn)
+        etag = watermark_etag(watermark)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
+        if since is not None:
+            if since >= watermark:
+                return {"reports": [], "watermark": since}
+            conditions.append("r.row_version > ?")
+            params.append(since)
+            order_by = "r.row_version"
+        else:
+            if cursor:
+                conditions.append("(r.timestamp, r.report_id) < (?, ?)")
+                params.extend(decode_cursor(cursor))
+            order_by = "r.timestamp DESC, r.report_id DESC"
+        
+        query = REPORT_LIST_QUERY
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order_by} LIMIT ?"
+        params.append(limit + 1)
+        rows = conn.execute(query, params).fetchall()
     
-    # Build hierarchy structure
-    hierarchy = []
-    for unit in units:
-        unit_data = {
-            "unit_id": unit[0],
-            "name": unit[1],
-            "parent_unit_id": unit[2],
-            "level": unit[3],
-            "created_at": unit[4],
-            "soldiers": soldiers_by_unit.get(unit[0], [])
+    if since is not None:
+        rows, watermark = trim_changes(rows, limit, version_index=9, watermark=watermark)
+        return {
+            "reports": report_dicts(rows, projection, parse_json),
+            "watermark": watermark
         }
-        hierarchy.append(unit_data)
     
-    return {"hierarchy": hierarchy}
+    rows, next_cursor = paginate(rows, limit, timestamp_index=3, id_index=0)
+    return {
+        "reports": report_dicts(rows, projection, parse_json),
+        "next_cursor": next_cursor,
+        "watermark": watermark
+    }
 
-@app.get("/units/{unit_id}/soldiers")
-async def get_unit_soldiers(unit_id: str):
-    """Get all soldiers in a specific unit."""
-    conn = get_db_connection()
-    c = conn.cursor()
+@app.get("/reports")
+def get_all_reports(request: Request, response: Response, limit: int = Query(1000, ge=1),
+                    cursor: Optional[str] = None, since: Optional[int] = Query(None, ge=0),
+                    start: Optional[str] = None, min_casualties: Optional[int] = Query(None, ge=1),
+                    min_enemy_count: Optional[int] = Query(None, ge=1), severity: Optional[str] = None,
+                    fields: Optional[str] = None, parse_json: bool = False):
+    """
+    Get all structured reports, newest first. Pass `next_cursor` back as `cursor` for the next page.
+    Pass `watermark` back as `since` to get only reports added or changed since then, oldest first.
+    start (ISO timestamp), min_casualties, min_enemy_count and severity filter on report fields.
+    fields (comma-separated) limits the columns returned; parse_json sends structured_json as an object.
+    """
+    conditions, params = report_field_conditions(start, min_casualties, min_enemy_count, severity)
+    result = query_report_feed(request, response, limit, cursor, since, tuple(conditions), tuple(params),
+                               fields, parse_json)
+    if isinstance(result, Response):
+        return result
+    return responses.json_response(request, result, response.headers)
+
+# ===== FULL-TEXT SEARCH =====
+
+@app.get("/search")
+def search_text(q: str = Query(..., min_length=1), unit_id: Optional[str] = None, recursive: bool = False,
+                type_: Optional[str] = Query(None, alias="type"), since: Optional[str] = None,
+                sort: str = Query("rank", pattern="^(rank|recent)$"), limit: int = Query(50, ge=1, le=500)):
+    """
+    Full-text search over raw inputs, reports and FRAGOs, best match (sort=rank) or newest (sort=recent) first.
+    type is a comma-separated subset of raw_input, report, frago; since is an ISO timestamp.
+    """
+    types = [t.strip() for t in type_.split(",") if t.strip()] if type_ else list(search.SOURCES)
+    unknown = [t for t in types if t not in search.SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown type {', '.join(unknown)}; "
+                                                    f"expected one of {', '.join(search.SOURCES)}")
+    unit_filter = None
+    unit_params = ()
+    if unit_id:
+        unit_filter = f"IN ({SUBTREE_UNITS})" if recursive else "= ?"
+        unit_params = (unit_id,)
     
-    c.execute("""
-        SELECT s.soldier_id, s.name, s.rank, s.unit_id, s.device_id, s.status, s.created_at, s.last_seen
-        FROM soldiers s
-        WHERE s.unit_id = ?
-        ORDER BY s.name
-    """, (unit_id,))
+    try:
+        with db_read() as conn:
+            results = search.search(conn, q, types, unit_filter, unit_params, since, limit, sort)
+        return {"query": q, "results": results}
     
-    soldiers = c.fetchall()
-    conn.close()
+    except Exception as e:
+        logger.error(f"Error searching for {q!r}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== END FULL-TEXT SEARCH =====
+
+# ===== REPORT HISTORY =====
+# Reports older than the retention horizon live in per-week archive files
+# (see retention.py). History queries read the hot table first and then
+# ATTACH archives newest first, only as far back as the range and limit need.
+
+REPORT_HISTORY_COLUMNS = REPORT_LIST_COLUMNS[:9]
+
+REPORT_HISTORY_QUERY = """
+    SELECT r.report_id, r.soldier_id, r.unit_id, r.timestamp, r.report_type,
+           r.structured_json, r.confidence, s.name as soldier_name, u.name as unit_name
+    FROM {schema}.reports r
+    LEFT JOIN main.soldiers s ON r.soldier_id = s.soldier_id
+    LEFT JOIN main.units u ON r.unit_id = u.unit_id
+"""
+
+@app.get("/reports/history")
+def get_report_history(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                       unit_id: Optional[str] = None, soldier_id: Optional[str] = None,
+                       recursive: bool = False, limit: int = Query(500, ge=1, le=5000),
+                       fields: Optional[str] = None, parse_json: bool = False):
+    """
+    Reports in [start, end) newest first, including archived ones.
+    start/end are ISO timestamps or dates; unit_id (optionally with its subtree) and soldier_id filter.
+    fields and parse_json shape the rows like GET /reports.
+    """
+    projection = report_projection(fields, REPORT_HISTORY_COLUMNS)
+    conditions = []
+    params = []
+    if start:
+        conditions.append("r.timestamp >= ?")
+        params.append(start)
+    if end:
+        conditions.append("r.timestamp < ?")
+        params.append(end)
+    if unit_id:
+        conditions.append(f"r.unit_id IN ({SUBTREE_UNITS})" if recursive else "r.unit_id = ?")
+        params.append(unit_id)
+    if soldier_id:
+        conditions.append("r.soldier_id = ?")
+        params.append(soldier_id)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    order = " ORDER BY r.timestamp DESC, r.report_id DESC LIMIT ?"
     
-    return {
-        "soldiers": [
-            {
-                "soldier_id": s[0],
-                "name": s[1],
-                "rank": s[2],
-                "unit_id": s[3],
-                "device_id": s[4],
-                "status": s[5],
-                "created_at": s[6],
-                "last_seen": s[7]
-            }
-            for s in soldiers
-        ]
-    }
+    try:
+        archives = retention.archives_for_range(DB_PATH, start, end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO dates or timestamps")
+    
+    try:
+        searched = 0
+        with db_read() as conn:
+            rows = conn.execute(REPORT_HISTORY_QUERY.format(schema="main") + where + order,
+                                params + [limit]).fetchall()
+            for _, archive_end, path in archives:
+                # Archives are newest first: once `limit` rows newer than this
+                # partition's end are in hand, older partitions cannot contribute
+                if len(rows) >= limit and rows[limit - 1][3] >= archive_end.isoformat():
+                    break
+                with retention.attach(conn, path) as schema:
+                    rows += conn.execute(REPORT_HISTORY_QUERY.format(schema=schema) + where + order,
+                                         params + [limit]).fetchall()
+                searched += 1
+                rows.sort(key=lambda row: (row[3], row[0]), reverse=True)
+                rows = rows[:limit]
+        
+        return responses.json_response(request, {
+            "reports": report_dicts(rows, projection, parse_json, REPORT_HISTORY_COLUMNS),
+            "archives_searched": searched
+        })
+    
+    except Exception as e:
+        logger.error(f"Error fetching report history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/soldiers/{soldier_id}/raw_inputs")
-async def get_soldier_raw_inputs(soldier_id: str, limit: int = 500):
-    """Get raw inputs from a specific soldier."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT * FROM soldier_raw_inputs 
-        WHERE soldier_id = ? 
-        ORDER BY timestamp DESC 
-        LIMIT ?
-    """, (soldier_id, limit))
-    rows = c.fetchall()
-    conn.close()
+# ===== END REPORT HISTORY =====
+
+# Units in the subtree rooted at ?, including the unit itself (see add_unit_closure.sql)
+SUBTREE_UNITS = "SELECT descendant_id FROM unit_closure WHERE ancestor_id = ?"
+
+def subtree_is_large(unit_id: str, limit: int) -> bool:
+    """
+    Whether a subtree holds enough of all reports that paging it by walking the
+    global (timestamp, id) index beats reading each unit's reports and sorting.
+    Walking examines about limit * total / subtree rows, sorting about subtree
+    rows, so the crossover is at subtree rows = sqrt(limit * total). Subtree
+    rows are estimated from its share of all units.
+    """
+    with db_read() as conn:
+        subtree_units = conn.execute(
+            "SELECT COUNT(*) FROM unit_closure WHERE ancestor_id = ?", (unit_id,)
+        ).fetchone()[0]
+        total_reports = conn.execute("SELECT MAX(rowid) FROM reports").fetchone()[0] or 0
+    total_units = max(len(hierarchy_cache.get().units), 1)
+    subtree_reports = total_reports * subtree_units / total_units
+    return subtree_reports * subtree_reports > limit * total_reports
+
+@app.get("/units/{unit_id}/reports")
+def get_unit_reports(unit_id: str, request: Request, response: Response, recursive: bool = False,
+                     limit: int = Query(500, ge=1), cursor: Optional[str] = None,
+                     since: Optional[int] = Query(None, ge=0), start: Optional[str] = None,
+                     min_casualties: Optional[int] = Query(None, ge=1),
+                     min_enemy_count: Optional[int] = Query(None, ge=1), severity: Optional[str] = None,
+                     fields: Optional[str] = None, parse_json: bool = False):
+    """
+    Get reports filed in a unit, newest first. With `recursive=true` the reports
+    of every subordinate unit are merged in, in one query. Supports `cursor`,
+    `since`, the report field filters, `fields` and `parse_json` like GET /reports.
+    """
+    if unit_id not in hierarchy_cache.get().units:
+        raise HTTPException(status_code=404, detail="Unit not found")
     
-    columns = ["input_id", "soldier_id", "timestamp", "raw_text", "raw_audio_ref"]
-    return {
-        "soldier_id": soldier_id, 
-        "raw_inputs": [dict(zip(columns, row)) for row in rows]
+    conditions, params = report_field_conditions(start, min_casualties, min_enemy_count, severity)
+    if recursive:
+        # A unary + keeps SQLite off the unit_id indexes so it walks reports in timestamp order;
+        # field filters are selective enough that the (partial) unit indexes always win
+        walk = since is None and not conditions and subtree_is_large(unit_id, limit)
+        column = "+r.unit_id" if walk else "r.unit_id"
+        result = query_report_feed(request, response, limit, cursor, since,
+                                   conditions=(f"{column} IN ({SUBTREE_UNITS})", *conditions),
+                                   params=(unit_id, *params), fields=fields, parse_json=parse_json)
+    else:
+        result = query_report_feed(request, response, limit, cursor, since,
+                                   conditions=("r.unit_id = ?", *conditions), params=(unit_id, *params),
+                                   fields=fields, parse_json=parse_json)
+    if isinstance(result, Response):
+        return result
+    return responses.json_response(request, {"unit_id": unit_id, "recursive": recursive, **result},
+                                   response.headers)
+
+# ===== UNIT STATS =====
+# Per-unit counters kept current by triggers (see add_unit_stats.sql). A
+# subtree is summed over unit_closure, so the cost depends on how many units
+# it holds, never on how many reports or inputs exist.
+
+UNIT_STATS_COLUMNS = ["report_count", "last_report_at", "raw_input_count", "last_input_at", "pending_suggestions"]
+
+UNIT_STATS_QUERY = """
+    SELECT COALESCE(SUM(s.report_count), 0), MAX(s.last_report_at),
+           COALESCE(SUM(s.raw_input_count), 0), MAX(s.last_input_at),
+           COALESCE(SUM(s.pending_suggestions), 0)
+    FROM unit_stats s
+    WHERE s.unit_id IN ({units})
+"""
+
+UNIT_TYPE_STATS_QUERY = """
+    SELECT t.report_type, SUM(t.report_count), MAX(t.last_report_at)
+    FROM unit_report_type_stats t
+    WHERE t.unit_id IN ({units})
+    GROUP BY t.report_type
+    HAVING SUM(t.report_count) > 0
+    ORDER BY t.report_type
+"""
+
+def read_unit_stats(conn: sqlite3.Connection, units: str, unit_id: str) -> Dict[str, Any]:
+    """Summed stats for the units selected by `units` (an SQL expression taking unit_id)."""
+    stats = dict(zip(UNIT_STATS_COLUMNS, conn.execute(UNIT_STATS_QUERY.format(units=units), (unit_id,)).fetchone()))
+    stats["reports_by_type"] = {
+        report_type: {"count": count, "last_report_at": last_report_at}
+        for report_type, count, last_report_at in conn.execute(UNIT_TYPE_STATS_QUERY.format(units=units), (unit_id,))
     }
+    return stats
 
-@app.get("/soldiers/{soldier_id}/reports")
-async def get_soldier_reports(soldier_id: str, limit: int = 500):
-    """Get structured reports from a specific soldier."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT r.*, s.name as soldier_name, u.name as unit_name
-        FROM reports r
-        JOIN soldiers s ON r.soldier_id = s.soldier_id
-        JOIN units u ON r.unit_id = u.unit_id
-        WHERE r.soldier_id = ? 
-        ORDER BY r.timestamp DESC 
-        LIMIT ?
-    """, (soldier_id, limit))
-    rows = c.fetchall()
-    conn.close()
+@app.get("/units/{unit_id}/stats")
+def get_unit_stats(unit_id: str):
+    """
+    Report, raw input and pending suggestion counts and latest timestamps for a
+    unit on its own (`unit`) and together with every subordinate unit (`subtree`).
+    """
+    if unit_id not in hierarchy_cache.get().units:
+        raise HTTPException(status_code=404, detail="Unit not found")
     
-    columns = ["report_id", "soldier_id", "unit_id", "timestamp", "report_type", 
-               "structured_json", "confidence", "soldier_name", "unit_name"]
-    return {
-        "soldier_id": soldier_id, 
-        "reports": [dict(zip(columns, row)) for row in rows]
-    }
+    try:
+        with db_read() as conn:
+            # Both from the same snapshot
+            conn.execute("BEGIN")
+            unit = read_unit_stats(conn, "?", unit_id)
+            subtree = read_unit_stats(conn, SUBTREE_UNITS, unit_id)
+            subtree["units"] = conn.execute(
+                "SELECT COUNT(*) FROM unit_closure WHERE ancestor_id = ?", (unit_id,)
+            ).fetchone()[0]
+        return {"unit_id": unit_id, "unit": unit, "subtree": subtree}
+    
+    except Exception as e:
+        logger.error(f"Error fetching unit stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/reports")
-async def get_all_reports(limit: int = 1000):
-    """Get all structured reports."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT r.*, s.name as soldier_name, u.name as unit_name
-        FROM reports r
-        JOIN soldiers s ON r.soldier_id = s.soldier_id
-        JOIN units u ON r.unit_id = u.unit_id
-        ORDER BY r.timestamp DESC 
-        LIMIT ?
-    """, (limit,))
-    rows = c.fetchall()
-    conn.close()
+# ===== END UNIT STATS =====
+
+# ===== SOLDIER ACTIVITY =====
+# Hourly per-soldier input and report counters kept by triggers (see
+# add_soldier_activity.sql). A window sums at most one bucket per hour it
+# spans, so a soldier's activity costs the same however much they sent.
+# Windows are hour-aligned: "24h" is the current hour and the 23 before it.
+
+ACTIVITY_WINDOWS = [("1h", 1), ("24h", 24), ("7d", 7 * 24)]
+
+def activity_query(condition: str) -> str:
+    """Per-soldier activity for the soldiers matching `condition`, one SUM per window and counter."""
+    sums = ", ".join(
+        f"COALESCE(SUM(CASE WHEN b.bucket >= ? THEN b.{column} END), 0)"
+        for column in ("inputs", "reports") for _ in ACTIVITY_WINDOWS
+    )
+    return f"""
+        SELECT s.soldier_id, s.name, s.rank, s.unit_id, a.last_input_at, a.last_report_at, {sums}
+        FROM soldiers s
+        LEFT JOIN soldier_activity a ON a.soldier_id = s.soldier_id
+        LEFT JOIN soldier_activity_buckets b ON b.soldier_id = s.soldier_id AND b.bucket >= ?
+        WHERE {condition}
+        GROUP BY s.soldier_id
+        ORDER BY s.soldier_id
+    """
+
+def read_activity(condition: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+    """Run activity_query(condition) and shape each row."""
+    # Buckets are local hours (database/migrations/localize_activity_buckets.sql)
+    now = datetime.now()
+    starts = [(now - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H") for _, hours in ACTIVITY_WINDOWS]
+    with db_read() as conn:
+        rows = conn.execute(activity_query(condition), [*starts, *starts, min(starts), *params]).fetchall()
+    windows = [name for name, _ in ACTIVITY_WINDOWS]
+    count = len(windows)
+    return [
+        {
+            "soldier_id": row[0], "name": row[1], "rank": row[2], "unit_id": row[3],
+            "last_input_at": row[4], "last_report_at": row[5],
+            "inputs": dict(zip(windows, row[6:6 + count])),
+            "reports": dict(zip(windows, row[6 + count:6 + 2 * count])),
+        }
+        for row in rows
+    ]
+
+@app.get("/soldiers/activity")
+def get_soldiers_activity(unit_id: Optional[str] = None, recursive: bool = False):
+    """
+    Raw input and report counts over the last hour, 24 hours and 7 days, and the
+    latest input and report time, per soldier; optionally for one unit (and its subtree).
+    """
+    try:
+        if unit_id:
+            condition = f"s.unit_id IN ({SUBTREE_UNITS})" if recursive else "s.unit_id = ?"
+            soldiers = read_activity(condition, (unit_id,))
+        else:
+            soldiers = read_activity("1", ())
+        return {"windows": [name for name, _ in ACTIVITY_WINDOWS], "soldiers": soldiers}
     
-    columns = ["report_id", "soldier_id", "unit_id", "timestamp", "report_type", 
-               "structured_json", "confidence", "soldier_name", "unit_name"]
-    return {"reports": [dict(zip(columns, row)) for row in rows]}
+    except Exception as e:
+        logger.error(f"Error fetching soldier activity: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/soldiers/{soldier_id}/activity")
+def get_soldier_activity(soldier_id: str):
+    """Activity summary (see GET /soldiers/activity) for one soldier."""
+    try:
+        soldiers = read_activity("s.soldier_id = ?", (soldier_id,))
+    except Exception as e:
+        logger.error(f"Error fetching soldier activity: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not soldiers:
+        raise HTTPException(status_code=404, detail="Soldier not found")
+    return soldiers[0]
+
+# ===== END SOLDIER ACTIVITY =====
 
 @app.post("/soldiers/{soldier_id}/reports")
-async def create_report(soldier_id: str, report_data: Dict[str, Any]):
+def create_report(soldier_id: str, report_data: Dict[str, Any]):
     """Create a new structured report."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Get soldier's unit_id
-        c.execute("SELECT unit_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
-        result = c.fetchone()
-        if not result:
-            raise HTTPException(status_code=404, detail="Soldier not found")
-        
-        unit_id = result[0]
-        report_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
-        
-        report_type = report_data.get("report_type", "UNKNOWN")
-        structured_json = report_data.get("structured_json", {})
-        text_content = report_data.get("text_content", "")
-        
-        # Generate a clean description for the report
-        if "description" not in structured_json:
-            structured_json["description"] = generate_report_description(report_type, structured_json)
-        
-        c.execute("""
-            INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            report_id, soldier_id, unit_id, timestamp,
-            report_type,
-            json.dumps(structured_json),
-            report_data.get("confidence", 0.0)
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        # SMART NOTIFICATIONS: Analyze for triggers after saving report
-        try:
-            analyze_report_triggers(
-                report_id=report_id,
-                soldier_id=soldier_id,
-                unit_id=unit_id,
-                report_type=report_type,
-                structured_json=structured_json,
-                text_content=text_content
-            )
-        except Exception as e:
-            # Log but don't crash if trigger analysis fails
-            logger.error(f"Error in trigger analysis (non-fatal): {e}", exc_info=True)
+        # Get soldier's unit_id, from the hierarchy cache when possible
+        unit_id = hierarchy_cache.get().soldier_unit(soldier_id)
+        
+        with db_write() as conn:
+            c = conn.cursor()
+        
+            if unit_id is None:
+                c.execute("SELECT unit_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
+                result = c.fetchone()
+                if not result:
+                    raise HTTPException(status_code=404, detail="Soldier not found")
+                unit_id = result[0]
+        
+            report_id = str(uuid.uuid4())
+            timestamp = datetime.now().isoformat()
+        
+            report_type = report_data.get("report_type", "UNKNOWN")
+            structured_json = report_data.get("structured_json", {})
+            text_content = report_data.get("text_content", "")
+        
+            # Generate a clean description for the report
+            if "description" not in structured_json:
+                structured_json["description"] = generate_report_description(report_type, structured_json)
+        
+            c.execute("""
+                INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                report_id, soldier_id, unit_id, timestamp,
+                report_type,
+                json.dumps(structured_json),
+                report_data.get("confidence", 0.0)
+            ))
+            mark_analysis_queued(conn, [report_id])
+        
+        broker.publish("report-created", {
+            "report_id": report_id, "soldier_id": soldier_id, "unit_id": unit_id,
+            "report_type": report_type, "timestamp": timestamp
+        })
+        
+        # SMART NOTIFICATIONS: triggers are analysed in the background
+        queue_report_analysis([{
+            "report_id": report_id,
+            "soldier_id": soldier_id,
+            "unit_id": unit_id,
+            "report_type": report_type,
+            "structured_json": structured_json,
+            "text_content": text_content,
+            "timestamp": timestamp
+        }])
         
         return {"message": "Report created successfully", "report_id": report_id}
         
@@ -617,195 +1424,411 @@ async def create_report(soldier_id: str, report_data: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/soldiers/{soldier_id}/raw_inputs")
-async def create_raw_input(soldier_id: str, input_data: Dict[str, Any]):
+def create_raw_input(soldier_id: str, input_data: Dict[str, Any]):
     """Create a new raw input from a soldier."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Verify soldier exists
-        c.execute("SELECT soldier_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
-        if not c.fetchone():
-            raise HTTPException(status_code=404, detail="Soldier not found")
-        
-        input_id = str(uuid.uuid4())
-        timestamp = input_data.get("timestamp", datetime.now().isoformat())
-        
-        c.execute("""
-            INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text, raw_audio_ref, input_type, confidence, location_ref)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            input_id, soldier_id, timestamp,
-            input_data.get("raw_text", ""),
-            input_data.get("raw_audio_ref"),
-            input_data.get("input_type", "voice"),
-            input_data.get("confidence", 0.0),
-            input_data.get("location_ref")
-        ))
-        
-        conn.commit()
-        conn.close()
+        with db_write() as conn:
+            c = conn.cursor()
+        
+            # Verify soldier exists
+            c.execute("SELECT soldier_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
+            if not c.fetchone():
+                raise HTTPException(status_code=404, detail="Soldier not found")
+        
+            input_id = str(uuid.uuid4())
+            timestamp = input_data.get("timestamp", datetime.now().isoformat())
+        
+            c.execute("""
+                INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text, raw_audio_ref, input_type, confidence, location_ref)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                input_id, soldier_id, timestamp,
+                input_data.get("raw_text", ""),
+                input_data.get("raw_audio_ref"),
+                input_data.get("input_type", "voice"),
+                input_data.get("confidence", 0.0),
+                input_data.get("location_ref")
+            ))
         
+        broker.publish("raw-input-created", {"input_id": input_id, "soldier_id": soldier_id, "timestamp": timestamp})
         return {"message": "Raw input created successfully", "input_id": input_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ===== BULK INGESTION =====
+# Gateways and import scripts push many rows at once. Each batch resolves
+# soldiers in one pass, inserts every valid item with executemany in a single
+# transaction and reports a result per item; invalid items are skipped.
+
+MAX_BATCH_SIZE = 1000
+
+def batch_items(body: Dict[str, Any], key: str) -> List[Any]:
+    """Pull the item list out of a batch request body, enforcing the size limit."""
+    items = body.get(key)
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail=f"Request body must contain a '{key}' list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} items)")
+    return items
+
+def resolve_soldier_units(soldier_ids: List[str]) -> Dict[str, str]:
+    """Map soldier_id -> unit_id, from the hierarchy cache plus one query for any misses."""
+    snapshot = hierarchy_cache.get()
+    units = {}
+    missing = set()
+    for soldier_id in soldier_ids:
+        unit_id = snapshot.soldier_unit(soldier_id)
+        if unit_id is None:
+            missing.add(soldier_id)
+        else:
+            units[soldier_id] = unit_id
+    if missing:
+        missing = list(missing)
+        with db_read() as conn:
+            rows = conn.execute(
+                f"SELECT soldier_id, unit_id FROM soldiers WHERE soldier_id IN ({','.join('?' * len(missing))})",
+                missing
+            ).fetchall()
+        units.update(rows)
+    return units
+
+def batch_text(item: Dict[str, Any], key: str, default: Optional[str] = None, required: bool = False) -> Optional[str]:
+    """A string field of a batch item; ValueError if it has the wrong type or a required one is empty."""
+    value = item.get(key, default)
+    if required and (value is None or value == ""):
+        raise ValueError(f"{key} is required")
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value
+
+def batch_confidence(item: Dict[str, Any]) -> float:
+    value = item.get("confidence", 0.0)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("confidence must be a number")
+    return float(value)
+
+def batch_timestamp(item: Dict[str, Any], now: str) -> str:
+    """An item's timestamp (ISO string or epoch seconds), `now` if it has none."""
+    value = item.get("timestamp")
+    return now if value is None or value == "" else message_timestamp(value)
+
+def insert_batch_rows(query: str, rows: List[tuple], after: Optional[Callable] = None) -> List[Optional[str]]:
+    """
+    Insert rows in one transaction, calling after(conn, rows) inside it.
+    If that fails for anything but a locked database, the rows are written
+    again one at a time so only the bad ones are lost. Returns the error of
+    each row, or None.
+    """
+    try:
+        with db_write() as conn:
+            conn.executemany(query, rows)
+            if after:
+                after(conn, rows)
+        return [None] * len(rows)
+    except sqlite3.Error as e:
+        if is_locked(e):
+            raise
+        if len(rows) == 1:
+            return [str(e)]
+        logger.warning(f"Batch insert of {len(rows)} rows failed ({e}), inserting them one at a time")
+    errors: List[Optional[str]] = []
+    for row in rows:
+        try:
+            with db_write() as conn:
+                conn.execute(query, row)
+                if after:
+                    after(conn, [row])
+            errors.append(None)
+        except sqlite3.Error as e:
+            if is_locked(e):
+                raise
+            errors.append(str(e))
+    return errors
+
+@app.post("/reports/batch")
+def create_reports_batch(body: Dict[str, Any]):
+    """
+    Create many structured reports in one transaction.
+    Body: {"reports": [{"soldier_id", "report_type", "structured_json", "text_content", "confidence", "timestamp"}]}
+    """
+    items = batch_items(body, "reports")
+    try:
+        soldier_units = resolve_soldier_units(
+            [item["soldier_id"] for item in items if isinstance(item, dict) and isinstance(item.get("soldier_id"), str)]
+        )
+        
+        results = []
+        rows = []
+        analysis = []
+        now = datetime.now().isoformat()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({"index": index, "status": "error", "error": "Item must be an object"})
+                continue
+            try:
+                # Checked per item: one bad row would fail the whole insert
+                soldier_id = batch_text(item, "soldier_id", required=True)
+                report_type = batch_text(item, "report_type", required=True)
+                text_content = batch_text(item, "text_content", "") or ""
+                confidence = batch_confidence(item)
+                timestamp = batch_timestamp(item, now)
+                structured_json = item.get("structured_json") or {}
+                if not isinstance(structured_json, dict):
+                    raise ValueError("structured_json must be an object")
+            except ValueError as e:
+                results.append({"index": index, "status": "error", "error": str(e)})
+                continue
+            unit_id = soldier_units.get(soldier_id)
+            if unit_id is None:
+                results.append({"index": index, "status": "error", "error": "Soldier not found"})
+                continue
+            
+            report_id = str(uuid.uuid4())
+            if "description" not in structured_json:
+                structured_json["description"] = generate_report_description(report_type, structured_json)
+            rows.append((
+                report_id, soldier_id, unit_id, timestamp, report_type,
+                json.dumps(structured_json), confidence
+            ))
+            analysis.append({
+                "report_id": report_id, "soldier_id": soldier_id, "unit_id": unit_id,
+                "report_type": report_type, "structured_json": structured_json,
+                "text_content": text_content, "timestamp": timestamp
+            })
+            results.append({"index": index, "status": "created", "report_id": report_id})
+        
+        if rows:
+            errors = insert_batch_rows("""
+                INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows, lambda conn, saved: mark_analysis_queued(conn, [row[0] for row in saved]))
+            failed = {row[0]: error for row, error in zip(rows, errors) if error}
+            if failed:
+                for result in results:
+                    if result.get("report_id") in failed:
+                        result.update(status="error", error=failed.pop(result["report_id"]))
+                        del result["report_id"]
+                rows = [row for row, error in zip(rows, errors) if not error]
+                analysis = [report for report, error in zip(analysis, errors) if not error]
+        
+        if rows:
+            # One event for the whole batch keeps subscriber queues from overflowing
+            broker.publish("reports-created", {"count": len(rows), "unit_ids": sorted({row[2] for row in rows})})
+            queue_report_analysis(analysis)
+        
+        return {"created": len(rows), "failed": len(items) - len(rows), "results": results}
+        
+    except Exception as e:
+        logger.error(f"Error creating report batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/raw_inputs/batch")
+def create_raw_inputs_batch(body: Dict[str, Any]):
+    """
+    Create many raw inputs in one transaction.
+    Body: {"raw_inputs": [{"soldier_id", "raw_text", "timestamp", "raw_audio_ref", "input_type", "confidence", "location_ref"}]}
+    """
+    items = batch_items(body, "raw_inputs")
+    try:
+        soldier_units = resolve_soldier_units(
+            [item["soldier_id"] for item in items if isinstance(item, dict) and isinstance(item.get("soldier_id"), str)]
+        )
+        
+        results = []
+        rows = []
+        now = datetime.now().isoformat()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({"index": index, "status": "error", "error": "Item must be an object"})
+                continue
+            try:
+                # Checked per item: one bad row would fail the whole insert
+                row = (
+                    str(uuid.uuid4()),
+                    batch_text(item, "soldier_id", required=True),
+                    batch_timestamp(item, now),
+                    batch_text(item, "raw_text", required=True),
+                    batch_text(item, "raw_audio_ref"),
+                    batch_text(item, "input_type", "voice"),
+                    batch_confidence(item),
+                    batch_text(item, "location_ref"),
+                )
+            except ValueError as e:
+                results.append({"index": index, "status": "error", "error": str(e)})
+                continue
+            if row[1] not in soldier_units:
+                results.append({"index": index, "status": "error", "error": "Soldier not found"})
+                continue
+            rows.append(row)
+            results.append({"index": index, "status": "created", "input_id": row[0]})
+        
+        if rows:
+            errors = insert_batch_rows("""
+                INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text, raw_audio_ref, input_type, confidence, location_ref)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            failed = {row[0]: error for row, error in zip(rows, errors) if error}
+            if failed:
+                for result in results:
+                    if result.get("input_id") in failed:
+                        result.update(status="error", error=failed.pop(result["input_id"]))
+                        del result["input_id"]
+                rows = [row for row, error in zip(rows, errors) if not error]
+        
+        if rows:
+            broker.publish("raw-inputs-created", {"count": len(rows), "soldier_ids": sorted({row[1] for row in rows})})
+        
+        return {"created": len(rows), "failed": len(items) - len(rows), "results": results}
+        
+    except Exception as e:
+        logger.error(f"Error creating raw input batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===== END BULK INGESTION =====
+
 @app.post("/soldiers")
-async def create_soldier(soldier_data: Dict[str, Any]):
+def create_soldier(soldier_data: Dict[str, Any]):
     """Create a new soldier."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Verify unit exists
-        unit_id = soldier_data.get("unit_id")
-        c.execute("SELECT unit_id FROM units WHERE unit_id = ?", (unit_id,))
-        if not c.fetchone():
-            raise HTTPException(status_code=404, detail="Unit not found")
-        
-        soldier_id = soldier_data.get("soldier_id", str(uuid.uuid4()))
-        timestamp = datetime.now().isoformat()
-        
-        c.execute("""
-            INSERT INTO soldiers (soldier_id, name, rank, unit_id, device_id, status, created_at, last_seen)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            soldier_id,
-            soldier_data.get("name"),
-            soldier_data.get("rank"),
-            unit_id,
-            soldier_data.get("device_id"),
-            soldier_data.get("status", "active"),
-            timestamp,
-            timestamp
-        ))
-        
-        conn.commit()
-        conn.close()
+        with db_write() as conn:
+            c = conn.cursor()
+        
+            # Verify unit exists
+            unit_id = soldier_data.get("unit_id")
+            c.execute("SELECT unit_id FROM units WHERE unit_id = ?", (unit_id,))
+            if not c.fetchone():
+                raise HTTPException(status_code=404, detail="Unit not found")
+        
+            soldier_id = soldier_data.get("soldier_id", str(uuid.uuid4()))
+            timestamp = datetime.now().isoformat()
         
+            c.execute("""
+                INSERT INTO soldiers (soldier_id, name, rank, unit_id, device_id, status, created_at, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                soldier_id,
+                soldier_data.get("name"),
+                soldier_data.get("rank"),
+                unit_id,
+                soldier_data.get("device_id"),
+                soldier_data.get("status", "active"),
+                timestamp,
+                timestamp
+            ))
+        
+        hierarchy_cache.invalidate()
+        broker.publish("hierarchy-changed", {"change": "soldier-created", "soldier_id": soldier_id, "unit_id": unit_id})
         return {"message": "Soldier created successfully", "soldier_id": soldier_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/units")
-async def create_unit(unit_data: Dict[str, Any]):
+def create_unit(unit_data: Dict[str, Any]):
     """Create a new military unit."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Verify parent unit exists if specified
-        parent_unit_id = unit_data.get("parent_unit_id")
-        if parent_unit_id:
-            c.execute("SELECT unit_id FROM units WHERE unit_id = ?", (parent_unit_id,))
-            if not c.fetchone():
-                raise HTTPException(status_code=404, detail="Parent unit not found")
+        with db_write() as conn:
+            c = conn.cursor()
         
-        unit_id = unit_data.get("unit_id", str(uuid.uuid4()))
-        timestamp = datetime.now().isoformat()
+            # Verify parent unit exists if specified
+            parent_unit_id = unit_data.get("parent_unit_id")
+            if parent_unit_id:
+                c.execute("SELECT unit_id FROM units WHERE unit_id = ?", (parent_unit_id,))
+                if not c.fetchone():
+                    raise HTTPException(status_code=404, detail="Parent unit not found")
         
-        c.execute("""
-            INSERT INTO units (unit_id, name, parent_unit_id, level, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            unit_id,
-            unit_data.get("name"),
-            parent_unit_id,
-            unit_data.get("level"),
-            timestamp
-        ))
+            unit_id = unit_data.get("unit_id", str(uuid.uuid4()))
+            timestamp = datetime.now().isoformat()
         
-        conn.commit()
-        conn.close()
+            c.execute("""
+                INSERT INTO units (unit_id, name, parent_unit_id, level, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                unit_id,
+                unit_data.get("name"),
+                parent_unit_id,
+                unit_data.get("level"),
+                timestamp
+            ))
         
+        hierarchy_cache.invalidate()
+        broker.publish("hierarchy-changed", {"change": "unit-created", "unit_id": unit_id, "parent_unit_id": parent_unit_id})
         return {"message": "Unit created successfully", "unit_id": unit_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.put("/soldiers/{soldier_id}/status")
-async def update_soldier_status(soldier_id: str, status_data: Dict[str, Any]):
-    """Update a soldier's status and last_seen timestamp."""
+@app.put("/units/{unit_id}/parent")
+def reparent_unit(unit_id: str, parent_data: Dict[str, Any]):
+    """Move a unit (and its whole subtree) under a new parent; null makes it top-level."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
+        parent_unit_id = parent_data.get("parent_unit_id")
+        with db_write() as conn:
+            c = conn.cursor()
+        
+            c.execute("SELECT parent_unit_id FROM units WHERE unit_id = ?", (unit_id,))
+            result = c.fetchone()
+            if not result:
+                raise HTTPException(status_code=404, detail="Unit not found")
+            old_parent_unit_id = result[0]
+        
+            if parent_unit_id:
+                c.execute("SELECT unit_id FROM units WHERE unit_id = ?", (parent_unit_id,))
+                if not c.fetchone():
+                    raise HTTPException(status_code=404, detail="Parent unit not found")
+                c.execute(
+                    "SELECT 1 FROM unit_closure WHERE ancestor_id = ? AND descendant_id = ?",
+                    (unit_id, parent_unit_id)
+                )
+                if c.fetchone():
+                    raise HTTPException(status_code=400, detail="Unit cannot be moved under its own subtree")
         
-        # Verify soldier exists
-        c.execute("SELECT soldier_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
-        if not c.fetchone():
-            raise HTTPException(status_code=404, detail="Soldier not found")
+            # unit_closure is updated by the unit_closure_reparent trigger
+            c.execute("UPDATE units SET parent_unit_id = ? WHERE unit_id = ?", (parent_unit_id, unit_id))
         
-        timestamp = datetime.now().isoformat()
+        hierarchy_cache.invalidate()
+        broker.publish("hierarchy-changed", {
+            "change": "unit-reparented", "unit_id": unit_id,
+            "old_parent_unit_id": old_parent_unit_id, "parent_unit_id": parent_unit_id
+        })
+        return {"message": "Unit moved successfully", "unit_id": unit_id, "parent_unit_id": parent_unit_id}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error moving unit {unit_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/soldiers/{soldier_id}/status")
+def update_soldier_status(soldier_id: str, status_data: Dict[str, Any]):
+    """Update a soldier's status and last_seen timestamp."""
+    try:
+        with db_write() as conn:
+            c = conn.cursor()
         
-        c.execute("""
-            UPDATE soldiers 
-            SET status = ?, last_seen = ?
-            WHERE soldier_id = ?
-        """, (status_data.get("status"), timestamp, soldier_id))
+            # Verify soldier exists
+            c.execute("SELECT soldier_id FROM soldiers WHERE soldier_id = ?", (soldier_id,))
+            if not c.fetchone():
+                raise HTTPException(status_code=404, detail="Soldier not found")
         
-        conn.commit()
-        conn.close()
+            timestamp = datetime.now().isoformat()
         
+            c.execute("""
+                UPDATE soldiers 
+                SET status = ?, last_seen = ?
+                WHERE soldier_id = ?
+            """, (status_data.get("status"), timestamp, soldier_id))
+        
+        hierarchy_cache.invalidate()
+        broker.publish("hierarchy-changed", {
+            "change": "soldier-status", "soldier_id": soldier_id, "status": status_data.get("status")
+        })
         return {"message": "Soldier status updated successfully", "soldier_id": soldier_id, "last_seen": timestamp}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/hierarchy")
-async def get_military_hierarchy():
-    """Get the complete military hierarchy structure."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    # Get all units - select specific columns to avoid unpacking issues
-    c.execute("SELECT unit_id, name, parent_unit_id, level FROM units ORDER BY level, name")
-    units = c.fetchall()
-    
-    # Get all soldiers
-    c.execute("""
-        SELECT s.soldier_id, s.name, s.rank, s.unit_id, s.device_id
-        FROM soldiers s 
-        ORDER BY s.rank, s.name
-    """)
-    soldiers = c.fetchall()
-    
-    conn.close()
-    
-    # Build hierarchy structure
-    units_dict = {}
-    for unit in units:
-        unit_id, name, parent_id, level = unit
-        units_dict[unit_id] = {
-            "unit_id": unit_id,
-            "name": name,
-            "parent_unit_id": parent_id,
-            "level": level,
-            "soldiers": [],
-            "subunits": []
-        }
-    
-    # Add soldiers to units
-    soldier_columns = ["soldier_id", "name", "rank", "unit_id", "device_id"]
-    for soldier in soldiers:
-        soldier_data = dict(zip(soldier_columns, soldier))
-        unit_id = soldier_data["unit_id"]
-        if unit_id in units_dict:
-            units_dict[unit_id]["soldiers"].append(soldier_data)
-    
-    # Build parent-child relationships
-    hierarchy = []
-    for unit_id, unit_data in units_dict.items():
-        if unit_data["parent_unit_id"] is None:  # Top-level unit
-            hierarchy.append(unit_data)
-        else:
-            parent_id = unit_data["parent_unit_id"]
-            if parent_id in units_dict:
-                units_dict[parent_id]["subunits"].append(unit_data)
-    
-    return {"hierarchy": hierarchy}
-
 # Pydantic models for API
 class ChatMessage(BaseModel):
     message: str
@@ -884,15 +1907,7 @@ Reports ({report_count} total):
             
             try:
                 # Call Gemini API with safety settings to avoid blocks
-                gemini_response = gemini_model.generate_content(
-                    prompt,
-                    safety_settings={
-                        'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                        'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                        'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                        'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-                    }
-                )
+                gemini_response = await generate_content(prompt)
                 response = gemini_response.text
                 logger.info(f"Gemini API success: Generated response for {report_count} reports")
             except Exception as e:
@@ -971,15 +1986,7 @@ Provide ONLY the JSON object, no additional text."""
         
         try:
             # Call Gemini API
-            gemini_response = gemini_model.generate_content(
-                prompt,
-                safety_settings={
-                    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-                }
-            )
+            gemini_response = await generate_content(prompt)
             
             response_text = gemini_response.text.strip()
             
@@ -1025,27 +2032,22 @@ Provide ONLY the JSON object, no additional text."""
         raise HTTPException(status_code=500, detail=f"Error generating FRAGO suggestion: {str(e)}")
 
 @app.post("/frago/generate")
-async def generate_frago(request: FRAGOGenerateRequest):
+def generate_frago(request: FRAGOGenerateRequest):
     """
     Generate and save a formatted FRAGO document.
     """
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Get next FRAGO number
-        c.execute("SELECT next_number FROM frago_sequence WHERE id = 1")
-        frago_number = c.fetchone()[0]
+        frago_number = report_numbers.next("FRAGO")
         
-        # Increment sequence
-        c.execute("UPDATE frago_sequence SET next_number = next_number + 1 WHERE id = 1")
+        with db_write() as conn:
+            c = conn.cursor()
         
-        # Format FRAGO document
-        fields = request.frago_fields
-        unit_name = request.unit_name
-        timestamp = datetime.now()
+            # Format FRAGO document
+            fields = request.frago_fields
+            unit_name = request.unit_name
+            timestamp = datetime.now()
         
-        formatted_doc = f"""FRAGMENTARY ORDER {frago_number:04d}
+            formatted_doc = f"""FRAGMENTARY ORDER {frago_number:04d}
 {unit_name}
 {timestamp.strftime('%d%H%M%S %b %Y').upper()}
 
@@ -1068,26 +2070,23 @@ ACKNOWLEDGE.
 //END OF FRAGO//
 """
         
-        # Save to database
-        frago_id = str(uuid.uuid4())
-        c.execute("""
-            INSERT INTO fragos (
-                frago_id, frago_number, unit_id, created_at, 
-                suggested_fields, final_fields, formatted_document, source_reports
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            frago_id,
-            frago_number,
-            request.unit_id,
-            timestamp.isoformat(),
-            json.dumps(fields),  # For this version, suggested = final
-            json.dumps(fields),
-            formatted_doc,
-            json.dumps(request.source_report_ids)
-        ))
-        
-        conn.commit()
-        conn.close()
+            # Save to database
+            frago_id = str(uuid.uuid4())
+            c.execute("""
+                INSERT INTO fragos (
+                    frago_id, frago_number, unit_id, created_at, 
+                    suggested_fields, final_fields, formatted_document, source_reports
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                frago_id,
+                frago_number,
+                request.unit_id,
+                timestamp.isoformat(),
+                json.dumps(fields),  # For this version, suggested = final
+                json.dumps(fields),
+                formatted_doc,
+                json.dumps(request.source_report_ids)
+            ))
         
         logger.info(f"FRAGO {frago_number:04d} generated for {unit_name}")
         
@@ -1114,9 +2113,18 @@ async def suggest_casevac(request: Request):
         unit_id = body.get("unit_id")
         unit_name = body.get("unit_name")
         soldier_ids = body.get("soldier_ids", [])
-        reports = body.get("reports", [])
+        reports = body.get("reports")
         suggestion_id = body.get("suggestion_id")
         
+        # Without reports in the body, read the unit's casualty reports straight from the database
+        if reports is None and unit_id:
+            # Off the event loop: the query blocks
+            reports = await anyio.to_thread.run_sync(
+                recent_unit_reports, unit_id, "r.report_type = 'CASUALTY'",
+                ["location", "casualty_type", "casualty_count", "severity", "injuries", "immediate_care_given"],
+            )
+        reports = reports or []
+        
         logger.info(f"CASEVAC suggest - Received {len(reports)} reports for {unit_name}")
         
         # Ensure reports is a list
@@ -1208,15 +2216,7 @@ Guidelines:
 - Default NBC to "N" unless reports mention chemical/biological/radiological hazards"""
 
         try:
-            response = gemini_model.generate_content(
-                prompt,
-                safety_settings={
-                    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-                }
-            )
+            response = await generate_content(prompt)
             response_text = response.text.strip()
             
             logger.info(f"CASEVAC suggest - Gemini response received, length: {len(response_text)}")
@@ -1271,40 +2271,17 @@ Guidelines:
 
 
 @app.post("/casevac/generate")
-async def generate_casevac(request: Request):
+def generate_casevac(body: Dict[str, Any]):
     """
     Generate a formatted 9-line CASEVAC document and save to database.
     """
-    conn = None
     try:
-        body = await request.json()
         unit_id = body.get("unit_id")
         unit_name = body.get("unit_name")
         casevac_fields = body.get("casevac_fields", {})
         source_report_ids = body.get("source_report_ids", [])
         
-        conn = get_db_connection()
-        conn.execute("PRAGMA busy_timeout = 5000")  # Wait up to 5 seconds for locks
-        c = conn.cursor()
-        
-        # Get next CASEVAC number
-        c.execute("SELECT next_number FROM report_sequences WHERE report_type = 'CASEVAC'")
-        row = c.fetchone()
-        
-        if row is None:
-            # Initialize CASEVAC sequence if not exists
-            c.execute("INSERT INTO report_sequences (report_type, next_number) VALUES ('CASEVAC', 1)")
-            conn.commit()
-            casevac_number = 1
-        else:
-            casevac_number = row[0]
-        
-        # Update sequence
-        c.execute(
-            "UPDATE report_sequences SET next_number = ? WHERE report_type = 'CASEVAC'",
-            (casevac_number + 1,)
-        )
-        conn.commit()  # Commit sequence update immediately
+        casevac_number = report_numbers.next("CASEVAC")
         
         timestamp = datetime.now()
         dtg = timestamp.strftime("%d%H%M%SZ %b %Y").upper()
@@ -1395,25 +2372,27 @@ GENERATED BY: AI-ASSISTED CASEVAC BUILDER
             "source_reports": source_report_ids
         }
         
-        c.execute("""
-            INSERT INTO reports 
-            (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            report_id,
-            unit_id,  # Using unit_id as soldier_id for generated reports
-            unit_id,
-            timestamp.isoformat(),
-            "CASEVAC",
-            json.dumps(casevac_data),
-            1.0,  # Full confidence for generated reports
-            "generated"
-        ))
-        
-        conn.commit()
-        conn.close()
+        with db_write() as conn:
+            conn.execute("""
+                INSERT INTO reports 
+                (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                report_id,
+                unit_id,  # Using unit_id as soldier_id for generated reports
+                unit_id,
+                timestamp.isoformat(),
+                "CASEVAC",
+                json.dumps(casevac_data),
+                1.0,  # Full confidence for generated reports
+                "generated"
+            ))
         
         logger.info(f"Generated CASEVAC {casevac_number} for unit {unit_name}")
+        broker.publish("report-created", {
+            "report_id": report_id, "soldier_id": unit_id, "unit_id": unit_id,
+            "report_type": "CASEVAC", "timestamp": timestamp.isoformat()
+        })
         
         return {
             "casevac_id": report_id,
@@ -1423,8 +2402,6 @@ GENERATED BY: AI-ASSISTED CASEVAC BUILDER
         }
         
     except Exception as e:
-        if conn:
-            conn.close()
         logger.error(f"Error generating CASEVAC: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error generating CASEVAC: {str(e)}")
 
@@ -1440,9 +2417,18 @@ async def suggest_eoincrep(request: Request):
         unit_id = body.get("unit_id")
         unit_name = body.get("unit_name")
         soldier_ids = body.get("soldier_ids", [])
-        reports = body.get("reports", [])
+        reports = body.get("reports")
         suggestion_id = body.get("suggestion_id")
         
+        # Without reports in the body, read the unit's contact reports straight from the database
+        if reports is None and unit_id:
+            # Off the event loop: the query blocks
+            reports = await anyio.to_thread.run_sync(
+                recent_unit_reports, unit_id, "r.report_type IN ('CONTACT', 'INTELLIGENCE', 'SITREP')",
+                ["location", "enemy_count", "vehicle_count", "description"],
+            )
+        reports = reports or []
+        
         logger.info(f"EOINCREP suggest - Received {len(reports)} reports for {unit_name}")
         
         # Ensure reports is a list
@@ -1533,15 +2519,7 @@ Guidelines:
 - Recommend "Monitor and report" for LOW, "Prepare to engage" for MEDIUM, "Engage with support" for HIGH, "Immediate support required" for CRITICAL"""
 
         try:
-            response = gemini_model.generate_content(
-                prompt,
-                safety_settings={
-                    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-                }
-            )
+            response = await generate_content(prompt)
             response_text = response.text.strip()
             
             logger.info(f"EOINCREP suggest - Gemini response received, length: {len(response_text)}")
@@ -1597,39 +2575,17 @@ Guidelines:
 
 
 @app.post("/eoincrep/generate")
-async def generate_eoincrep(request: Request):
+def generate_eoincrep(body: Dict[str, Any]):
     """
     Generate a formatted EOINCREP (Enemy Observation/Incident Report) document and save to database.
     """
-    conn = None
     try:
-        body = await request.json()
         unit_id = body.get("unit_id")
         unit_name = body.get("unit_name")
         eoincrep_fields = body.get("eoincrep_fields", {})
         source_report_ids = body.get("source_report_ids", [])
         
-        conn = get_db_connection()
-        conn.execute("PRAGMA busy_timeout = 5000")
-        c = conn.cursor()
-        
-        # Get next EOINCREP number
-        c.execute("SELECT next_number FROM report_sequences WHERE report_type = 'EOINCREP'")
-        row = c.fetchone()
-        
-        if row is None:
-            c.execute("INSERT INTO report_sequences (report_type, next_number) VALUES ('EOINCREP', 1)")
-            conn.commit()
-            eoincrep_number = 1
-        else:
-            eoincrep_number = row[0]
-        
-        # Update sequence
-        c.execute(
-            "UPDATE report_sequences SET next_number = ? WHERE report_type = 'EOINCREP'",
-            (eoincrep_number + 1,)
-        )
-        conn.commit()
+        eoincrep_number = report_numbers.next("EOINCREP")
         
         timestamp = datetime.now()
         dtg = timestamp.strftime("%d%H%M%SZ %b %Y").upper()
@@ -1696,25 +2652,27 @@ GENERATED BY: AI-ASSISTED EOINCREP BUILDER
             "source_reports": source_report_ids
         }
         
-        c.execute("""
-            INSERT INTO reports 
-            (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            report_id,
-            unit_id,
-            unit_id,
-            timestamp.isoformat(),
-            "EOINCREP",
-            json.dumps(eoincrep_data),
-            1.0,
-            "generated"
-        ))
-        
-        conn.commit()
-        conn.close()
+        with db_write() as conn:
+            conn.execute("""
+                INSERT INTO reports 
+                (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                report_id,
+                unit_id,
+                unit_id,
+                timestamp.isoformat(),
+                "EOINCREP",
+                json.dumps(eoincrep_data),
+                1.0,
+                "generated"
+            ))
         
         logger.info(f"Generated EOINCREP {eoincrep_number} for unit {unit_name}")
+        broker.publish("report-created", {
+            "report_id": report_id, "soldier_id": unit_id, "unit_id": unit_id,
+            "report_type": "EOINCREP", "timestamp": timestamp.isoformat()
+        })
         
         return {
             "eoincrep_id": report_id,
@@ -1724,144 +2682,144 @@ GENERATED BY: AI-ASSISTED EOINCREP BUILDER
         }
         
     except Exception as e:
-        if conn:
-            conn.close()
         logger.error(f"Error generating EOINCREP: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error generating EOINCREP: {str(e)}")
 
 # ===== SUGGESTIONS API ENDPOINTS =====
 
+@app.get("/events")
+async def event_stream():
+    """
+    Server-sent event stream of dashboard updates, pushed as writes commit.
+    Events: report-created, raw-input-created, suggestion-created,
+    suggestion-updated, suggestion-dismissed, hierarchy-changed.
+    """
+    return StreamingResponse(
+        broker.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/suggestions/reanalyze")
-async def reanalyze_all_reports():
+def reanalyze_reports(full: bool = False):
     """
-    Reanalyze all recent reports (last 50) to generate suggestions.
-    This is useful for retroactively creating suggestions from existing reports.
+    Start reanalysing reports for suggestions in the background and return at once.
+    By default only reports after the last run's watermark that were not analysed
+    yet; with `full=true` every report (existing suggestions are not duplicated).
+    Progress: GET /api/suggestions/reanalyze/status.
     """
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Get recent reports (last 50)
-        c.execute("""
-            SELECT report_id, soldier_id, unit_id, report_type, structured_json, timestamp
-            FROM reports
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """)
-        
-        rows = c.fetchall()
-        total_reports = len(rows)
-        suggestions_created = 0
-        
-        logger.info(f"Reanalyzing {total_reports} recent reports...")
-        
-        for row in rows:
-            report_id, soldier_id, unit_id, report_type, structured_json_str, timestamp = row
-            
-            try:
-                # Parse the structured JSON
-                structured_json = json.loads(structured_json_str) if structured_json_str else {}
-                
-                # Get text content if available
-                text_content = structured_json.get("description", "")
-                
-                # Analyze for triggers
-                triggers = analyze_report_triggers(
-                    report_id=report_id,
-                    soldier_id=soldier_id,
-                    unit_id=unit_id,
-                    report_type=report_type,
-                    structured_json=structured_json,
-                    text_content=text_content
-                )
-                
-                if triggers:
-                    suggestions_created += len(triggers)
-                    
-            except Exception as e:
-                logger.warning(f"Error analyzing report {report_id}: {e}")
-                continue
-        
-        conn.close()
-        
-        logger.info(f"Reanalysis complete: created {suggestions_created} suggestions from {total_reports} reports")
-        
+        started = reanalysis_job.start(full)
         return {
-            "message": "Reanalysis complete",
-            "reports_analyzed": total_reports,
-            "suggestions_created": suggestions_created
+            "message": "Reanalysis started" if started else "Reanalysis already running",
+            "status": reanalysis_job.status()
         }
-        
+    
+    except Exception as e:
+        logger.error(f"Error starting reanalysis: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/suggestions/reanalyze/status")
+def get_reanalysis_status():
+    """Progress of the current or last reanalysis run, and the persisted watermark."""
+    try:
+        return reanalysis_job.status()
     except Exception as e:
-        logger.error(f"Error reanalyzing reports: {e}", exc_info=True)
+        logger.error(f"Error fetching reanalysis status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/suggestions")
-async def get_suggestions(status: str = "pending", unit_id: Optional[str] = None):
+def get_suggestions(request: Request, response: Response, status: str = "pending", 
+                    unit_id: Optional[str] = None, recursive: bool = False,
+                    since: Optional[int] = Query(None, ge=0)):
     """
     Get all suggestions, optionally filtered by status and unit_id.
     Status options: 'pending', 'draft_created', 'approved', 'dismissed'
+    With `recursive=true` the unit filter includes every subordinate unit.
+    
+    With `since` (a previous response's `watermark`), returns every suggestion
+    created or changed after it regardless of status, so clients also see
+    suggestions leaving the list they display.
     """
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        query = "SELECT * FROM suggestions WHERE status = ?"
-        params = [status]
-        
-        if unit_id:
-            query += " AND unit_id = ?"
-            params.append(unit_id)
-        
-        query += " ORDER BY created_at DESC LIMIT 50"
-        
-        c.execute(query, params)
-        rows = c.fetchall()
+        with db_read() as conn:
+            c = conn.cursor()
+            
+            # Read the watermark and the rows from the same snapshot
+            c.execute("BEGIN")
+            watermark = read_watermark(conn)
+            etag = watermark_etag(watermark)
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+            
+            if since is not None:
+                if since >= watermark:
+                    return {"suggestions": [], "count": 0, "watermark": since}
+                query = "SELECT * FROM suggestions WHERE row_version > ?"
+                params = [since]
+            else:
+                query = "SELECT * FROM suggestions WHERE status = ?"
+                params = [status]
+        
+            if unit_id and recursive:
+                query += f" AND unit_id IN ({SUBTREE_UNITS})"
+                params.append(unit_id)
+            elif unit_id:
+                query += " AND unit_id = ?"
+                params.append(unit_id)
+        
+            if since is not None:
+                query += " ORDER BY row_version LIMIT 51"
+            else:
+                query += " ORDER BY created_at DESC LIMIT 50"
         
-        # Get column names
-        columns = [description[0] for description in c.description]
+            c.execute(query, params)
+            rows = c.fetchall()
         
-        # Convert to list of dicts
-        suggestions = []
-        for row in rows:
-            suggestion = dict(zip(columns, row))
-            # Parse JSON fields
-            suggestion['source_reports'] = json.loads(suggestion['source_reports'])
-            if suggestion.get('suggested_fields'):
-                suggestion['suggested_fields'] = json.loads(suggestion['suggested_fields'])
-            suggestions.append(suggestion)
+            # Get column names
+            columns = [description[0] for description in c.description]
+            
+            if since is not None:
+                rows, watermark = trim_changes(rows, 50, columns.index("row_version"), watermark)
         
-        conn.close()
+            # Convert to list of dicts
+            suggestions = []
+            for row in rows:
+                suggestion = dict(zip(columns, row))
+                # Parse JSON fields
+                suggestion['source_reports'] = json.loads(suggestion['source_reports'])
+                if suggestion.get('suggested_fields'):
+                    suggestion['suggested_fields'] = json.loads(suggestion['suggested_fields'])
+                suggestions.append(suggestion)
         
-        return {"suggestions": suggestions, "count": len(suggestions)}
+        return {"suggestions": suggestions, "count": len(suggestions), "watermark": watermark}
         
     except Exception as e:
         logger.error(f"Error fetching suggestions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/suggestions/{suggestion_id}")
-async def dismiss_suggestion(suggestion_id: str, dismissed_by: str = "user"):
+def dismiss_suggestion(suggestion_id: str, dismissed_by: str = "user"):
     """
     Dismiss a suggestion (mark as dismissed).
     """
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
+        with db_write() as conn:
+            c = conn.cursor()
         
-        c.execute("""
-            UPDATE suggestions 
-            SET status = 'dismissed', 
-                dismissed_at = ?,
-                dismissed_by = ?
-            WHERE suggestion_id = ?
-        """, (datetime.now().isoformat(), dismissed_by, suggestion_id))
-        
-        if c.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Suggestion not found")
+            c.execute("""
+                UPDATE suggestions 
+                SET status = 'dismissed', 
+                    dismissed_at = ?,
+                    dismissed_by = ?
+                WHERE suggestion_id = ?
+            """, (datetime.now().isoformat(), dismissed_by, suggestion_id))
         
-        conn.commit()
-        conn.close()
+            if c.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Suggestion not found")
         
+        broker.publish("suggestion-dismissed", {"suggestion_id": suggestion_id, "dismissed_by": dismissed_by})
         return {"message": "Suggestion dismissed successfully"}
         
     except HTTPException:
@@ -1871,34 +2829,33 @@ async def dismiss_suggestion(suggestion_id: str, dismissed_by: str = "user"):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/suggestions/{suggestion_id}/create-draft")
-async def create_suggestion_draft(suggestion_id: str):
+def create_suggestion_draft(suggestion_id: str):
     """
     Create a draft report from a suggestion (Level 3 - Auto-Drafts).
     This endpoint will be used when user clicks "Create Draft" on a suggestion.
     """
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
+        with db_write() as conn:
+            c = conn.cursor()
         
-        # Get the suggestion
-        c.execute("SELECT * FROM suggestions WHERE suggestion_id = ?", (suggestion_id,))
-        row = c.fetchone()
+            # Get the suggestion
+            c.execute("SELECT * FROM suggestions WHERE suggestion_id = ?", (suggestion_id,))
+            row = c.fetchone()
         
-        if not row:
-            raise HTTPException(status_code=404, detail="Suggestion not found")
+            if not row:
+                raise HTTPException(status_code=404, detail="Suggestion not found")
         
-        columns = [description[0] for description in c.description]
-        suggestion = dict(zip(columns, row))
+            columns = [description[0] for description in c.description]
+            suggestion = dict(zip(columns, row))
         
-        # Update suggestion status
-        c.execute("""
-            UPDATE suggestions 
-            SET status = 'draft_created'
-            WHERE suggestion_id = ?
-        """, (suggestion_id,))
+            # Update suggestion status
+            c.execute("""
+                UPDATE suggestions 
+                SET status = 'draft_created'
+                WHERE suggestion_id = ?
+            """, (suggestion_id,))
         
-        conn.commit()
-        conn.close()
+        broker.publish("suggestion-updated", {"suggestion_id": suggestion_id, "status": "draft_created"})
         
         # Return the suggestion data for the builder to use
         return {
@@ -1922,6 +2879,17 @@ async def create_suggestion_draft(suggestion_id: str):
 @app.on_event("startup")
 async def startup_event():
     """Initialize MQTT client on startup."""
+    # Synchronous endpoints run on AnyIO's worker threads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    broker.bind(asyncio.get_running_loop())
+    soldier_input_queue.start()
+    heartbeat_buffer.start()
+    comm_log_buffer.start()
+    retention_job.start()
+    suggestion_expiry_job.start()
+    report_analysis_queue.start()
+    requeue_pending_analysis()
+    
     mqtt_thread = threading.Thread(target=start_mqtt_client)
     mqtt_thread.daemon = True
     mqtt_thread.start()
@@ -1929,11 +2897,22 @@ async def startup_event():
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Clean up MQTT client on shutdown."""
+    """Clean up MQTT client, drain queued writes and close database connections on shutdown."""
     global mqtt_client
     if mqtt_client:
         mqtt_client.loop_stop()
         mqtt_client.disconnect()
+    # No more MQTT messages can arrive; write out everything still queued
+    soldier_input_queue.stop()
+    heartbeat_buffer.stop()
+    comm_log_buffer.stop()
+    report_analysis_queue.stop()
+    reanalysis_job.stop()
+    retention_job.stop()
+    suggestion_expiry_job.stop()
+    report_numbers.release()
+    llm_executor.shutdown(wait=False, cancel_futures=True)
+    close_pool()
 
 if __name__ == "__main__":
     import uvicorn
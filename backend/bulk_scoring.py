@@ -0,0 +1,288 @@
+"""
+Bulk trigger scoring over the whole reports table.
+
+Re-scoring history after a rule change one report at a time means a
+detect_report_triggers() call per row. score_reports() instead reads
+reports in rowid chunks of chunk_size, loads the fields the rules look at
+into NumPy columns and evaluates the CASEVAC / EOINCREP / EOD rules as
+array operations:
+
+  counts      casualties, enemy_count and vehicle_count as integer
+              arrays, read with trigger_rules.report_count() as the
+              per-row code does
+  keywords    a bitmap per report of the trigger_rules categories in its
+              description, built one keyword at a time over the whole
+              chunk with np.strings.find plus the same whole-word checks
+              as KeywordMatcher.match()
+
+Only reports that trigger a rule come back into Python, to build the
+suggestion text, so the result is exactly what detect_report_triggers()
+gives for each stored report (tests/test_bulk_scoring.py checks this).
+
+With workers > 1 the rowid range is split into shards scored in a process
+pool, each worker reading the database on its own read-only connection.
+save_scores() then saves the suggestions in the caller's transaction,
+deduplicated as the analysis workers do (see suggestion_store.py).
+
+Run from the command line:
+    python backend/bulk_scoring.py [--workers 4] [--dry-run] [--db PATH]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import methodcaller
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+import trigger_rules
+from suggestion_store import dedup_key, upsert_suggestions
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000                  # reports loaded into arrays at a time
+SHARD_CHUNKS = 4                    # chunks per process pool task
+EXISTING_LOOKUP_SIZE = 500          # report ids per report timestamp query
+# Descriptions longer than this are matched one by one; the fixed-width
+# string array is as wide as its longest entry
+ARRAY_TEXT_LIMIT = 1000
+
+# Keyword category -> bit in the keyword bitmap
+CATEGORY_BITS = {category: 1 << index for index, category in enumerate(sorted(trigger_rules.RULES))}
+CASEVAC_RULE, EOINCREP_RULE = 1, 2
+REPORT_TYPE_RULES: Dict[str, int] = {}
+for _report_type in trigger_rules.CASEVAC_REPORT_TYPES:
+    REPORT_TYPE_RULES[_report_type] = REPORT_TYPE_RULES.get(_report_type, 0) | CASEVAC_RULE
+for _report_type in trigger_rules.EOINCREP_REPORT_TYPES:
+    REPORT_TYPE_RULES[_report_type] = REPORT_TYPE_RULES.get(_report_type, 0) | EOINCREP_RULE
+
+SCORE_QUERY = """
+    SELECT rowid, report_id, unit_id, report_type, structured_json
+    FROM reports
+    WHERE rowid > ? AND rowid <= ?
+    ORDER BY rowid
+    LIMIT ?
+"""
+
+# (report_id, unit_id, suggestion type, urgency, reason, confidence)
+Score = Tuple[str, str, str, str, str, float]
+
+
+def _load(structured_json: str) -> Dict[str, Any]:
+    try:
+        fields = orjson.loads(structured_json) if orjson is not None else json.loads(structured_json)
+    except (TypeError, ValueError):
+        return {}
+    return fields if isinstance(fields, dict) else {}
+
+
+def _counts(fields: List[Dict[str, Any]], *names: str) -> List[int]:
+    return [trigger_rules.report_count(document, *names) for document in fields]
+
+
+def _keyword_bit(categories) -> int:
+    return sum(CATEGORY_BITS[category] for category in categories)
+
+
+def keyword_bits(texts: List[str]) -> np.ndarray:
+    """trigger_rules category bitmap of each text, as KeywordMatcher.match() would find."""
+    bits = np.zeros(len(texts), dtype=np.uint8)
+    short = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) <= ARRAY_TEXT_LIMIT
+    for i in np.flatnonzero(~short).tolist():
+        bits[i] = _keyword_bit(trigger_rules.matcher.match(texts[i]))
+    rows = np.flatnonzero(short)
+    text = np.strings.lower(np.array([texts[i] for i in rows.tolist()], dtype=str))
+    for word, stem, categories in trigger_rules.matcher.keywords:
+        bit = _keyword_bit(categories)
+        start = np.strings.find(text, word)
+        found = np.flatnonzero(start >= 0)
+        start = start[found]
+        # The first occurrence may sit inside another word ("determine" for
+        # "mine"); look again past it until a whole word is found
+        while len(found):
+            candidates = text[found]
+            ok = (start == 0) | ~np.strings.isalnum(np.strings.slice(candidates, np.maximum(start - 1, 0), start))
+            if not stem:
+                after = start + len(word)
+                after += np.strings.slice(candidates, after, after + 1) == "s"
+                ok &= ~np.strings.isalnum(np.strings.slice(candidates, after, after + 1))
+            bits[rows[found[ok]]] |= bit
+            found, start = found[~ok], np.strings.find(candidates[~ok], word, start[~ok] + 1)
+            found, start = found[start >= 0], start[start >= 0]
+    return bits
+
+
+def score_chunk(rows: List[tuple]) -> List[Score]:
+    """Evaluate the trigger rules over one chunk of SCORE_QUERY rows."""
+    if not rows:
+        return []
+    _, report_ids, unit_ids, report_types, documents = zip(*rows)
+    fields = list(map(_load, documents))
+    casualties = _counts(fields, *trigger_rules.CASUALTY_FIELDS)
+    enemy_counts = _counts(fields, "enemy_count")
+    vehicle_counts = _counts(fields, "vehicle_count")
+
+    rules = np.fromiter(map(REPORT_TYPE_RULES.get, report_types, repeat(0)), dtype=np.uint8, count=len(rows))
+    keywords = keyword_bits(list(map(str, map(methodcaller("get", "description", ""), fields))))
+    casualty = np.array(casualties, dtype=np.int64)
+    enemy = np.array(enemy_counts, dtype=np.int64)
+    vehicle = np.array(vehicle_counts, dtype=np.int64)
+
+    injury = (keywords & CATEGORY_BITS["injury"]) != 0
+    urgent = (keywords & CATEGORY_BITS["urgent"]) != 0
+    enemy_keyword = (keywords & CATEGORY_BITS["enemy"]) != 0
+    eod = (keywords & CATEGORY_BITS["eod"]) != 0
+
+    casevac = ((rules & CASEVAC_RULE) != 0) & ((casualty > 0) | injury)
+    eoincrep = ((rules & EOINCREP_RULE) != 0) & ((enemy > 0) | enemy_keyword)
+    significant = (enemy > 10) | (vehicle > 2)
+
+    scores: List[Score] = []
+    for i in np.flatnonzero(casevac).tolist():
+        if urgent[i]:
+            scores.append((report_ids[i], unit_ids[i], "CASEVAC", "URGENT",
+                           "URGENT: Critical casualties detected", 0.95))
+        elif str(fields[i].get("severity", "")).lower() in ("critical", "severe"):
+            scores.append((report_ids[i], unit_ids[i], "CASEVAC", "URGENT",
+                           f"URGENT: {casualties[i]} critical casualties", 0.95))
+        elif casualty[i] >= 1:
+            scores.append((report_ids[i], unit_ids[i], "CASEVAC", "HIGH",
+                           f"{casualties[i]} casualties reported", 0.90))
+        else:
+            scores.append((report_ids[i], unit_ids[i], "CASEVAC", "MEDIUM", "Potential casualties detected", 0.75))
+    for i in np.flatnonzero(eoincrep).tolist():
+        if significant[i]:
+            scores.append((report_ids[i], unit_ids[i], "EOINCREP", "HIGH",
+                           f"Significant enemy force: {enemy_counts[i]} personnel, {vehicle_counts[i]} vehicles",
+                           0.90))
+        elif enemy[i] > 0:
+            scores.append((report_ids[i], unit_ids[i], "EOINCREP", "MEDIUM",
+                           f"Enemy contact: {enemy_counts[i]} hostiles", 0.85))
+        else:
+            scores.append((report_ids[i], unit_ids[i], "EOINCREP", "MEDIUM", "Enemy activity detected", 0.80))
+    for i in np.flatnonzero(eod).tolist():
+        scores.append((report_ids[i], unit_ids[i], "EOINCREP_EOD", "HIGH", "Explosive ordnance/device detected", 0.85))
+    return scores
+
+
+def score_range(conn, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Tuple[int, List[Score]]:
+    """Score reports with start < rowid <= end, chunk by chunk. Returns (reports read, scores)."""
+    reports = 0
+    scores: List[Score] = []
+    position = start
+    while position < end:
+        rows = conn.execute(SCORE_QUERY, (position, end, chunk_size)).fetchall()
+        if not rows:
+            break
+        reports += len(rows)
+        scores.extend(score_chunk(rows))
+        position = rows[-1][0]
+    return reports, scores
+
+
+def _score_shard(db_path: str, start: int, end: int, chunk_size: int) -> Tuple[int, List[Score]]:
+    """Process pool task: score one rowid range on a read-only connection."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return score_range(conn, start, end, chunk_size)
+    finally:
+        conn.close()
+
+
+def score_reports(db_path: str, workers: int = 1, chunk_size: int = CHUNK_SIZE) -> Tuple[int, List[Score]]:
+    """Score every report in the database. Returns (reports read, scores)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        first, last = conn.execute("SELECT COALESCE(MIN(rowid), 1) - 1, COALESCE(MAX(rowid), 0) FROM reports").fetchone()
+        if workers <= 1:
+            return score_range(conn, first, last, chunk_size)
+    finally:
+        conn.close()
+
+    shard = chunk_size * SHARD_CHUNKS
+    bounds = [(start, min(start + shard, last)) for start in range(first, last, shard)]
+    reports = 0
+    scores: List[Score] = []
+    # spawn, not fork: the backend process has writer and worker threads
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for shard_reports, shard_scores in executor.map(
+                _score_shard, *zip(*[(db_path, start, end, chunk_size) for start, end in bounds])):
+            reports += shard_reports
+            scores.extend(shard_scores)
+    return reports, scores
+
+
+def save_scores(conn, scores: List[Score]) -> int:
+    """
+    Save the scored suggestions in the caller's transaction through
+    suggestion_store.upsert_suggestions(): repeat reports are merged into a
+    pending suggestion and reports already recorded in one are skipped.
+    Returns how many suggestions were created.
+    """
+    report_ids = list({report_id for report_id, *_ in scores})
+    timestamps = {}
+    for offset in range(0, len(report_ids), EXISTING_LOOKUP_SIZE):
+        chunk = report_ids[offset:offset + EXISTING_LOOKUP_SIZE]
+        timestamps.update(conn.execute(
+            f"SELECT report_id, timestamp FROM reports WHERE report_id IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall())
+
+    suggestions = [
+        {"type": suggestion_type, "urgency": urgency, "reason": reason, "confidence": confidence,
+         "source_reports": [report_id], "unit_id": unit_id,
+         "dedup_key": dedup_key(suggestion_type, unit_id, report_id, timestamps.get(report_id))}
+        for report_id, unit_id, suggestion_type, urgency, reason, confidence in scores
+    ]
+    return sum(1 for result in upsert_suggestions(conn, suggestions) if result is not None and result[1])
+
+
+def rescore(write, db_path: str, workers: int = 1, dry_run: bool = False) -> Dict[str, Any]:
+    """Score every report and save the new suggestions in one write transaction."""
+    started = time.perf_counter()
+    reports, scores = score_reports(db_path, workers)
+    scored = time.perf_counter()
+    created = 0
+    if not dry_run:
+        with write() as conn:
+            created = save_scores(conn, scores)
+    result = {
+        "reports": reports,
+        "triggers": len(scores),
+        "created": created,
+        "score_ms": round((scored - started) * 1000, 1),
+        "save_ms": round((time.perf_counter() - scored) * 1000, 1),
+    }
+    logger.info(f"Bulk scoring: {result}")
+    return result
+
+
+def main():
+    from db import DATABASE_DIR, close_pool, get_pool
+
+    parser = argparse.ArgumentParser(description="Score every report against the trigger rules")
+    parser.add_argument("--db", default=os.path.join(DATABASE_DIR, "military_hierarchy.db"))
+    parser.add_argument("--workers", type=int, default=1, help="Processes to score shards in")
+    parser.add_argument("--dry-run", action="store_true", help="Score and count, but save nothing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = get_pool(args.db)
+    result = rescore(pool.write, args.db, args.workers, args.dry_run)
+    close_pool()
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
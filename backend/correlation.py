@@ -0,0 +1,214 @@
+"""
+Sliding-window correlation of report triggers across units.
+
+detect_report_triggers() looks at one report at a time, so three CONTACT
+reports from different squads of one platoon within ten minutes make three
+separate suggestions and never one stronger one. Correlator keeps, in
+memory, the recent triggers of every unit in time buckets of
+bucket_seconds covering the last window_seconds. Each trigger counts
+towards the unit that reported it and that unit's parent. Once a unit's
+window holds min_reports triggers of one type from at least min_units
+different reporting units, observe() returns an aggregated suggestion for
+it:
+
+  urgency         the highest urgency in the window, raised one level
+  confidence      1 - product(1 - confidence) over the window's triggers
+                  (capped at MAX_CONFIDENCE): independent reports of the
+                  same thing make it more likely
+  source_reports  the window's reports, newest max_source_reports
+
+Each (unit, type) correlation keeps one suggestion_id while its window has
+triggers, so later reports update the same suggestion instead of adding
+another one. After window_seconds with no triggers the state is dropped
+and the next burst starts a new suggestion.
+
+State is bounded: at most window_seconds / bucket_seconds + 1 buckets per
+(unit, type), each keeping at most max_bucket_reports report ids (the
+counts keep going past that), and idle units are pruned. No database reads
+are needed; unit parents come from the caller (the hierarchy cache).
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+WINDOW_SECONDS = 600
+BUCKET_SECONDS = 60
+MIN_REPORTS = 3
+MIN_UNITS = 2
+MAX_BUCKET_REPORTS = 25
+MAX_SOURCE_REPORTS = 50
+MAX_CONFIDENCE = 0.99
+PRUNE_EVERY = 1000                  # observations between sweeps for idle units
+
+URGENCY_LEVELS = ["LOW", "MEDIUM", "HIGH", "URGENT"]
+
+
+class _Bucket:
+    __slots__ = ("start", "count", "units", "report_ids", "miss", "urgency")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.units: Set[str] = set()
+        self.report_ids: List[str] = []
+        self.miss = 1.0             # product of (1 - confidence)
+        self.urgency = 0            # index into URGENCY_LEVELS
+
+
+class _Window:
+    __slots__ = ("buckets", "seen", "suggestion_id")
+
+    def __init__(self):
+        self.buckets: Deque[_Bucket] = deque()
+        self.seen: Set[str] = set()         # report ids in the buckets
+        self.suggestion_id: Optional[str] = None
+
+
+class Correlator:
+    """Per-unit sliding windows of recent triggers (thread-safe)."""
+
+    def __init__(self, parent_of: Callable[[str], Optional[str]], window_seconds: float = WINDOW_SECONDS,
+                 bucket_seconds: float = BUCKET_SECONDS, min_reports: int = MIN_REPORTS,
+                 min_units: int = MIN_UNITS, max_bucket_reports: int = MAX_BUCKET_REPORTS,
+                 max_source_reports: int = MAX_SOURCE_REPORTS):
+        self._parent_of = parent_of
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.min_reports = min_reports
+        self.min_units = min_units
+        self.max_bucket_reports = max_bucket_reports
+        self.max_source_reports = max_source_reports
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self._lock = threading.Lock()
+        self._observations = 0
+        self.observed = 0
+        self.ignored = 0
+        self.emitted = 0
+
+    def observe(self, report_id: str, unit_id: str, trigger: Dict[str, Any],
+                at: Optional[float] = None, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Add one report's trigger (a detect_report_triggers() dict) seen at
+        epoch time `at`. Returns the correlated suggestions it creates or
+        changes, each with the suggestion_id to upsert and "created" on the
+        first emission. Triggers older than the window, and reports already
+        counted, are ignored.
+        """
+        now = time.time() if now is None else now
+        at = now if at is None else at
+        if at < now - self.window_seconds:
+            with self._lock:
+                self.ignored += 1
+            return []
+
+        urgency = URGENCY_LEVELS.index(trigger["urgency"]) if trigger["urgency"] in URGENCY_LEVELS else 0
+        targets = [unit_id]
+        parent = self._parent_of(unit_id)
+        if parent is not None:
+            targets.append(parent)
+
+        correlations = []
+        with self._lock:
+            self.observed += 1
+            for target in targets:
+                correlation = self._add((target, trigger["type"]), report_id, unit_id, trigger["confidence"],
+                                        urgency, at, now)
+                if correlation is not None:
+                    correlations.append(correlation)
+            self._observations += 1
+            if self._observations >= PRUNE_EVERY:
+                self._observations = 0
+                self._prune(now)
+            self.emitted += len(correlations)
+        return correlations
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "windows": len(self._windows),
+                "buckets": sum(len(window.buckets) for window in self._windows.values()),
+                "observed": self.observed,
+                "ignored": self.ignored,
+                "emitted": self.emitted,
+            }
+
+    def _add(self, key: Tuple[str, str], report_id: str, unit_id: str, confidence: float, urgency: int,
+             at: float, now: float) -> Optional[Dict[str, Any]]:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+        self._expire(window, now)
+        if not window.buckets:
+            # Quiet for a whole window: the next correlation is a new suggestion
+            window.suggestion_id = None
+        if report_id in window.seen:
+            return None
+
+        start = at - at % self.bucket_seconds
+        bucket = None
+        for candidate in reversed(window.buckets):
+            if candidate.start <= start:
+                bucket = candidate if candidate.start == start else None
+                break
+        if bucket is None:
+            bucket = _Bucket(start)
+            window.buckets.append(bucket)
+            if len(window.buckets) > 1 and window.buckets[-2].start > start:
+                # A late report: keep the buckets in time order
+                window.buckets = deque(sorted(window.buckets, key=lambda item: item.start))
+        bucket.count += 1
+        bucket.units.add(unit_id)
+        bucket.miss *= 1.0 - min(max(confidence, 0.0), 1.0)
+        bucket.urgency = max(bucket.urgency, urgency)
+        if len(bucket.report_ids) < self.max_bucket_reports:
+            bucket.report_ids.append(report_id)
+            window.seen.add(report_id)
+        return self._correlate(key, window)
+
+    def _expire(self, window: _Window, now: float):
+        horizon = now - self.window_seconds
+        while window.buckets and window.buckets[0].start + self.bucket_seconds <= horizon:
+            window.seen.difference_update(window.buckets.popleft().report_ids)
+
+    def _correlate(self, key: Tuple[str, str], window: _Window) -> Optional[Dict[str, Any]]:
+        count = sum(bucket.count for bucket in window.buckets)
+        units: Set[str] = set()
+        for bucket in window.buckets:
+            units |= bucket.units
+        if count < self.min_reports or len(units) < self.min_units:
+            return None
+
+        miss = 1.0
+        urgency = 0
+        report_ids: List[str] = []
+        for bucket in reversed(window.buckets):
+            miss *= bucket.miss
+            urgency = max(urgency, bucket.urgency)
+            report_ids.extend(reversed(bucket.report_ids))
+        report_ids = report_ids[:self.max_source_reports][::-1]
+
+        created = window.suggestion_id is None
+        if created:
+            window.suggestion_id = str(uuid.uuid4())
+        unit_id, suggestion_type = key
+        minutes = round(self.window_seconds / 60)
+        return {
+            "suggestion_id": window.suggestion_id,
+            "created": created,
+            "type": suggestion_type,
+            "unit_id": unit_id,
+            "urgency": URGENCY_LEVELS[min(urgency + 1, len(URGENCY_LEVELS) - 1)],
+            "confidence": round(min(1.0 - miss, MAX_CONFIDENCE), 4),
+            "reason": f"{count} {suggestion_type} reports from {len(units)} units in the last {minutes} min",
+            "source_reports": report_ids,
+        }
+
+    def _prune(self, now: float):
+        for key in list(self._windows):
+            window = self._windows[key]
+            self._expire(window, now)
+            if not window.buckets:
+                del self._windows[key]
@@ -0,0 +1,245 @@
+"""
+SQLite connection management for the backend.
+
+All endpoints and MQTT handlers share one process-wide pool: a bounded set of
+reader connections and a single writer connection. Every connection is
+configured once (WAL, synchronous=NORMAL, mmap, page cache, busy timeout)
+instead of paying connect + pragma + cache warm-up on every request.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
+SCHEMA_PATH = os.path.join(DATABASE_DIR, "schema.sql")
+MIGRATIONS_DIR = os.path.join(DATABASE_DIR, "migrations")
+
+# Migration scripts in database/migrations, applied in this order
+MIGRATIONS = [
+    "add_frago_table.sql",
+    "add_suggestions_table.sql",
+    "add_pagination_indexes.sql",
+    "add_change_tracking.sql",
+    "add_unit_report_indexes.sql",
+    "add_unit_closure.sql",
+    "enable_incremental_vacuum.sql",
+    "add_full_text_search.sql",
+    "add_report_json_columns.sql",
+    "move_frago_sequence.sql",
+    "add_unit_stats.sql",
+    "add_soldier_activity.sql",
+    "add_report_analysis.sql",
+    "add_reanalysis_state.sql",
+    "add_suggestion_dedup.sql",
+    "localize_activity_buckets.sql",
+    "index_report_field_values.sql",
+]
+
+# Migrations that cannot run inside a transaction (VACUUM). They must be safe
+# to run again, as they are recorded only after they finish.
+NON_TRANSACTIONAL_MIGRATIONS = {"enable_incremental_vacuum.sql"}
+
+# Pool sizing and per-connection tuning
+READER_POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024       # 256 MB memory-mapped I/O
+CACHE_SIZE_KB = 64 * 1024           # 64 MB page cache per connection
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """Apply the per-connection PRAGMAs. Called once when a connection is opened."""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def apply_migrations(conn: sqlite3.Connection):
+    """
+    Bring the database schema up to date.
+
+    A fresh database gets database/schema.sql first. Each migration is then
+    applied once and recorded in schema_migrations, in the same transaction,
+    so a migration that fails part way leaves nothing behind and is retried
+    on the next start.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    has_units = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'units'"
+    ).fetchone()
+    if not has_units:
+        with open(SCHEMA_PATH) as f:
+            run_script(conn, f.read())
+        logger.info("Created base schema from schema.sql")
+
+    applied = {row[0] for row in conn.execute("SELECT name FROM schema_migrations")}
+    for name in MIGRATIONS:
+        if name in applied:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            script = f.read()
+        record = "INSERT INTO schema_migrations (name) VALUES ('{}');".format(name.replace("'", "''"))
+        if name in NON_TRANSACTIONAL_MIGRATIONS:
+            conn.executescript(script)
+            conn.executescript(record)
+        else:
+            run_script(conn, f"{script}\n{record}")
+        logger.info(f"Applied migration {name}")
+
+
+def run_script(conn: sqlite3.Connection, script: str):
+    """
+    Run an SQL script as one transaction. executescript() commits after
+    each statement unless the script opens its own transaction.
+    """
+    try:
+        conn.executescript(f"BEGIN;\n{script}\nCOMMIT;")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reader connections plus one serialized writer connection.
+
+    WAL mode lets readers run concurrently with the writer, so reads never wait
+    on inserts. Writes go through a single connection guarded by a lock, which
+    avoids SQLITE_BUSY between our own threads entirely.
+    """
+
+    def __init__(self, db_path: str, reader_pool_size: int = READER_POOL_SIZE):
+        self.db_path = db_path
+        self.reader_pool_size = reader_pool_size
+        self._readers = queue.LifoQueue(maxsize=reader_pool_size)
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._write_depth = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are handed between threads (threadpool, MQTT thread),
+        # but only ever used by one thread at a time.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        configure_connection(conn)
+        return conn
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if self._readers_created < self.reader_pool_size:
+                self._readers_created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._readers_created -= 1
+                    raise
+
+        # Pool exhausted - wait for a connection to be returned
+        return self._readers.get()
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            return
+        # Never hand out a connection with an open transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._readers.put(conn)
+
+    @contextmanager
+    def read(self):
+        """Borrow a reader connection for the duration of the block."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    @contextmanager
+    def write(self):
+        """
+        Use the writer connection for the duration of the block.
+
+        Commits when the block exits normally and rolls back on any exception.
+        Nested use from the same thread joins the outer transaction.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            self._write_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                if self._write_depth == 1 and conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if self._write_depth == 1 and conn.in_transaction:
+                    conn.commit()
+            finally:
+                self._write_depth -= 1
+
+    def close(self):
+        """Close every pooled connection."""
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            self._readers_created = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None or _pool.db_path != db_path:
+        with _pool_lock:
+            if _pool is None or _pool.db_path != db_path:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(db_path)
+                with _pool.write() as conn:
+                    apply_migrations(conn)
+                logger.info(f"Opened SQLite connection pool for {os.path.basename(db_path)}")
+    return _pool
+
+
+def close_pool():
+    """Close the process-wide pool (used on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,122 @@
+"""
+Server-sent event broadcasting for the dashboard.
+
+Endpoints and MQTT handlers publish small change notifications (a report was
+created, a suggestion was dismissed, the hierarchy changed) after their write
+commits. Every open /events connection gets its own bounded queue; a client
+that stops reading until its queue fills up is dropped rather than letting
+messages pile up in memory. Dropped clients reconnect (EventSource does this
+automatically) and catch up through the `since` delta feeds.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15.0
+RETRY_MS = 3000
+
+
+class Subscriber:
+    """One /events connection: a bounded queue of pre-encoded SSE messages."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventBroker:
+    """
+    Fan-out of events to every connected subscriber.
+
+    publish() may be called from any thread (threadpool endpoints, the MQTT
+    thread); delivery always happens on the event loop the broker is bound to.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self.dropped_subscribers = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the broker to the server's event loop (called on startup)."""
+        self._loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        """Register a new subscriber. Must be called on the event loop."""
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Broadcast an event to all subscribers. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        message = encode_event(event_type, data, next(self._ids))
+        try:
+            loop.call_soon_threadsafe(self._fan_out, message)
+        except RuntimeError:
+            # Loop shut down between the check and the call
+            pass
+
+    def _fan_out(self, message: bytes):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber):
+        """Disconnect a subscriber that is not keeping up."""
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped_subscribers += 1
+        # Discard the backlog and wake the stream so it can close
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        logger.warning("Dropped slow event subscriber")
+
+    async def stream(self):
+        """
+        Subscribe and yield SSE bytes until the client disconnects or is dropped.
+        Sends a comment line as a keepalive while idle.
+        """
+        subscriber = self.subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def encode_event(event_type: str, data: Dict[str, Any], event_id: int) -> bytes:
+    """Format one event in the text/event-stream wire format."""
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+broker = EventBroker()
@@ -0,0 +1,202 @@
+"""
+In-memory materialized view of the unit/soldier hierarchy.
+
+The hierarchy only changes on POST /units, POST /soldiers and
+PUT /soldiers/{id}/status, but it is read on every dashboard load and on
+every report insert. HierarchyCache keeps an immutable snapshot (unit map,
+children lists, soldier lists and the pre-serialized JSON bodies of the
+read endpoints) and rebuilds it lazily after a mutation invalidates it, so
+reads cost a dictionary lookup instead of table scans and JSON encoding.
+
+Only writes made through the API invalidate the cache; restart the backend
+after editing units or soldiers directly in the database. Heartbeats only
+move soldiers' last_seen, which update_last_seen() patches into the current
+snapshot instead of invalidating it.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+UNIT_COLUMNS = ["unit_id", "name", "parent_unit_id", "level", "created_at"]
+SOLDIER_COLUMNS = ["soldier_id", "name", "rank", "unit_id", "device_id", "status", "created_at", "last_seen"]
+
+
+def encode_json(content: Any) -> bytes:
+    """Serialize a response body the same way FastAPI's JSONResponse does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class HierarchySnapshot:
+    """One consistent, read-only copy of the hierarchy and its response bodies."""
+
+    def __init__(self, units: List[tuple], soldiers_by_rank: List[tuple],
+                 soldiers_by_unit_name: List[tuple], soldiers_by_level: List[tuple]):
+        """
+        units and soldiers_by_rank are full rows (UNIT_COLUMNS / SOLDIER_COLUMNS);
+        the other two are (soldier_id, unit_id) pairs in each endpoint's sort order.
+        """
+        self.units: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[Optional[str], List[str]] = {}
+        for row in units:
+            unit = dict(zip(UNIT_COLUMNS, row))
+            self.units[unit["unit_id"]] = unit
+            self.children.setdefault(unit["parent_unit_id"], []).append(unit["unit_id"])
+
+        self.soldiers: Dict[str, Dict[str, Any]] = {}
+        self.soldiers_by_unit: Dict[str, List[Dict[str, Any]]] = {}
+        for row in soldiers_by_rank:
+            soldier = dict(zip(SOLDIER_COLUMNS, row))
+            self.soldiers[soldier["soldier_id"]] = soldier
+            self.soldiers_by_unit.setdefault(soldier["unit_id"], []).append(soldier)
+
+        # GET /units
+        self.units_body = encode_json({"units": [
+            {key: unit[key] for key in ("unit_id", "name", "parent_unit_id", "level")}
+            for unit in self.units.values()
+        ]})
+
+        # GET /units/{unit_id}/soldiers
+        self.unit_soldiers_bodies: Dict[str, bytes] = {}
+        for unit_id, soldiers in self.soldiers_by_unit.items():
+            if unit_id not in self.units:
+                continue
+            unit_name = self.units[unit_id]["name"]
+            self.unit_soldiers_bodies[unit_id] = encode_json({"soldiers": [
+                {**self._soldier_summary(soldier), "unit_name": unit_name} for soldier in soldiers
+            ]})
+        self.empty_soldiers_body = encode_json({"soldiers": []})
+
+        # GET /soldiers
+        self.soldiers_body = encode_json({"soldiers": [
+            {**self._soldier_summary(self.soldiers[soldier_id]),
+             "unit_name": self.units[unit_id]["name"],
+             "unit_level": self.units[unit_id]["level"]}
+            for soldier_id, unit_id in soldiers_by_level
+        ]})
+
+        # GET /hierarchy (flat unit list, soldiers ordered by name). The only
+        # body with last_seen: encoded on first read and again after
+        # update_last_seen(), not on every heartbeat flush
+        self._soldiers_by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for soldier_id, unit_id in soldiers_by_unit_name:
+            self._soldiers_by_name.setdefault(unit_id, []).append(self.soldiers[soldier_id])
+        self._hierarchy_body: Optional[bytes] = None
+        self._last_seen_version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hierarchy_body(self) -> bytes:
+        body = self._hierarchy_body
+        if body is None:
+            version = self._last_seen_version
+            body = encode_json({"hierarchy": [
+                {**unit, "soldiers": self._soldiers_by_name.get(unit["unit_id"], [])}
+                for unit in self.units.values()
+            ]})
+            with self._lock:
+                # Not kept if last_seen changed while encoding
+                if self._last_seen_version == version:
+                    self._hierarchy_body = body
+        return body
+
+    def update_last_seen(self, last_seen: Dict[str, str]):
+        """Apply newer soldiers.last_seen values in place (heartbeats)."""
+        with self._lock:
+            changed = False
+            for soldier_id, timestamp in last_seen.items():
+                soldier = self.soldiers.get(soldier_id)
+                if soldier is not None and (soldier["last_seen"] is None or soldier["last_seen"] < timestamp):
+                    soldier["last_seen"] = timestamp
+                    changed = True
+            if changed:
+                self._last_seen_version += 1
+                self._hierarchy_body = None
+
+    @staticmethod
+    def _soldier_summary(soldier: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: soldier[key] for key in ("soldier_id", "name", "rank", "unit_id", "device_id")}
+
+    def soldier_unit(self, soldier_id: str) -> Optional[str]:
+        """unit_id of a soldier, or None if the soldier is unknown."""
+        soldier = self.soldiers.get(soldier_id)
+        return soldier["unit_id"] if soldier else None
+
+
+class HierarchyCache:
+    """
+    Process-wide holder of the current HierarchySnapshot.
+
+    Mutating endpoints call invalidate() after their write commits; the next
+    reader rebuilds the snapshot. A rebuild that raced with an invalidation is
+    returned to its caller but not kept, so a stale snapshot is never cached.
+    Heartbeat flushes call update_last_seen() instead.
+    """
+
+    def __init__(self, read_connection: Callable):
+        self._read_connection = read_connection
+        self._snapshot: Optional[HierarchySnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def update_last_seen(self, last_seen: Dict[str, str]):
+        """
+        Apply committed soldiers.last_seen changes without a rebuild. With no
+        snapshot cached, a rebuild in flight may have read the old values, so
+        it is not kept.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                self._generation += 1
+                return
+        snapshot.update_last_seen(last_seen)
+
+    def get(self) -> HierarchySnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+
+        snapshot = self._load()
+
+        with self._lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _load(self) -> HierarchySnapshot:
+        soldier_columns = ", ".join(f"s.{column}" for column in SOLDIER_COLUMNS)
+        with self._read_connection() as conn:
+            # One snapshot for all four queries
+            conn.execute("BEGIN")
+            units = conn.execute(
+                f"SELECT {', '.join(UNIT_COLUMNS)} FROM units ORDER BY level, name"
+            ).fetchall()
+            soldiers_by_rank = conn.execute(
+                f"SELECT {soldier_columns} FROM soldiers s ORDER BY s.rank, s.name"
+            ).fetchall()
+            soldiers_by_unit_name = conn.execute(
+                "SELECT soldier_id, unit_id FROM soldiers ORDER BY unit_id, name"
+            ).fetchall()
+            soldiers_by_level = conn.execute("""
+                SELECT s.soldier_id, s.unit_id
+                FROM soldiers s
+                JOIN units u ON s.unit_id = u.unit_id
+                ORDER BY u.level, s.rank, s.name
+            """).fetchall()
+        logger.info(f"Loaded hierarchy cache: {len(units)} units, {len(soldiers_by_rank)} soldiers")
+        return HierarchySnapshot(units, soldiers_by_rank, soldiers_by_unit_name, soldiers_by_level)
@@ -0,0 +1,185 @@
+"""
+In-process job queue with a pool of worker threads.
+
+Work that does not have to finish before a request returns (trigger analysis
+of a new report) is put() on a JobQueue and run by `workers` threads. Each
+worker takes whatever is queued, up to batch_size jobs, and runs them
+together, so under load their writes share a transaction. A batch that fails
+with a retryable error ("database is locked", another process holding the
+write lock past busy_timeout) is retried on the same worker after an
+exponential backoff, up to max_attempts; any other error, or running out of
+attempts, hands the batch to on_failure. stop() runs everything still queued
+before returning.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def is_locked(error: Exception) -> bool:
+    """True for SQLite's "database is locked" / "database is busy" errors."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by worker threads, with retries.
+
+    run(jobs, attempt) is called on a worker thread with a list of up to
+    batch_size jobs; attempt counts from 1. on_failure(jobs, error, attempts)
+    is called when a batch fails for good. If the queue is full, put() drops
+    the job (counted in stats()["dropped"]) rather than block the caller.
+    """
+
+    def __init__(self, name: str, run: Callable[[List[Any], int], None],
+                 on_failure: Optional[Callable[[List[Any], Exception, int], None]] = None,
+                 workers: int = 2, maxsize: int = 10000, batch_size: int = 50, max_attempts: int = 5,
+                 retry_delay: float = 0.05, retry_on: Callable[[Exception], bool] = is_locked):
+        self.name = name
+        self._run_jobs = run
+        self._on_failure = on_failure
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._retry_on = retry_on
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.retries = 0
+        self.max_depth = 0
+        self.last_delay_ms = 0.0
+        self.max_delay_ms = 0.0
+        self._total_delay_ms = 0.0
+
+    def start(self):
+        """Start the worker threads (put() also starts them on first use)."""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads:
+                return
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def put(self, job: Any) -> bool:
+        """Queue a job. Returns False if it was dropped."""
+        if not self._threads:
+            self.start()
+        if self._stopping:
+            self.dropped += 1
+            logger.warning(f"{self.name}: job dropped, queue is shutting down")
+            return False
+        try:
+            self._queue.put_nowait((time.monotonic(), job))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"{self.name}: queue full ({self._queue.maxsize}), job dropped")
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Run everything still queued, then stop the worker threads."""
+        with self._lock:
+            threads = self._threads
+            if not threads or self._stopping:
+                return
+            self._stopping = True
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+        with self._lock:
+            self._threads = []
+        logger.info(f"{self.name}: drained and stopped ({self.completed} jobs run)")
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue-depth, retry and queued-to-finished delay counters."""
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "last_delay_ms": round(self.last_delay_ms, 3),
+            "avg_delay_ms": round(self._total_delay_ms / finished, 3) if finished else 0.0,
+            "max_delay_ms": round(self.max_delay_ms, 3),
+        }
+
+    def _worker(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process([job for _, job in batch])
+            now = time.monotonic()
+            for queued_at, _ in batch:
+                delay_ms = (now - queued_at) * 1000
+                self.max_delay_ms = max(self.max_delay_ms, delay_ms)
+                self._total_delay_ms += delay_ms
+            self.last_delay_ms = delay_ms
+
+    def _process(self, jobs: List[Any]):
+        self.batches += 1
+        attempt = 1
+        while True:
+            try:
+                self._run_jobs(jobs, attempt)
+                self.completed += len(jobs)
+                return
+            except Exception as e:
+                if attempt < self.max_attempts and self._retry_on(e):
+                    self.retries += 1
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                    attempt += 1
+                    continue
+                self.failed += len(jobs)
+                logger.error(f"{self.name}: {len(jobs)} job(s) failed after {attempt} attempt(s): {e}")
+                if self._on_failure is not None:
+                    try:
+                        self._on_failure(jobs, e, attempt)
+                    except Exception as failure_error:
+                        logger.error(f"{self.name}: failure handler raised: {failure_error}")
+                return
@@ -0,0 +1,195 @@
+"""
+Background reanalysis of existing reports for suggestions.
+
+New reports are analysed by the report analysis queue as they arrive.
+ReanalysisJob catches up on the rest, reports that never went through the
+queue (written by another process, dropped from a full queue, or failed),
+on a background thread, in batches of batch_size reports read in rowid order:
+
+  incremental   reports after the persisted watermark (reanalysis_state)
+                that are not already analysed; the watermark moves forward
+                with every batch, in the batch's write transaction
+  full          every report in the table, analysed again; reports already
+                recorded in a suggestion are skipped (suggestion_store.py)
+
+Each batch is one read and one write transaction, so memory stays bounded
+by batch_size whatever the table size, and a stopped run resumes from the
+watermark. Only one run is active at a time.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "reports"
+BATCH_SIZE = 500
+# With no watermark yet, incremental runs start with this many of the newest
+# reports, like the old request-time reanalysis
+INITIAL_REPORTS = 50
+
+BATCH_QUERY = """
+    SELECT r.rowid, r.report_id, r.soldier_id, r.unit_id, r.report_type, r.structured_json, r.timestamp
+    FROM reports r
+    {join}
+    WHERE r.rowid > ? AND r.rowid <= ? {condition}
+    ORDER BY r.rowid
+    LIMIT ?
+"""
+PENDING_JOIN = "LEFT JOIN report_analysis a ON a.report_id = r.report_id"
+PENDING_CONDITION = "AND (a.status IS NULL OR a.status != 'done')"
+
+
+def read_watermark(conn) -> Optional[int]:
+    row = conn.execute("SELECT last_rowid FROM reanalysis_state WHERE name = ?", (WATERMARK,)).fetchone()
+    return row[0] if row else None
+
+
+def save_watermark(conn, rowid: int):
+    conn.execute("""
+        INSERT INTO reanalysis_state (name, last_rowid, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_rowid = MAX(last_rowid, excluded.last_rowid),
+                                        updated_at = excluded.updated_at
+    """, (WATERMARK, rowid, datetime.now().isoformat()))
+
+
+class ReanalysisJob:
+    """
+    Runs reanalysis passes on a background thread, one at a time.
+
+    analyze(conn, reports) is called inside each batch's write transaction
+    and returns (report, saved suggestions) pairs, which publish() announces
+    once that transaction has committed. Each saved trigger says whether its
+    suggestion was "created" or merged into a pending one.
+    """
+
+    def __init__(self, read: Callable, write: Callable, analyze: Callable[[Any, List[Dict[str, Any]]], Any],
+                 publish: Callable[[Any], None], batch_size: int = BATCH_SIZE):
+        self._read = read
+        self._write = write
+        self._analyze = analyze
+        self._publish = publish
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {"running": False, "mode": None}
+
+    def start(self, full: bool = False) -> bool:
+        """Start a pass in the background. Returns False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._status = self._new_status(full)
+            self._thread = threading.Thread(target=self._run, args=(full,), name="reanalysis", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the current batch; the watermark keeps the progress made."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the current or last pass, and the persisted watermark."""
+        with self._lock:
+            status = dict(self._status)
+        with self._read() as conn:
+            status["watermark"] = read_watermark(conn)
+        return status
+
+    def run_pass(self, full: bool = False) -> Dict[str, Any]:
+        """Run a pass on the calling thread. Returns its status."""
+        with self._lock:
+            self._status = self._new_status(full)
+        self._run(full)
+        return self.status()
+
+    @staticmethod
+    def _new_status(full: bool) -> Dict[str, Any]:
+        return {
+            "running": True, "mode": "full" if full else "incremental",
+            "started_at": datetime.now().isoformat(), "finished_at": None,
+            "start_rowid": None, "end_rowid": None,
+            "batches": 0, "reports_analyzed": 0,
+            "suggestions_created": 0, "suggestions_updated": 0, "progress": 0.0, "error": None,
+        }
+
+    def _pass(self, full: bool):
+        with self._read() as conn:
+            end = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM reports").fetchone()[0]
+            watermark = read_watermark(conn)
+            if full:
+                start = 0
+            elif watermark is not None:
+                start = watermark
+            else:
+                row = conn.execute("SELECT rowid FROM reports ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                                   (INITIAL_REPORTS,)).fetchone()
+                start = row[0] if row else 0
+        self._update(start_rowid=start, end_rowid=end)
+
+        query = BATCH_QUERY.format(join="" if full else PENDING_JOIN, condition="" if full else PENDING_CONDITION)
+        position = start
+        while position < end and not self._stop.is_set():
+            with self._read() as conn:
+                rows = conn.execute(query, (position, end, self.batch_size)).fetchall()
+            # A short batch means nothing is left to analyse up to `end`
+            last = rows[-1][0] if len(rows) == self.batch_size else end
+            reports = []
+            for _, report_id, soldier_id, unit_id, report_type, structured_json, timestamp in rows:
+                try:
+                    structured_json = json.loads(structured_json) if structured_json else {}
+                except ValueError:
+                    structured_json = {}
+                if not isinstance(structured_json, dict):
+                    structured_json = {}
+                reports.append({
+                    "report_id": report_id, "soldier_id": soldier_id, "unit_id": unit_id,
+                    "report_type": report_type, "structured_json": structured_json, "text_content": "",
+                    "timestamp": timestamp,
+                })
+
+            with self._write() as conn:
+                created = self._analyze(conn, reports) if reports else None
+                save_watermark(conn, last)
+            if created:
+                self._publish(created)
+
+            position = last
+            with self._lock:
+                status = self._status
+                status["batches"] += 1
+                status["reports_analyzed"] += len(reports)
+                for _, suggestions in created or []:
+                    for _, trigger in suggestions:
+                        status["suggestions_created" if trigger["created"] else "suggestions_updated"] += 1
+                status["progress"] = round((position - start) / (end - start), 4) if end > start else 1.0
+        if position >= end:
+            self._update(progress=1.0)
+
+    def _update(self, **values):
+        with self._lock:
+            self._status.update(values)
+
+    def _run(self, full: bool):
+        started = time.perf_counter()
+        try:
+            self._pass(full)
+        except Exception as e:
+            logger.error(f"Reanalysis failed: {e}", exc_info=True)
+            self._update(error=str(e))
+        finally:
+            self._update(running=False, finished_at=datetime.now().isoformat())
+            status = self._status
+            logger.info(f"Reanalysis ({status['mode']}) finished in {time.perf_counter() - started:.1f} s: "
+                        f"{status['reports_analyzed']} reports analysed, "
+                        f"{status['suggestions_created']} suggestions created, "
+                        f"{status['suggestions_updated']} updated")
@@ -0,0 +1,97 @@
+"""
+Fast, compressed JSON responses for the large list endpoints.
+
+FastAPI's default path runs every row through jsonable_encoder and then the
+stdlib json module, which dominates the cost of a 1000-report page. These
+endpoints build plain dicts and return json_response(), which serializes
+with orjson when it is installed and compresses bodies over
+COMPRESS_MIN_BYTES with brotli or gzip, whichever the client prefers and
+the server can do (brotli needs the optional `brotli` package).
+"""
+
+import gzip
+import json
+from typing import Any, Mapping, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 5          # past 5, gzip gets much slower for little gain on JSON
+BROTLI_QUALITY = 4      # brotli's fast range; 11 is for static assets
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(text: str) -> Any:
+    """Parse JSON text (used to send stored JSON out as objects)."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def accepted_encodings(request: Request) -> dict:
+    """Accept-Encoding as {coding: q}, lower-cased."""
+    encodings = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding.strip().lower()] = q
+    return encodings
+
+
+def choose_encoding(request: Request) -> Optional[str]:
+    """The best content coding both sides support, or None for identity."""
+    accepted = accepted_encodings(request)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = None
+    for coding in candidates:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def json_response(request: Request, content: Any, headers: Optional[Mapping[str, str]] = None,
+                  status_code: int = 200) -> Response:
+    """
+    A JSON response for `content`, compressed when it is large enough and the
+    client accepts it. `headers` (e.g. an ETag) are copied onto the response.
+    """
+    body = dumps(content)
+    response_headers = {key: value for key, value in (headers or {}).items() if key.lower() != "content-length"}
+    response_headers["Vary"] = "Accept-Encoding"
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(request)
+        if encoding:
+            body = compress(body, encoding)
+            response_headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type="application/json", headers=response_headers)
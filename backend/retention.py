@@ -0,0 +1,368 @@
+"""
+Time-partitioned retention for the high-volume tables.
+
+Raw inputs, reports and closed suggestions older than the retention horizon
+are moved out of the hot database into one archive SQLite file per week (or
+per day), next to the hot database under archive/. The hot tables and their
+indexes then only ever hold the recent window, so their size and query cost
+stay flat however much history accumulates. The freed pages are returned to
+the filesystem with incremental vacuum.
+
+Archives keep the original rows under the same table names and can be
+ATTACHed to any connection when a query's time range reaches past the
+horizon (see archives_for_range() and attach()).
+
+Run once from the command line:
+    python backend/retention.py [--days 30] [--partition week|day] [--db PATH]
+"""
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = 30
+ARCHIVE_PARTITION = "week"          # "week" or "day"
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_ALIAS = "archive"
+MOVE_CHUNK_ROWS = 5000              # rows moved per write transaction
+VACUUM_STEP_PAGES = 2000            # pages released per incremental_vacuum step
+
+
+class ArchivedTable:
+    """A hot table whose old rows are moved into the archives."""
+
+    def __init__(self, name: str, key: str, time_column: str, columns: List[Tuple[str, str]],
+                 indexes: List[Tuple[str, ...]], condition: Optional[str] = None):
+        self.name = name
+        self.key = key
+        self.time_column = time_column
+        self.columns = columns
+        self.indexes = indexes
+        # Extra filter on rows eligible for archiving (SQL over the hot table)
+        self.condition = condition
+
+    @property
+    def column_list(self) -> str:
+        return ", ".join(name for name, _ in self.columns)
+
+    def create_statements(self, schema: str) -> List[str]:
+        """DDL for this table and its indexes inside an attached archive."""
+        columns = ", ".join(
+            f"{name} {decl} PRIMARY KEY" if name == self.key else f"{name} {decl}"
+            for name, decl in self.columns
+        )
+        statements = [f"CREATE TABLE IF NOT EXISTS {schema}.{self.name} ({columns})"]
+        for index_columns in self.indexes:
+            index_name = f"idx_{self.name}_{'_'.join(index_columns)}"
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {schema}.{index_name} ON {self.name}({', '.join(index_columns)})"
+            )
+        return statements
+
+
+# Explicit column lists: hot-only bookkeeping columns (row_version and the
+# like) stay behind, and later schema additions never break archiving.
+ARCHIVED_TABLES = [
+    ArchivedTable(
+        "soldier_raw_inputs", key="input_id", time_column="timestamp",
+        columns=[("input_id", "TEXT"), ("soldier_id", "TEXT NOT NULL"), ("timestamp", "TEXT NOT NULL"),
+                 ("raw_text", "TEXT NOT NULL"), ("raw_audio_ref", "TEXT"), ("input_type", "TEXT"),
+                 ("confidence", "REAL"), ("location_ref", "TEXT"), ("created_at", "TEXT")],
+        indexes=[("timestamp",), ("soldier_id", "timestamp")],
+    ),
+    ArchivedTable(
+        "reports", key="report_id", time_column="timestamp",
+        columns=[("report_id", "TEXT"), ("soldier_id", "TEXT NOT NULL"), ("unit_id", "TEXT NOT NULL"),
+                 ("timestamp", "TEXT NOT NULL"), ("report_type", "TEXT NOT NULL"),
+                 ("structured_json", "TEXT NOT NULL"), ("confidence", "REAL NOT NULL"),
+                 ("source_input_id", "TEXT"), ("status", "TEXT"), ("reviewed_by", "TEXT"),
+                 ("reviewed_at", "TEXT"), ("created_at", "TEXT")],
+        indexes=[("timestamp",), ("unit_id", "timestamp"), ("soldier_id", "timestamp")],
+    ),
+    ArchivedTable(
+        "suggestions", key="suggestion_id", time_column="created_at",
+        columns=[("suggestion_id", "TEXT"), ("suggestion_type", "TEXT NOT NULL"), ("urgency", "TEXT NOT NULL"),
+                 ("reason", "TEXT NOT NULL"), ("confidence", "REAL NOT NULL"), ("source_reports", "TEXT NOT NULL"),
+                 ("status", "TEXT NOT NULL"), ("suggested_fields", "TEXT"), ("created_at", "TIMESTAMP"),
+                 ("updated_at", "TIMESTAMP"), ("dismissed_at", "TIMESTAMP"), ("dismissed_by", "TEXT"),
+                 ("unit_id", "TEXT")],
+        indexes=[("created_at",), ("unit_id", "created_at")],
+        # Open suggestions (pending, draft in progress) stay in the hot database
+        condition="status IN ('approved', 'dismissed')",
+    ),
+]
+
+ARCHIVED_TABLES_BY_NAME = {table.name: table for table in ARCHIVED_TABLES}
+
+
+# ===== PARTITIONS =====
+# Partition bounds are compared as 'YYYY-MM-DD' strings. Every stored
+# timestamp starts with its date, whether it uses 'T' or ' ' as separator,
+# so "ts >= start AND ts < end" selects whole days regardless of format.
+
+def partition_start(day: date, partition: str = ARCHIVE_PARTITION) -> date:
+    if partition == "day":
+        return day
+    return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+
+
+def partition_end(start: date, partition: str = ARCHIVE_PARTITION) -> date:
+    return start + timedelta(days=1 if partition == "day" else 7)
+
+
+def partition_label(start: date, partition: str = ARCHIVE_PARTITION) -> str:
+    if partition == "day":
+        return start.isoformat()
+    year, week, _ = start.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def archive_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIRNAME)
+
+
+def archive_path(db_path: str, start: date, partition: str = ARCHIVE_PARTITION) -> str:
+    base = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(archive_dir(db_path), f"{base}_{partition_label(start, partition)}.db")
+
+
+def list_archives(db_path: str) -> List[Tuple[date, date, str]]:
+    """(start, end, path) of every archive file for db_path, newest first."""
+    directory = archive_dir(db_path)
+    if not os.path.isdir(directory):
+        return []
+    base = re.escape(os.path.splitext(os.path.basename(db_path))[0])
+    pattern = re.compile(rf"^{base}_(?:(\d{{4}}-\d{{2}}-\d{{2}})|(\d{{4}})-W(\d{{2}}))\.db$")
+    archives = []
+    for filename in os.listdir(directory):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        if match.group(1):
+            start = date.fromisoformat(match.group(1))
+            end = partition_end(start, "day")
+        else:
+            start = date.fromisocalendar(int(match.group(2)), int(match.group(3)), 1)
+            end = partition_end(start, "week")
+        archives.append((start, end, os.path.join(directory, filename)))
+    archives.sort(reverse=True)
+    return archives
+
+
+def archives_for_range(db_path: str, start: Optional[str] = None,
+                       end: Optional[str] = None) -> List[Tuple[date, date, str]]:
+    """Archives whose partition overlaps [start, end) (ISO timestamps or dates), newest first."""
+    start_day = date.fromisoformat(start[:10]) if start else None
+    end_day = date.fromisoformat(end[:10]) if end else None
+    return [
+        (p_start, p_end, path) for p_start, p_end, path in list_archives(db_path)
+        if (start_day is None or p_end > start_day) and (end_day is None or p_start <= end_day)
+    ]
+
+
+@contextmanager
+def attach(conn, path: str, alias: str = ARCHIVE_ALIAS):
+    """ATTACH an archive to conn for the duration of the block (no transaction may be open)."""
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+    try:
+        yield alias
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"DETACH DATABASE {alias}")
+
+
+# ===== ARCHIVING =====
+
+def move_partition(write: Callable, db_path: str, table: ArchivedTable, start: date, end: date,
+                   partition: str) -> int:
+    """Move table rows in [start, end) into the partition's archive, MOVE_CHUNK_ROWS per transaction."""
+    path = archive_path(db_path, partition_start(start, partition), partition)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    condition = f" AND {table.condition}" if table.condition else ""
+    moved = 0
+    while True:
+        with write() as conn:
+            with attach(conn, path) as schema:
+                for statement in table.create_statements(schema):
+                    conn.execute(statement)
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_batch (row_key PRIMARY KEY)")
+                conn.execute("DELETE FROM temp.retention_batch")
+                count = conn.execute(f"""
+                    INSERT INTO temp.retention_batch
+                    SELECT {table.key} FROM main.{table.name}
+                    WHERE {table.time_column} >= ? AND {table.time_column} < ?{condition}
+                    LIMIT ?
+                """, (start.isoformat(), end.isoformat(), MOVE_CHUNK_ROWS)).rowcount
+                if count:
+                    # Copy first, then delete: if the two files end up out of step
+                    # after a crash, re-running skips the rows already archived.
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO {schema}.{table.name} ({table.column_list})
+                        SELECT {table.column_list} FROM main.{table.name}
+                        WHERE {table.key} IN (SELECT row_key FROM temp.retention_batch)
+                    """)
+                    conn.execute(f"""
+                        DELETE FROM main.{table.name}
+                        WHERE {table.key} IN (SELECT row_key FROM temp.retention_batch)
+                    """)
+                conn.commit()
+        moved += count
+        if count < MOVE_CHUNK_ROWS:
+            return moved
+
+
+def archive_table(write: Callable, db_path: str, table: ArchivedTable, cutoff: date,
+                  partition: str = ARCHIVE_PARTITION) -> int:
+    """Move every eligible row of table older than cutoff into its archive."""
+    condition = f" AND {table.condition}" if table.condition else ""
+    moved = 0
+    start = None
+    while True:
+        with write() as conn:
+            oldest = conn.execute(
+                f"SELECT MIN({table.time_column}) FROM {table.name} WHERE {table.time_column} < ?{condition}",
+                (cutoff.isoformat(),)
+            ).fetchone()[0]
+        if oldest is None:
+            return moved
+        try:
+            day = date.fromisoformat(str(oldest)[:10])
+        except ValueError:
+            logger.error(f"Retention: unparseable {table.name}.{table.time_column} {oldest!r}, stopping")
+            return moved
+        if start is not None and partition_start(day, partition) <= start:
+            # Rows that sort before the cutoff but could not be moved
+            logger.error(f"Retention: {table.name} rows before {cutoff} did not move, stopping")
+            return moved
+        start = partition_start(day, partition)
+        end = min(partition_end(start, partition), cutoff)
+        count = move_partition(write, db_path, table, max(start, day), end, partition)
+        if count:
+            logger.info(f"Archived {count} {table.name} rows from {partition_label(start, partition)}")
+        moved += count
+
+
+def incremental_vacuum(write: Callable, step_pages: int = VACUUM_STEP_PAGES) -> int:
+    """Return free pages to the filesystem a step at a time; a no-op unless auto_vacuum is INCREMENTAL."""
+    with write() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+    released = 0
+    while True:
+        with write() as conn:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                return released
+            # Each result row is one step; fetch them all to run the whole step
+            conn.execute(f"PRAGMA incremental_vacuum({step_pages})").fetchall()
+            released += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free <= step_pages:
+            return released
+
+
+def run_retention(write: Callable, db_path: str, days: int = RETENTION_DAYS,
+                  partition: str = ARCHIVE_PARTITION, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Archive everything older than `days` days (whole days, counted back from
+    the start of today) and vacuum the hot database. Safe to re-run.
+    """
+    if partition not in ("day", "week"):
+        raise ValueError(f"Unknown archive partition {partition!r}")
+    cutoff = (now or datetime.now()).date() - timedelta(days=days)
+    started = time.perf_counter()
+    moved = {table.name: archive_table(write, db_path, table, cutoff, partition) for table in ARCHIVED_TABLES}
+    released = incremental_vacuum(write)
+    result = {
+        "cutoff": cutoff.isoformat(),
+        "moved": moved,
+        "pages_released": released,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(f"Retention pass: {result}")
+    return result
+
+
+class RetentionJob:
+    """
+    Runs run_retention() on a background thread every `interval` seconds.
+    start() does nothing unless `enabled`: archiving is opt-in, as a database
+    whose reports are all older than the horizon would otherwise be emptied
+    by the first pass.
+    """
+
+    def __init__(self, write: Callable, db_path: Callable[[], str], interval: float = 6 * 3600,
+                 first_run_after: float = 60.0, days: int = RETENTION_DAYS, partition: str = ARCHIVE_PARTITION,
+                 enabled: bool = False):
+        self._write = write
+        self._db_path = db_path
+        self.interval = interval
+        self.first_run_after = first_run_after
+        self.days = days
+        self.partition = partition
+        self.enabled = enabled
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_run_at: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not self.enabled:
+            logger.info("Retention job disabled")
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Dict[str, Any]:
+        self.last_result = run_retention(self._write, self._db_path(), self.days, self.partition)
+        self.last_run_at = datetime.now().isoformat()
+        return self.last_result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "days": self.days, "partition": self.partition,
+                "last_run_at": self.last_run_at, "last_result": self.last_result}
+
+    def _run(self):
+        delay = self.first_run_after
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}", exc_info=True)
+            delay = self.interval
+
+
+def main():
+    from db import DATABASE_DIR, close_pool, get_pool
+
+    parser = argparse.ArgumentParser(description="Move old rows into archive databases")
+    parser.add_argument("--db", default=os.path.join(DATABASE_DIR, "military_hierarchy.db"))
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--partition", choices=["week", "day"], default=ARCHIVE_PARTITION)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = get_pool(args.db)
+    result = run_retention(pool.write, args.db, args.days, args.partition)
+    close_pool()
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Full-text search over raw inputs, reports and FRAGOs.
+
+Each source has an FTS5 index kept in sync by triggers (see
+database/migrations/add_full_text_search.sql). Raw inputs and FRAGOs are
+external-content indexes over their text column; reports index the values
+of structured_json, without its keys, as their own content (see
+database/migrations/index_report_field_values.sql). search() runs one MATCH query per
+requested source, with snippets, and merges the results either by bm25 rank
+(lower is better) or newest first.
+
+Rebuild the indexes from the source tables (after a full VACUUM, or if they
+are ever suspected out of sync):
+    python backend/search.py --rebuild [--db PATH]
+"""
+
+import argparse
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_TOKENS = 12
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+# The text reports_fts indexes for a report: the values of its
+# structured_json, read through one level of double encoding (also in
+# database/migrations/index_report_field_values.sql)
+REPORT_FIELD_TEXT = """
+    CASE WHEN json_valid(structured_json)
+        THEN (SELECT group_concat(value, ' ') FROM json_tree(
+              CASE WHEN json_type(structured_json) = 'text' AND json_valid(json_extract(structured_json, '$'))
+                   THEN json_extract(structured_json, '$') ELSE structured_json END)
+              WHERE type IN ('text', 'integer', 'real'))
+        ELSE structured_json END
+"""
+
+# type -> its FTS table, the columns the unit_id / since filters apply to, and
+# a query returning RESULT_COLUMNS (snippet markers, snippet length, MATCH).
+# Indexes that are not external-content list the statements that rebuild them.
+SOURCES = {
+    "raw_input": {
+        "fts": "raw_inputs_fts",
+        "unit_column": "s.unit_id",
+        "time_column": "i.timestamp",
+        "query": """
+            SELECT i.input_id, i.soldier_id, s.unit_id, i.timestamp, i.input_type,
+                   snippet(raw_inputs_fts, 0, ?, ?, '…', ?), bm25(raw_inputs_fts)
+            FROM raw_inputs_fts
+            JOIN soldier_raw_inputs i ON i.rowid = raw_inputs_fts.rowid
+            LEFT JOIN soldiers s ON s.soldier_id = i.soldier_id
+            WHERE raw_inputs_fts MATCH ?
+        """,
+    },
+    "report": {
+        "fts": "reports_fts",
+        "unit_column": "r.unit_id",
+        "time_column": "r.timestamp",
+        "query": """
+            SELECT r.report_id, r.soldier_id, r.unit_id, r.timestamp, r.report_type,
+                   snippet(reports_fts, 0, ?, ?, '…', ?), bm25(reports_fts)
+            FROM reports_fts
+            JOIN reports r ON r.rowid = reports_fts.rowid
+            WHERE reports_fts MATCH ?
+        """,
+        "rebuild": [
+            "DELETE FROM reports_fts",
+            f"INSERT INTO reports_fts (rowid, field_values) SELECT rowid, {REPORT_FIELD_TEXT} FROM reports",
+        ],
+    },
+    "frago": {
+        "fts": "fragos_fts",
+        "unit_column": "f.unit_id",
+        "time_column": "f.created_at",
+        "query": """
+            SELECT f.frago_id, NULL, f.unit_id, f.created_at, 'FRAGO ' || printf('%04d', f.frago_number),
+                   snippet(fragos_fts, 0, ?, ?, '…', ?), bm25(fragos_fts)
+            FROM fragos_fts
+            JOIN fragos f ON f.rowid = fragos_fts.rowid
+            WHERE fragos_fts MATCH ?
+        """,
+    },
+}
+
+RESULT_COLUMNS = ["id", "soldier_id", "unit_id", "timestamp", "kind", "snippet", "rank"]
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query that cannot be a syntax error.
+
+    Words are ANDed; "quoted phrases" stay phrases; a trailing * makes a
+    prefix match. Every term is quoted, so FTS5 operators and punctuation in
+    the input are matched literally instead of being parsed.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        term = phrase if phrase else word
+        prefix = not phrase and term.endswith("*")
+        term = term.rstrip("*") if prefix else term
+        if not term.strip():
+            continue
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    return " ".join(terms)
+
+
+def search(conn, text: str, types: Sequence[str] = tuple(SOURCES), unit_filter: Optional[str] = None,
+           unit_params: Sequence[Any] = (), since: Optional[str] = None, limit: int = 50,
+           sort: str = "rank") -> List[Dict[str, Any]]:
+    """
+    Matches for `text` across the given source types, best first (sort="rank")
+    or newest first (sort="recent"). unit_filter is an SQL expression with one
+    placeholder group applied to each source's unit column, e.g. "= ?" or
+    "IN (SELECT ...)".
+
+    Ranking has to score every match, so it slows down for very common terms;
+    "recent" walks the index in rowid (insertion) order and stops at limit.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    results = []
+    for kind in types:
+        source = SOURCES[kind]
+        query = source["query"]
+        params: List[Any] = [HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_TOKENS, match]
+        if unit_filter:
+            query += f" AND {source['unit_column']} {unit_filter}"
+            params.extend(unit_params)
+        if since:
+            query += f" AND {source['time_column']} >= ?"
+            params.append(since)
+        if sort == "recent":
+            query += f" ORDER BY {source['fts']}.rowid DESC LIMIT ?"
+        else:
+            query += f" ORDER BY bm25({source['fts']}) LIMIT ?"
+        params.append(limit)
+        for row in conn.execute(query, params):
+            result = dict(zip(RESULT_COLUMNS, row))
+            result["type"] = kind
+            results.append(result)
+    if sort == "recent":
+        results.sort(key=lambda result: result["timestamp"] or "", reverse=True)
+    else:
+        results.sort(key=lambda result: result["rank"])
+    return results[:limit]
+
+
+def rebuild(conn):
+    """Rebuild every search index from its source table, then merge its segments."""
+    for source in SOURCES.values():
+        fts = source["fts"]
+        for statement in source.get("rebuild", [f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"]):
+            conn.execute(statement)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+        logger.info(f"Rebuilt {fts}")
+
+
+def main():
+    from db import DATABASE_DIR, close_pool, get_pool
+
+    parser = argparse.ArgumentParser(description="Maintain the full-text search indexes")
+    parser.add_argument("--db", default=os.path.join(DATABASE_DIR, "military_hierarchy.db"))
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the indexes from the source tables")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    with get_pool(args.db).write() as conn:
+        rebuild(conn)
+    close_pool()
+
+
+if __name__ == "__main__":
+    main()
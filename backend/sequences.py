@@ -0,0 +1,80 @@
+"""
+Report number allocation (FRAGO, CASEVAC, EOINCREP).
+
+Numbers come from report_sequences, one row per report type. A reservation
+is a single upsert with RETURNING, so the read and the increment cannot be
+split by another writer, in this process or any other sharing the database.
+Each allocator reserves block_size numbers at a time and hands them out from
+memory, so most numbers cost no database write at all.
+
+Numbers are unique but not gap-free: numbers left in a block when a process
+dies are never used. release() gives an unused tail back on a clean shutdown,
+provided no other process has reserved after it.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+RESERVE_QUERY = """
+    INSERT INTO report_sequences (report_type, next_number) VALUES (?, 1 + ?)
+    ON CONFLICT(report_type) DO UPDATE SET next_number = next_number + excluded.next_number - 1
+    RETURNING next_number
+"""
+
+
+class SequenceAllocator:
+    """
+    Hands out increasing numbers per report type from reserved blocks.
+
+    write is a db_write-style context manager factory. next() must not be
+    called inside an open write transaction: if that transaction rolled back,
+    the block it reserved would still be handed out from memory.
+    """
+
+    def __init__(self, write: Callable, block_size: int = 1):
+        self.write = write
+        self.block_size = block_size
+        self._blocks: Dict[str, List[int]] = {}     # report_type -> [next, end)
+        self._lock = threading.Lock()
+        self.reserved = 0
+
+    def reserve(self, report_type: str, count: int) -> int:
+        """Reserve `count` numbers in the database; returns the first."""
+        with self.write() as conn:
+            end = conn.execute(RESERVE_QUERY, (report_type, count)).fetchone()[0]
+        self.reserved += 1
+        return end - count
+
+    def next(self, report_type: str) -> int:
+        """The next number for report_type."""
+        with self._lock:
+            block = self._blocks.get(report_type)
+            if block is None or block[0] >= block[1]:
+                first = self.reserve(report_type, self.block_size)
+                block = self._blocks[report_type] = [first, first + self.block_size]
+            number = block[0]
+            block[0] += 1
+            return number
+
+    def release(self):
+        """Give unused reserved numbers back where nothing was reserved after them."""
+        with self._lock:
+            blocks, self._blocks = self._blocks, {}
+            with self.write() as conn:
+                for report_type, (start, end) in blocks.items():
+                    if start < end:
+                        conn.execute(
+                            "UPDATE report_sequences SET next_number = ? WHERE report_type = ? AND next_number = ?",
+                            (start, report_type, end),
+                        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "block_size": self.block_size,
+                "reservations": self.reserved,
+                "buffered": sum(end - start for start, end in self._blocks.values()),
+            }
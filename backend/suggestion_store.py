@@ -0,0 +1,247 @@
+"""
+Deduplicated saving and expiry of suggestions.
+
+Without this, every repeat report and every reanalysis added another
+pending row, and GET /api/suggestions kept sorting and parsing all of them.
+Suggestions raised by a single report now carry a dedup_key, see
+dedup_key(): their type, unit and the hour the report was made. A key has
+at most one pending suggestion (a partial unique index), and
+upsert_suggestions() merges repeat reports into it instead of inserting:
+
+  source_reports  the new report is added (newest MAX_SOURCE_REPORTS kept)
+  confidence      1 - (1 - old) * (1 - new), capped at MAX_CONFIDENCE
+  urgency         the highest urgency seen, raised one level when the
+                  ESCALATE_REPORTS-th report joins
+  reason          the newest report's reason and the report count
+
+A report already recorded under its key, in a suggestion of any status, is
+skipped, so analysing it again never re-opens a dismissed suggestion.
+Correlated suggestions (correlation.py) keep one suggestion_id per window
+and have no key.
+
+Pending suggestions not raised or merged into for SUGGESTION_TTL_HOURS are
+dismissed with dismissed_by 'expired' by SuggestionExpiryJob, in batches
+of EXPIRE_BATCH_SIZE, so the pending set stays small.
+
+Run one expiry pass from the command line:
+    python backend/suggestion_store.py [--ttl-hours 24] [--db PATH]
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from correlation import MAX_CONFIDENCE, MAX_SOURCE_REPORTS, URGENCY_LEVELS
+
+logger = logging.getLogger(__name__)
+
+DEDUP_BUCKET_SECONDS = 3600         # also in database/migrations/add_suggestion_dedup.sql
+ESCALATE_REPORTS = 3
+LOOKUP_SIZE = 500                   # keys per "already recorded" query
+SUGGESTION_TTL_HOURS = 24
+EXPIRE_BATCH_SIZE = 500             # suggestions expired per write transaction
+EXPIRED_BY = "expired"
+
+
+def dedup_key(suggestion_type: str, unit_id: str, report_id: str, timestamp: Optional[str]) -> str:
+    """Key of a single-report suggestion: type, unit and the hour of the report's timestamp."""
+    try:
+        at = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        # No hour to share: the suggestion is only deduplicated against itself
+        return f"{suggestion_type}:{unit_id}:report:{report_id}"
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)    # as SQLite's strftime('%s') reads it
+    return f"{suggestion_type}:{unit_id}:{int(at.timestamp()) // DEDUP_BUCKET_SECONDS}"
+
+
+def _level(urgency: str) -> int:
+    return URGENCY_LEVELS.index(urgency) if urgency in URGENCY_LEVELS else 0
+
+
+def _merge(row: Dict[str, Any], suggestion: Dict[str, Any], new_reports: List[str]):
+    before = len(row["source_reports"])
+    count = before + len(new_reports)
+    level = max(_level(row["urgency"]), _level(suggestion["urgency"]))
+    if before < ESCALATE_REPORTS <= count:
+        level = min(level + 1, len(URGENCY_LEVELS) - 1)
+    combined = 1.0 - (1.0 - row["confidence"]) * (1.0 - suggestion["confidence"])
+    row["urgency"] = URGENCY_LEVELS[level]
+    row["confidence"] = round(max(row["confidence"], min(combined, MAX_CONFIDENCE)), 4)
+    row["reason"] = f"{suggestion['reason']} ({count} reports)"
+    row["source_reports"] = (row["source_reports"] + new_reports)[-MAX_SOURCE_REPORTS:]
+
+
+def upsert_suggestions(conn, suggestions: List[Dict[str, Any]],
+                       now: Optional[datetime] = None) -> List[Optional[Tuple[str, bool]]]:
+    """
+    Save single-report suggestions (dicts with type, urgency, reason,
+    confidence, source_reports, unit_id and dedup_key) in the caller's
+    transaction. Each is merged into its key's pending suggestion or
+    inserted. Returns, per suggestion, (suggestion_id, created), or None if
+    its reports were already recorded under the key.
+    """
+    keys = list({suggestion["dedup_key"] for suggestion in suggestions})
+    recorded: Dict[str, Set[str]] = {key: set() for key in keys}
+    pending: Dict[str, Dict[str, Any]] = {}
+    for offset in range(0, len(keys), LOOKUP_SIZE):
+        chunk = keys[offset:offset + LOOKUP_SIZE]
+        rows = conn.execute(f"""
+            SELECT suggestion_id, dedup_key, status, urgency, confidence, source_reports
+            FROM suggestions WHERE dedup_key IN ({','.join('?' * len(chunk))})
+        """, chunk).fetchall()
+        for suggestion_id, key, status, urgency, confidence, source_reports in rows:
+            source_reports = json.loads(source_reports)
+            recorded[key].update(source_reports)
+            if status == "pending":
+                pending[key] = {"suggestion_id": suggestion_id, "urgency": urgency, "confidence": confidence,
+                                "source_reports": source_reports, "created": False}
+
+    results: List[Optional[Tuple[str, bool]]] = []
+    changed: Dict[str, Dict[str, Any]] = {}
+    for suggestion in suggestions:
+        key = suggestion["dedup_key"]
+        new_reports = [report_id for report_id in suggestion["source_reports"] if report_id not in recorded[key]]
+        if not new_reports:
+            results.append(None)
+            continue
+        recorded[key].update(new_reports)
+        row = pending.get(key)
+        if row is None:
+            row = pending[key] = {
+                "suggestion_id": str(uuid.uuid4()), "type": suggestion["type"], "unit_id": suggestion["unit_id"],
+                "urgency": suggestion["urgency"], "confidence": suggestion["confidence"],
+                "reason": suggestion["reason"], "source_reports": new_reports, "created": True,
+            }
+            results.append((row["suggestion_id"], True))
+        else:
+            _merge(row, suggestion, new_reports)
+            results.append((row["suggestion_id"], False))
+        changed[key] = row
+
+    stamp = (now or datetime.now()).isoformat()
+    conn.executemany("""
+        INSERT INTO suggestions
+        (suggestion_id, suggestion_type, urgency, reason, confidence,
+         source_reports, status, unit_id, created_at, refreshed_at, dedup_key)
+        VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?, ?)
+    """, [(row["suggestion_id"], row["type"], row["urgency"], row["reason"], row["confidence"],
+           json.dumps(row["source_reports"]), row["unit_id"], stamp, stamp, key)
+          for key, row in changed.items() if row["created"]])
+    conn.executemany("""
+        UPDATE suggestions SET urgency = ?, reason = ?, confidence = ?, source_reports = ?, refreshed_at = ?
+        WHERE suggestion_id = ?
+    """, [(row["urgency"], row["reason"], row["confidence"], json.dumps(row["source_reports"]), stamp,
+           row["suggestion_id"])
+          for row in changed.values() if not row["created"]])
+    return results
+
+
+def expire_suggestions(write: Callable, ttl_hours: float = SUGGESTION_TTL_HOURS,
+                       batch_size: int = EXPIRE_BATCH_SIZE, now: Optional[datetime] = None,
+                       publish: Optional[Callable[[List[Tuple[str, Optional[str]]]], None]] = None) -> int:
+    """
+    Dismiss pending suggestions not refreshed for ttl_hours, batch_size per
+    write transaction. publish() gets each committed batch as
+    (suggestion_id, unit_id) pairs. Returns how many expired.
+    """
+    now = now or datetime.now()
+    cutoff = (now - timedelta(hours=ttl_hours)).isoformat()
+    expired = 0
+    while True:
+        with write() as conn:
+            rows = conn.execute("""
+                UPDATE suggestions SET status = 'dismissed', dismissed_at = ?, dismissed_by = ?
+                WHERE suggestion_id IN (
+                    SELECT suggestion_id FROM suggestions
+                    WHERE status = 'pending' AND refreshed_at < ?
+                    LIMIT ?
+                )
+                RETURNING suggestion_id, unit_id
+            """, (now.isoformat(), EXPIRED_BY, cutoff, batch_size)).fetchall()
+        if rows and publish is not None:
+            publish(rows)
+        expired += len(rows)
+        if len(rows) < batch_size:
+            return expired
+
+
+class SuggestionExpiryJob:
+    """Runs expire_suggestions() on a background thread every `interval` seconds."""
+
+    def __init__(self, write: Callable, publish: Optional[Callable] = None, interval: float = 300.0,
+                 first_run_after: float = 30.0, ttl_hours: float = SUGGESTION_TTL_HOURS,
+                 batch_size: int = EXPIRE_BATCH_SIZE):
+        self._write = write
+        self._publish = publish
+        self.interval = interval
+        self.first_run_after = first_run_after
+        self.ttl_hours = ttl_hours
+        self.batch_size = batch_size
+        self.expired = 0
+        self.last_expired: Optional[int] = None
+        self.last_run_at: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="suggestion-expiry", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> int:
+        started = time.perf_counter()
+        count = expire_suggestions(self._write, self.ttl_hours, self.batch_size, publish=self._publish)
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.last_expired = count
+        self.last_run_at = datetime.now().isoformat()
+        self.expired += count
+        if count:
+            logger.info(f"Expired {count} pending suggestions older than {self.ttl_hours} h")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ttl_hours": self.ttl_hours, "expired": self.expired, "last_run_at": self.last_run_at,
+                "last_expired": self.last_expired, "last_duration_ms": self.last_duration_ms}
+
+    def _run(self):
+        delay = self.first_run_after
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Suggestion expiry pass failed: {e}", exc_info=True)
+            delay = self.interval
+
+
+def main():
+    from db import DATABASE_DIR, close_pool, get_pool
+
+    parser = argparse.ArgumentParser(description="Expire stale pending suggestions")
+    parser.add_argument("--db", default=os.path.join(DATABASE_DIR, "military_hierarchy.db"))
+    parser.add_argument("--ttl-hours", type=float, default=SUGGESTION_TTL_HOURS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = get_pool(args.db)
+    expired = expire_suggestions(pool.write, args.ttl_hours)
+    close_pool()
+    print({"expired": expired})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Keyword rules for report trigger analysis.
+
+RULES maps each category detect_report_triggers() looks for to its
+keywords. KeywordMatcher compiles them once: every distinct keyword is
+listed a single time with all the categories it belongs to, and match()
+lowercases the texts once and returns every category found.
+
+Keywords match whole words ("mine" does not match "determine"), with an
+optional plural "s". A trailing "*" matches any word ending ("critical*"
+also matches "critically"). Phrases ("booby trap") match as written. Verbs
+list their inflections ("patrolling", "ambushed") rather than a stem,
+where a stem would also match unrelated words ("contactless").
+
+Each keyword is found with str.find, which scans in C: with a few dozen
+keywords that is faster in CPython than one pass of a combined regex or
+splitting the text into words (see tests/benchmark_trigger_rules.py).
+Keywords whose categories have all been found already are skipped.
+
+report_count() reads the counts the rules compare (casualties,
+enemy_count, vehicle_count) the way the reports table's generated columns
+do, so a trigger and a `casualties > 0` query agree on every report.
+"""
+
+import math
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+RULES: Dict[str, Iterable[str]] = {
+    "injury": ["wounded", "injured", "injury", "injuries", "casualty", "casualties", "medevac", "kia", "killed",
+               "wia", "gunshot", "bleeding", "bled", "critical*"],
+    "urgent": ["critical*", "severe", "life-threatening", "kia", "killed"],
+    "enemy": ["enemy", "hostile", "contact", "contacted", "contacting", "engagement", "engaged", "engaging",
+              "patrol", "patrolled", "patrolling", "ambush", "ambushes", "ambushed", "ambushing",
+              "infantry", "armor*", "artillery"],
+    "eod": ["ied", "mine", "unexploded", "booby trap", "booby-trapped", "explosive", "ordnance", "bomb",
+            "bombed", "bombing", "explosive device"],
+}
+
+# Report types each suggestion rule applies to (EOD applies to every type)
+CASEVAC_REPORT_TYPES = ("CASUALTY", "CONTACT", "SITREP")
+EOINCREP_REPORT_TYPES = ("CONTACT", "INTELLIGENCE", "SITREP")
+
+# structured_json keys read for the casualty count, first present wins
+# (the reports.casualties column in add_report_json_columns.sql)
+CASUALTY_FIELDS = ("casualties", "casualty_count")
+
+_LEADING_INTEGER = re.compile(r"\s*([+-]?\d+)")
+
+
+def report_count(fields: Dict[str, Any], *names: str) -> int:
+    """
+    The first of `names` present (not null) in structured_json, as SQLite's
+    CAST(... AS INTEGER) reads it: numbers are truncated, strings read
+    their leading integer ("3 wounded" is 3) and anything else is 0. This
+    is how the reports table's generated count columns read them
+    (database/migrations/add_report_json_columns.sql); keep the two in step.
+    """
+    value: Optional[Any] = next((fields[name] for name in names if fields.get(name) is not None), None)
+    if isinstance(value, (bool, int)):
+        return int(value)
+    if isinstance(value, float):
+        return int(value) if math.isfinite(value) else 0
+    if isinstance(value, str):
+        match = _LEADING_INTEGER.match(value)
+        return int(match.group(1)) if match else 0
+    return 0
+
+
+class KeywordMatcher:
+    """A rule set compiled for whole-word matching."""
+
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        self.categories: FrozenSet[str] = frozenset(rules)
+        keywords: Dict[Tuple[str, bool], Set[str]] = {}
+        for category, words in rules.items():
+            for word in words:
+                stem = word.endswith("*")
+                keywords.setdefault((" ".join(word.rstrip("*").lower().split()), stem), set()).add(category)
+        # (keyword, is a stem, categories); shortest first, as the short ones
+        # are usually the most common
+        self.keywords: List[Tuple[str, bool, FrozenSet[str]]] = sorted(
+            ((word, stem, frozenset(categories)) for (word, stem), categories in keywords.items()),
+            key=lambda keyword: len(keyword[0]),
+        )
+
+    def match(self, *texts: str) -> Set[str]:
+        """The categories whose keywords appear in any of `texts`."""
+        text = "\n".join(text for text in texts if text).lower()
+        end = len(text)
+        found: Set[str] = set()
+        for word, stem, categories in self.keywords:
+            if categories <= found:
+                continue
+            start = text.find(word)
+            while start >= 0:
+                after = start + len(word)
+                if after < end and text[after] == "s" and not stem:
+                    after += 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (stem or after == end or not text[after].isalnum()):
+                    found |= categories
+                    if found == self.categories:
+                        return found
+                    break
+                start = text.find(word, start + 1)
+        return found
+
+
+matcher = KeywordMatcher(RULES)
@@ -0,0 +1,426 @@
+"""
+Write-behind queue with group commit.
+
+MQTT callbacks run on paho's network thread. Writing each message in its own
+transaction there means one commit per message and a network loop that stalls
+whenever the database is busy. WriteBehindQueue decouples the two: producers
+put() items into a bounded in-memory queue and return immediately, and a
+single writer thread hands them to a flush callback in batches. A batch is
+flushed once it reaches batch_size items or once its oldest item has waited
+max_delay seconds, whichever comes first.
+
+CoalescingBuffer is for state where only the latest value matters (device
+heartbeats): it keeps one entry per key and flushes the whole map on an
+interval, so the write rate depends on the number of keys, not messages.
+
+SamplingRingBuffer is for telemetry (the MQTT comm_log): recording must cost
+microseconds and must never block, so when the flusher falls behind it keeps
+only a sample of new entries instead of waiting for room.
+"""
+
+import collections
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from jobs import is_locked
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue drained by one writer thread that commits in batches.
+
+    flush(items) is called on the writer thread with up to batch_size items and
+    should write them in one transaction. If the queue is full, put() waits up
+    to put_timeout seconds for room and then drops the item (counted in
+    stats()["dropped"]), so a stalled database cannot block producers for long.
+    A flush that fails with a retryable error ("database is locked") is
+    retried after an exponential backoff, up to max_attempts; a batch that
+    fails with any other error is written again one item at a time, so one
+    bad item does not lose the rest. stop() drains everything still queued
+    before returning.
+    """
+
+    def __init__(self, name: str, flush: Callable[[List[Any]], None], maxsize: int = 10000,
+                 batch_size: int = 500, max_delay: float = 0.005, put_timeout: float = 1.0,
+                 max_attempts: int = 5, retry_delay: float = 0.05,
+                 retry_on: Callable[[Exception], bool] = is_locked):
+        self.name = name
+        self._flush = flush
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._retry_on = retry_on
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        # Counters; producers update enqueued/dropped/max_depth, the writer the rest
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        """Start the writer thread (put() also starts it on first use)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, item: Any) -> bool:
+        """Queue an item for writing. Returns False if it was dropped."""
+        if self._thread is None:
+            self.start()
+        if self._stopping:
+            self.dropped += 1
+            logger.warning(f"{self.name}: item dropped, queue is shutting down")
+            return False
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"{self.name}: queue full ({self._queue.maxsize}), item dropped")
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Flush everything still queued, then stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._stopping:
+                return
+            self._stopping = True
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+        logger.info(f"{self.name}: drained and stopped ({self.flushed} items written)")
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue-depth and flush-latency counters."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "avg_batch_size": round(self.flushed / self.batches, 1) if self.batches else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                try:
+                    # Anything already queued is taken without waiting
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is _STOP:
+                    # Flush this batch, then drain whatever is left below
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+        # Drain on shutdown
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            self._write(remaining[start:start + self.batch_size])
+
+    def _flush_with_retry(self, items: List[Any]):
+        attempt = 1
+        while True:
+            try:
+                self._flush(items)
+                return
+            except Exception as e:
+                if attempt >= self.max_attempts or not self._retry_on(e):
+                    raise
+                self.retries += 1
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                attempt += 1
+
+    def _write(self, batch: List[Any]):
+        started = time.perf_counter()
+        try:
+            self._flush_with_retry(batch)
+            self.flushed += len(batch)
+        except Exception as e:
+            if len(batch) == 1 or self._retry_on(e):
+                self.failed += len(batch)
+                logger.error(f"{self.name}: failed to write batch of {len(batch)}: {e}")
+            else:
+                logger.warning(f"{self.name}: batch of {len(batch)} failed ({e}), writing items one by one")
+                for item in batch:
+                    try:
+                        self._flush_with_retry([item])
+                        self.flushed += 1
+                    except Exception as item_error:
+                        self.failed += 1
+                        logger.error(f"{self.name}: failed to write item: {item_error}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+
+class CoalescingBuffer:
+    """
+    Latest-value-per-key map flushed by a background thread every `interval` seconds.
+
+    update(key, values) is O(1) under a lock and never touches the database.
+    Fields passed as None keep the value from an earlier update to the same key
+    in the current interval. flush(entries) receives a {key: values} dict on the
+    flusher thread. stop() flushes whatever is pending before returning.
+    """
+
+    def __init__(self, name: str, flush: Callable[[Dict[Any, tuple]], None], interval: float = 5.0):
+        self.name = name
+        self._flush = flush
+        self.interval = interval
+        self._pending: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.received = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        """Start the flusher thread."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._wake.clear()
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+                self._thread.start()
+
+    def update(self, key: Any, values: tuple):
+        """Record the latest values for key."""
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is not None and None in values:
+                values = tuple(old if new is None else new for new, old in zip(values, previous))
+            self._pending[key] = values
+            self.received += 1
+
+    def stop(self, timeout: Optional[float] = None):
+        """Flush pending entries, then stop the flusher thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._wake.set()
+            thread.join(timeout)
+        self.flush_now()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pending-key and flush-latency counters."""
+        return {
+            "pending": self.pending,
+            "received": self.received,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def flush_now(self):
+        """Write out everything pending (called by the flusher thread and stop())."""
+        with self._lock:
+            entries, self._pending = self._pending, {}
+        if not entries:
+            return
+        started = time.perf_counter()
+        try:
+            self._flush(entries)
+            self.flushed += len(entries)
+        except Exception as e:
+            self.failed += len(entries)
+            logger.error(f"{self.name}: failed to write {len(entries)} entries: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def _run(self):
+        while not self._wake.wait(self.interval):
+            self.flush_now()
+
+
+class SamplingRingBuffer:
+    """
+    Fixed-size buffer of telemetry entries, batch-written by a flusher thread.
+
+    record(entry) is a bounded deque append with no locking, meant for a single
+    producer thread (the MQTT loop). The flusher writes everything buffered
+    every `interval` seconds, or sooner once the buffer is `sample_above` full.
+    Past that fill level only one in `sample_every` entries is kept, and once
+    the buffer is full new entries are dropped; entries recorded with
+    always_keep=True (failures) bypass sampling but not the capacity limit.
+    stats() counts sampled-out and dropped entries.
+    """
+
+    def __init__(self, name: str, flush: Callable[[List[Any]], None], capacity: int = 8192,
+                 interval: float = 1.0, batch_size: int = 1000, sample_above: float = 0.5,
+                 sample_every: int = 10):
+        self.name = name
+        self._flush = flush
+        self.capacity = capacity
+        self.interval = interval
+        self.batch_size = batch_size
+        self.sample_every = sample_every
+        self._sample_at = int(capacity * sample_above)
+        self._buffer = collections.deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tick = 0
+
+        self.recorded = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        """Start the flusher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+            self._thread.start()
+
+    def record(self, entry: Any, always_keep: bool = False):
+        """Buffer an entry. Never blocks; may sample or drop under backlog."""
+        size = len(self._buffer)
+        if size >= self._sample_at:
+            if size >= self.capacity:
+                self.dropped += 1
+                return
+            if size == self._sample_at:
+                self._wake.set()
+            if not always_keep:
+                self._tick += 1
+                if self._tick % self.sample_every:
+                    self.sampled_out += 1
+                    return
+        self._buffer.append(entry)
+        self.recorded += 1
+
+    def stop(self, timeout: Optional[float] = None):
+        """Write out everything buffered, then stop the flusher thread."""
+        thread = self._thread
+        self._thread = None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join(timeout)
+        self.flush_now()
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer-depth, sampling and flush-latency counters."""
+        return {
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def flush_now(self):
+        """Write out everything currently buffered, batch_size entries per transaction."""
+        while self._buffer:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+            except IndexError:
+                pass
+            started = time.perf_counter()
+            try:
+                self._flush(batch)
+                self.flushed += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"{self.name}: failed to write {len(batch)} entries: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush_now()
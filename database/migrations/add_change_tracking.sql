@@ -0,0 +1,60 @@
+-- Change tracking for the dashboard's delta ("since") feeds
+-- Every insert or update of a report or suggestion stamps the row with the
+-- next value of a single monotonic counter. Clients poll with the last
+-- watermark they saw and only get rows with a higher row_version back.
+
+CREATE TABLE IF NOT EXISTS change_counter (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+ALTER TABLE reports ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE suggestions ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0;
+
+-- Existing rows get versions in insertion order, then the counter starts above them
+UPDATE reports SET row_version = rowid;
+UPDATE suggestions SET row_version = rowid;
+
+INSERT OR IGNORE INTO change_counter (id, value) VALUES (1, MAX(
+    (SELECT COALESCE(MAX(row_version), 0) FROM reports),
+    (SELECT COALESCE(MAX(row_version), 0) FROM suggestions)
+));
+
+CREATE INDEX IF NOT EXISTS idx_reports_row_version ON reports(row_version);
+CREATE INDEX IF NOT EXISTS idx_suggestions_row_version ON suggestions(row_version);
+
+-- The WHEN clause on the update triggers skips the trigger's own row_version
+-- write, so a row is bumped once per change instead of recursing.
+CREATE TRIGGER IF NOT EXISTS reports_row_version_insert
+AFTER INSERT ON reports
+BEGIN
+    UPDATE change_counter SET value = value + 1 WHERE id = 1;
+    UPDATE reports SET row_version = (SELECT value FROM change_counter WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_row_version_update
+AFTER UPDATE ON reports
+WHEN NEW.row_version = OLD.row_version
+BEGIN
+    UPDATE change_counter SET value = value + 1 WHERE id = 1;
+    UPDATE reports SET row_version = (SELECT value FROM change_counter WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS suggestions_row_version_insert
+AFTER INSERT ON suggestions
+BEGIN
+    UPDATE change_counter SET value = value + 1 WHERE id = 1;
+    UPDATE suggestions SET row_version = (SELECT value FROM change_counter WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS suggestions_row_version_update
+AFTER UPDATE ON suggestions
+WHEN NEW.row_version = OLD.row_version
+BEGIN
+    UPDATE change_counter SET value = value + 1 WHERE id = 1;
+    UPDATE suggestions SET row_version = (SELECT value FROM change_counter WHERE id = 1)
+    WHERE rowid = NEW.rowid;
+END;
@@ -0,0 +1,86 @@
+-- Full-text search over raw inputs, reports and FRAGOs
+-- External-content FTS5 tables: the index stores only tokens and reads the
+-- text back from the source table (for snippets) by rowid. Triggers keep each
+-- index in step with inserts, updates and deletes of its source table.
+-- Source rowids must stay stable; after a full VACUUM rebuild the indexes with
+-- `python backend/search.py --rebuild`.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS raw_inputs_fts USING fts5(
+    raw_text,
+    content='soldier_raw_inputs', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    structured_json,
+    content='reports', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS fragos_fts USING fts5(
+    formatted_document,
+    content='fragos', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS raw_inputs_fts_insert
+AFTER INSERT ON soldier_raw_inputs
+BEGIN
+    INSERT INTO raw_inputs_fts (rowid, raw_text) VALUES (NEW.rowid, NEW.raw_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS raw_inputs_fts_delete
+AFTER DELETE ON soldier_raw_inputs
+BEGIN
+    INSERT INTO raw_inputs_fts (raw_inputs_fts, rowid, raw_text) VALUES ('delete', OLD.rowid, OLD.raw_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS raw_inputs_fts_update
+AFTER UPDATE OF raw_text ON soldier_raw_inputs
+BEGIN
+    INSERT INTO raw_inputs_fts (raw_inputs_fts, rowid, raw_text) VALUES ('delete', OLD.rowid, OLD.raw_text);
+    INSERT INTO raw_inputs_fts (rowid, raw_text) VALUES (NEW.rowid, NEW.raw_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_insert
+AFTER INSERT ON reports
+BEGIN
+    INSERT INTO reports_fts (rowid, structured_json) VALUES (NEW.rowid, NEW.structured_json);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_delete
+AFTER DELETE ON reports
+BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, structured_json) VALUES ('delete', OLD.rowid, OLD.structured_json);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_update
+AFTER UPDATE OF structured_json ON reports
+BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, structured_json) VALUES ('delete', OLD.rowid, OLD.structured_json);
+    INSERT INTO reports_fts (rowid, structured_json) VALUES (NEW.rowid, NEW.structured_json);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fragos_fts_insert
+AFTER INSERT ON fragos
+BEGIN
+    INSERT INTO fragos_fts (rowid, formatted_document) VALUES (NEW.rowid, NEW.formatted_document);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fragos_fts_delete
+AFTER DELETE ON fragos
+BEGIN
+    INSERT INTO fragos_fts (fragos_fts, rowid, formatted_document) VALUES ('delete', OLD.rowid, OLD.formatted_document);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fragos_fts_update
+AFTER UPDATE OF formatted_document ON fragos
+BEGIN
+    INSERT INTO fragos_fts (fragos_fts, rowid, formatted_document) VALUES ('delete', OLD.rowid, OLD.formatted_document);
+    INSERT INTO fragos_fts (rowid, formatted_document) VALUES (NEW.rowid, NEW.formatted_document);
+END;
+
+-- Index the existing rows
+INSERT INTO raw_inputs_fts (raw_inputs_fts) VALUES ('rebuild');
+INSERT INTO reports_fts (reports_fts) VALUES ('rebuild');
+INSERT INTO fragos_fts (fragos_fts) VALUES ('rebuild');
@@ -0,0 +1,7 @@
+-- Composite indexes for keyset (cursor) pagination
+-- Lists are ordered by (timestamp DESC, id DESC); these let SQLite seek
+-- straight to the cursor position instead of scanning past earlier pages.
+
+CREATE INDEX IF NOT EXISTS idx_reports_timestamp_id ON reports(timestamp, report_id);
+CREATE INDEX IF NOT EXISTS idx_reports_soldier_timestamp_id ON reports(soldier_id, timestamp, report_id);
+CREATE INDEX IF NOT EXISTS idx_raw_inputs_soldier_timestamp_id ON soldier_raw_inputs(soldier_id, timestamp, input_id);
@@ -0,0 +1,14 @@
+-- Watermark for background reanalysis of reports
+-- Reanalysis walks reports in rowid (insertion) order and records the last
+-- rowid it has finished here, in the same transaction as the suggestions it
+-- created, so each run picks up where the previous one stopped.
+
+CREATE TABLE IF NOT EXISTS reanalysis_state (
+    name TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL,
+    updated_at TEXT
+);
+
+-- Looking up the suggestions already created for a report, so analysing it
+-- again does not duplicate them
+CREATE INDEX IF NOT EXISTS idx_suggestions_source_reports ON suggestions(source_reports);
@@ -0,0 +1,28 @@
+-- Trigger analysis status per report
+-- Reports are analysed for suggestions by background workers after the POST
+-- returns. The row is written as 'queued' in the same transaction as the
+-- report, and set to 'done' (with the number of suggestions created) in the
+-- same transaction as those suggestions, or to 'failed' once the retries run
+-- out. Rows still 'queued' at startup were never analysed and are queued
+-- again.
+
+CREATE TABLE IF NOT EXISTS report_analysis (
+    report_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    suggestions INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at TEXT NOT NULL,
+    analyzed_at TEXT,
+    FOREIGN KEY (report_id) REFERENCES reports(report_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_analysis_pending ON report_analysis(queued_at)
+WHERE status = 'queued';
+
+-- The status goes when its report is deleted (or moved to the retention archives)
+CREATE TRIGGER IF NOT EXISTS report_analysis_report_delete
+AFTER DELETE ON reports
+BEGIN
+    DELETE FROM report_analysis WHERE report_id = OLD.report_id;
+END;
@@ -0,0 +1,34 @@
+-- Generated columns for the structured_json fields that reports are filtered on
+-- Virtual columns are computed from structured_json when read, so they can
+-- never drift from it and cost nothing on insert beyond their indexes.
+-- json_valid() keeps a malformed blob from failing every query that touches
+-- the column; it just reads as NULL. Counts accept numbers or numeric
+-- strings ("3" and "3 wounded" both read as 3), as the trigger analysis does.
+
+ALTER TABLE reports ADD COLUMN casualties INTEGER GENERATED ALWAYS AS (
+    CASE WHEN json_valid(structured_json) THEN CAST(COALESCE(
+        json_extract(structured_json, '$.casualties'),
+        json_extract(structured_json, '$.casualty_count')
+    ) AS INTEGER) END
+) VIRTUAL;
+
+ALTER TABLE reports ADD COLUMN enemy_count INTEGER GENERATED ALWAYS AS (
+    CASE WHEN json_valid(structured_json) THEN CAST(json_extract(structured_json, '$.enemy_count') AS INTEGER) END
+) VIRTUAL;
+
+-- Lower-cased so severity = 'critical' matches however it was written
+ALTER TABLE reports ADD COLUMN severity TEXT GENERATED ALWAYS AS (
+    CASE WHEN json_valid(structured_json) THEN lower(trim(json_extract(structured_json, '$.severity'))) END
+) VIRTUAL;
+
+ALTER TABLE reports ADD COLUMN location TEXT GENERATED ALWAYS AS (
+    CASE WHEN json_valid(structured_json) THEN json_extract(structured_json, '$.location') END
+) VIRTUAL;
+
+-- Partial indexes: only reports that actually carry casualties / enemy
+-- sightings are indexed, so "casualties in unit X in the last hour" reads a
+-- handful of index entries. Queries must repeat the `> 0` term to use them.
+CREATE INDEX IF NOT EXISTS idx_reports_casualties ON reports(unit_id, timestamp) WHERE casualties > 0;
+CREATE INDEX IF NOT EXISTS idx_reports_enemy_count ON reports(unit_id, timestamp) WHERE enemy_count > 0;
+CREATE INDEX IF NOT EXISTS idx_reports_severity ON reports(severity, timestamp) WHERE severity IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_reports_location ON reports(location) WHERE location IS NOT NULL;
@@ -0,0 +1,115 @@
+-- Per-soldier activity summary maintained by triggers
+-- soldier_activity_buckets counts raw inputs and reports per soldier per
+-- hour ('YYYY-MM-DDTHH' of the row's timestamp); soldier_activity holds each
+-- soldier's latest input and report time. A rolling-window count sums at
+-- most one bucket per hour of the window, however busy the soldier was.
+-- Buckets empty out and are removed as retention deletes old rows.
+
+CREATE TABLE IF NOT EXISTS soldier_activity_buckets (
+    soldier_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    inputs INTEGER NOT NULL DEFAULT 0,
+    reports INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (soldier_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS soldier_activity (
+    soldier_id TEXT PRIMARY KEY,
+    last_input_at TEXT,
+    last_report_at TEXT
+) WITHOUT ROWID;
+
+-- Build them for the existing rows
+INSERT INTO soldier_activity_buckets (soldier_id, bucket, inputs)
+SELECT soldier_id, strftime('%Y-%m-%dT%H', timestamp), COUNT(*) FROM soldier_raw_inputs
+WHERE strftime('%Y-%m-%dT%H', timestamp) IS NOT NULL GROUP BY 1, 2
+ON CONFLICT(soldier_id, bucket) DO UPDATE SET inputs = excluded.inputs;
+
+INSERT INTO soldier_activity_buckets (soldier_id, bucket, reports)
+SELECT soldier_id, strftime('%Y-%m-%dT%H', timestamp), COUNT(*) FROM reports
+WHERE strftime('%Y-%m-%dT%H', timestamp) IS NOT NULL GROUP BY 1, 2
+ON CONFLICT(soldier_id, bucket) DO UPDATE SET reports = excluded.reports;
+
+INSERT INTO soldier_activity (soldier_id, last_input_at)
+SELECT soldier_id, MAX(timestamp) FROM soldier_raw_inputs GROUP BY soldier_id
+ON CONFLICT(soldier_id) DO UPDATE SET last_input_at = excluded.last_input_at;
+
+INSERT INTO soldier_activity (soldier_id, last_report_at)
+SELECT soldier_id, MAX(timestamp) FROM reports GROUP BY soldier_id
+ON CONFLICT(soldier_id) DO UPDATE SET last_report_at = excluded.last_report_at;
+
+-- Raw inputs
+CREATE TRIGGER IF NOT EXISTS soldier_activity_input_insert
+AFTER INSERT ON soldier_raw_inputs
+BEGIN
+    INSERT INTO soldier_activity_buckets (soldier_id, bucket, inputs)
+    SELECT NEW.soldier_id, strftime('%Y-%m-%dT%H', NEW.timestamp), 1
+    WHERE strftime('%Y-%m-%dT%H', NEW.timestamp) IS NOT NULL
+    ON CONFLICT(soldier_id, bucket) DO UPDATE SET inputs = inputs + 1;
+    INSERT INTO soldier_activity (soldier_id, last_input_at) VALUES (NEW.soldier_id, NEW.timestamp)
+    ON CONFLICT(soldier_id) DO UPDATE SET
+        last_input_at = MAX(COALESCE(last_input_at, ''), excluded.last_input_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS soldier_activity_input_delete
+AFTER DELETE ON soldier_raw_inputs
+BEGIN
+    UPDATE soldier_activity_buckets SET inputs = inputs - 1
+    WHERE soldier_id = OLD.soldier_id AND bucket = strftime('%Y-%m-%dT%H', OLD.timestamp);
+    DELETE FROM soldier_activity_buckets
+    WHERE soldier_id = OLD.soldier_id AND bucket = strftime('%Y-%m-%dT%H', OLD.timestamp)
+      AND inputs <= 0 AND reports <= 0;
+    UPDATE soldier_activity SET
+        last_input_at = (SELECT MAX(timestamp) FROM soldier_raw_inputs WHERE soldier_id = OLD.soldier_id)
+    WHERE soldier_id = OLD.soldier_id AND OLD.timestamp >= last_input_at;
+END;
+
+-- Reports
+CREATE TRIGGER IF NOT EXISTS soldier_activity_report_insert
+AFTER INSERT ON reports
+BEGIN
+    INSERT INTO soldier_activity_buckets (soldier_id, bucket, reports)
+    SELECT NEW.soldier_id, strftime('%Y-%m-%dT%H', NEW.timestamp), 1
+    WHERE strftime('%Y-%m-%dT%H', NEW.timestamp) IS NOT NULL
+    ON CONFLICT(soldier_id, bucket) DO UPDATE SET reports = reports + 1;
+    INSERT INTO soldier_activity (soldier_id, last_report_at) VALUES (NEW.soldier_id, NEW.timestamp)
+    ON CONFLICT(soldier_id) DO UPDATE SET
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS soldier_activity_report_delete
+AFTER DELETE ON reports
+BEGIN
+    UPDATE soldier_activity_buckets SET reports = reports - 1
+    WHERE soldier_id = OLD.soldier_id AND bucket = strftime('%Y-%m-%dT%H', OLD.timestamp);
+    DELETE FROM soldier_activity_buckets
+    WHERE soldier_id = OLD.soldier_id AND bucket = strftime('%Y-%m-%dT%H', OLD.timestamp)
+      AND inputs <= 0 AND reports <= 0;
+    UPDATE soldier_activity SET
+        last_report_at = (SELECT MAX(timestamp) FROM reports WHERE soldier_id = OLD.soldier_id)
+    WHERE soldier_id = OLD.soldier_id AND OLD.timestamp >= last_report_at;
+END;
+
+-- recent_activity used to LEFT JOIN both raw inputs and reports onto each
+-- soldier, multiplying the two counts together. It now reads the buckets:
+-- the current hour and the 23 before it, in the server's local time like
+-- the timestamps the backend writes.
+DROP VIEW IF EXISTS recent_activity;
+
+CREATE VIEW IF NOT EXISTS recent_activity AS
+SELECT
+    s.soldier_id,
+    s.name,
+    s.rank,
+    u.name as unit_name,
+    COALESCE((SELECT SUM(b.inputs) FROM soldier_activity_buckets b
+              WHERE b.soldier_id = s.soldier_id
+                AND b.bucket >= strftime('%Y-%m-%dT%H', 'now', 'localtime', '-23 hours')), 0) as recent_inputs,
+    a.last_input_at as last_input,
+    COALESCE((SELECT SUM(b.reports) FROM soldier_activity_buckets b
+              WHERE b.soldier_id = s.soldier_id
+                AND b.bucket >= strftime('%Y-%m-%dT%H', 'now', 'localtime', '-23 hours')), 0) as recent_reports,
+    a.last_report_at as last_report
+FROM soldiers s
+JOIN units u ON s.unit_id = u.unit_id
+LEFT JOIN soldier_activity a ON a.soldier_id = s.soldier_id;
@@ -0,0 +1,46 @@
+-- One pending suggestion per (type, unit, hour) and expiry of stale ones
+-- Suggestions raised by a single report carry a dedup_key of
+-- "<type>:<unit_id>:<hour>", the hour being the report's timestamp in whole
+-- hours since the epoch (backend/suggestion_store.py, DEDUP_BUCKET_SECONDS).
+-- Repeat reports are merged into the key's pending suggestion instead of
+-- adding rows. refreshed_at is when a suggestion was last raised or merged
+-- into; pending suggestions not refreshed for the TTL are expired.
+
+ALTER TABLE suggestions ADD COLUMN dedup_key TEXT;
+ALTER TABLE suggestions ADD COLUMN refreshed_at TEXT;
+
+-- Keys for existing single-report suggestions, read back from their report
+UPDATE suggestions
+SET dedup_key = suggestions.suggestion_type || ':' || suggestions.unit_id || ':' ||
+                (CAST(strftime('%s', r.timestamp) AS INTEGER) / 3600)
+FROM reports r
+WHERE json_array_length(suggestions.source_reports) = 1
+  AND r.report_id = json_extract(suggestions.source_reports, '$[0]')
+  AND suggestions.unit_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_suggestions_dedup_key ON suggestions(dedup_key);
+
+-- Existing duplicates: keep the newest pending suggestion of each key
+UPDATE suggestions
+SET status = 'dismissed', dismissed_at = strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), dismissed_by = 'merged'
+WHERE status = 'pending' AND dedup_key IS NOT NULL
+  AND EXISTS (
+      SELECT 1 FROM suggestions newer
+      WHERE newer.dedup_key = suggestions.dedup_key AND newer.status = 'pending'
+        AND (newer.created_at > suggestions.created_at
+             OR (newer.created_at = suggestions.created_at AND newer.rowid > suggestions.rowid))
+  );
+
+UPDATE suggestions SET refreshed_at = replace(created_at, ' ', 'T') WHERE status = 'pending';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_suggestions_pending_dedup_key
+    ON suggestions(dedup_key) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_suggestions_status_refreshed ON suggestions(status, refreshed_at);
+
+-- The suggestions poll (status filter, newest first) reads its page straight
+-- from the index instead of sorting every row of the status
+CREATE INDEX IF NOT EXISTS idx_suggestions_status_created ON suggestions(status, created_at DESC);
+DROP INDEX IF EXISTS idx_suggestions_status;
+
+-- Replaced by the dedup_key lookup
+DROP INDEX IF EXISTS idx_suggestions_source_reports;
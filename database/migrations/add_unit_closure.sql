@@ -0,0 +1,70 @@
+-- Closure table for the units hierarchy
+-- One row per (ancestor, descendant) pair, including each unit paired with
+-- itself at depth 0. "Everything under X" becomes an index lookup on
+-- ancestor_id and "everything above X" one on descendant_id, with no
+-- recursive walk. Triggers keep it in step with units.parent_unit_id.
+
+CREATE TABLE IF NOT EXISTS unit_closure (
+    ancestor_id TEXT NOT NULL,
+    descendant_id TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_unit_closure_descendant ON unit_closure(descendant_id, depth);
+
+-- Build it for the existing hierarchy
+INSERT OR IGNORE INTO unit_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+    SELECT unit_id, unit_id, 0 FROM units
+    UNION ALL
+    SELECT t.ancestor_id, u.unit_id, t.depth + 1
+    FROM tree t
+    JOIN units u ON u.parent_unit_id = t.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree;
+
+-- New unit: itself, plus every ancestor of its parent one level further away
+CREATE TRIGGER IF NOT EXISTS unit_closure_insert
+AFTER INSERT ON units
+BEGIN
+    INSERT INTO unit_closure (ancestor_id, descendant_id, depth) VALUES (NEW.unit_id, NEW.unit_id, 0);
+    INSERT INTO unit_closure (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, NEW.unit_id, depth + 1
+    FROM unit_closure
+    WHERE descendant_id = NEW.parent_unit_id;
+END;
+
+-- A unit cannot be moved underneath itself
+CREATE TRIGGER IF NOT EXISTS unit_closure_no_cycles
+BEFORE UPDATE OF parent_unit_id ON units
+WHEN NEW.parent_unit_id IS NOT NULL
+BEGIN
+    SELECT RAISE(ABORT, 'unit cannot be moved under its own subtree')
+    WHERE EXISTS (
+        SELECT 1 FROM unit_closure
+        WHERE ancestor_id = NEW.unit_id AND descendant_id = NEW.parent_unit_id
+    );
+END;
+
+-- Reparenting moves the whole subtree: drop its links to the old ancestors,
+-- then link every new ancestor to every unit in the subtree.
+CREATE TRIGGER IF NOT EXISTS unit_closure_reparent
+AFTER UPDATE OF parent_unit_id ON units
+WHEN OLD.parent_unit_id IS NOT NEW.parent_unit_id
+BEGIN
+    DELETE FROM unit_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM unit_closure WHERE ancestor_id = NEW.unit_id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM unit_closure WHERE ancestor_id = NEW.unit_id);
+    INSERT INTO unit_closure (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM unit_closure above, unit_closure below
+    WHERE above.descendant_id = NEW.parent_unit_id
+      AND below.ancestor_id = NEW.unit_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_closure_delete
+AFTER DELETE ON units
+BEGIN
+    DELETE FROM unit_closure WHERE descendant_id = OLD.unit_id OR ancestor_id = OLD.unit_id;
+END;
@@ -0,0 +1,5 @@
+-- Per-unit report listing (GET /units/{unit_id}/reports)
+-- Lets each unit in a subtree be read in (timestamp, id) order straight from
+-- the index, the same way idx_reports_soldier_timestamp_id serves soldiers.
+
+CREATE INDEX IF NOT EXISTS idx_reports_unit_timestamp_id ON reports(unit_id, timestamp, report_id);
@@ -0,0 +1,178 @@
+-- Per-unit statistics maintained by triggers
+-- One row per unit with its own report / raw input / pending suggestion
+-- counts and latest timestamps, plus one row per (unit, report type). Every
+-- insert, delete and relevant update adjusts them in the same transaction,
+-- so reading a unit's stats never touches reports. Subtree totals are summed
+-- over unit_closure at read time: that costs one row per unit in the subtree,
+-- whatever the report volume, and stays right when units are moved.
+--
+-- Raw inputs count towards their soldier's current unit (like
+-- /units/{id}/soldiers); moving a soldier moves their counts along.
+-- The counts describe the live tables, so rows moved to the retention
+-- archives drop out of them.
+
+CREATE TABLE IF NOT EXISTS unit_stats (
+    unit_id TEXT PRIMARY KEY,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    last_report_at TEXT,
+    raw_input_count INTEGER NOT NULL DEFAULT 0,
+    last_input_at TEXT,
+    pending_suggestions INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS unit_report_type_stats (
+    unit_id TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    last_report_at TEXT,
+    PRIMARY KEY (unit_id, report_type)
+) WITHOUT ROWID;
+
+-- Build them for the existing rows
+INSERT OR IGNORE INTO unit_stats (unit_id) SELECT unit_id FROM units;
+
+INSERT INTO unit_stats (unit_id, report_count, last_report_at)
+SELECT unit_id, COUNT(*), MAX(timestamp) FROM reports GROUP BY unit_id
+ON CONFLICT(unit_id) DO UPDATE SET
+    report_count = excluded.report_count, last_report_at = excluded.last_report_at;
+
+INSERT INTO unit_stats (unit_id, raw_input_count, last_input_at)
+SELECT s.unit_id, COUNT(*), MAX(i.timestamp)
+FROM soldier_raw_inputs i JOIN soldiers s ON s.soldier_id = i.soldier_id
+WHERE s.unit_id IS NOT NULL GROUP BY s.unit_id
+ON CONFLICT(unit_id) DO UPDATE SET
+    raw_input_count = excluded.raw_input_count, last_input_at = excluded.last_input_at;
+
+INSERT INTO unit_stats (unit_id, pending_suggestions)
+SELECT unit_id, COUNT(*) FROM suggestions WHERE status = 'pending' AND unit_id IS NOT NULL GROUP BY unit_id
+ON CONFLICT(unit_id) DO UPDATE SET pending_suggestions = excluded.pending_suggestions;
+
+INSERT OR REPLACE INTO unit_report_type_stats (unit_id, report_type, report_count, last_report_at)
+SELECT unit_id, report_type, COUNT(*), MAX(timestamp) FROM reports GROUP BY unit_id, report_type;
+
+-- Reports
+CREATE TRIGGER IF NOT EXISTS unit_stats_report_insert
+AFTER INSERT ON reports
+BEGIN
+    INSERT INTO unit_stats (unit_id, report_count, last_report_at) VALUES (NEW.unit_id, 1, NEW.timestamp)
+    ON CONFLICT(unit_id) DO UPDATE SET
+        report_count = report_count + 1,
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+    INSERT INTO unit_report_type_stats (unit_id, report_type, report_count, last_report_at)
+    VALUES (NEW.unit_id, NEW.report_type, 1, NEW.timestamp)
+    ON CONFLICT(unit_id, report_type) DO UPDATE SET
+        report_count = report_count + 1,
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+END;
+
+-- The latest timestamp is only looked up again when the deleted row was the
+-- latest one; retention deletes the oldest rows, so it rarely is
+CREATE TRIGGER IF NOT EXISTS unit_stats_report_delete
+AFTER DELETE ON reports
+BEGIN
+    UPDATE unit_stats SET
+        report_count = report_count - 1,
+        last_report_at = CASE WHEN OLD.timestamp < last_report_at THEN last_report_at
+            ELSE (SELECT MAX(timestamp) FROM reports WHERE unit_id = OLD.unit_id) END
+    WHERE unit_id = OLD.unit_id;
+    UPDATE unit_report_type_stats SET
+        report_count = report_count - 1,
+        last_report_at = CASE WHEN OLD.timestamp < last_report_at THEN last_report_at
+            ELSE (SELECT MAX(timestamp) FROM reports
+                  WHERE unit_id = OLD.unit_id AND report_type = OLD.report_type) END
+    WHERE unit_id = OLD.unit_id AND report_type = OLD.report_type;
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_stats_report_update
+AFTER UPDATE OF unit_id, report_type, timestamp ON reports
+WHEN OLD.unit_id IS NOT NEW.unit_id OR OLD.report_type IS NOT NEW.report_type
+     OR OLD.timestamp IS NOT NEW.timestamp
+BEGIN
+    UPDATE unit_stats SET
+        report_count = report_count - 1,
+        last_report_at = CASE WHEN OLD.timestamp < last_report_at THEN last_report_at
+            ELSE (SELECT MAX(timestamp) FROM reports WHERE unit_id = OLD.unit_id) END
+    WHERE unit_id = OLD.unit_id;
+    UPDATE unit_report_type_stats SET
+        report_count = report_count - 1,
+        last_report_at = CASE WHEN OLD.timestamp < last_report_at THEN last_report_at
+            ELSE (SELECT MAX(timestamp) FROM reports
+                  WHERE unit_id = OLD.unit_id AND report_type = OLD.report_type) END
+    WHERE unit_id = OLD.unit_id AND report_type = OLD.report_type;
+    INSERT INTO unit_stats (unit_id, report_count, last_report_at) VALUES (NEW.unit_id, 1, NEW.timestamp)
+    ON CONFLICT(unit_id) DO UPDATE SET
+        report_count = report_count + 1,
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+    INSERT INTO unit_report_type_stats (unit_id, report_type, report_count, last_report_at)
+    VALUES (NEW.unit_id, NEW.report_type, 1, NEW.timestamp)
+    ON CONFLICT(unit_id, report_type) DO UPDATE SET
+        report_count = report_count + 1,
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+END;
+
+-- Raw inputs
+CREATE TRIGGER IF NOT EXISTS unit_stats_raw_input_insert
+AFTER INSERT ON soldier_raw_inputs
+WHEN (SELECT unit_id FROM soldiers WHERE soldier_id = NEW.soldier_id) IS NOT NULL
+BEGIN
+    INSERT INTO unit_stats (unit_id, raw_input_count, last_input_at)
+    VALUES ((SELECT unit_id FROM soldiers WHERE soldier_id = NEW.soldier_id), 1, NEW.timestamp)
+    ON CONFLICT(unit_id) DO UPDATE SET
+        raw_input_count = raw_input_count + 1,
+        last_input_at = MAX(COALESCE(last_input_at, ''), excluded.last_input_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_stats_raw_input_delete
+AFTER DELETE ON soldier_raw_inputs
+BEGIN
+    UPDATE unit_stats SET
+        raw_input_count = raw_input_count - 1,
+        last_input_at = CASE WHEN OLD.timestamp < last_input_at THEN last_input_at
+            ELSE (SELECT MAX(i.timestamp) FROM soldiers s JOIN soldier_raw_inputs i ON i.soldier_id = s.soldier_id
+                  WHERE s.unit_id = unit_stats.unit_id) END
+    WHERE unit_id = (SELECT unit_id FROM soldiers WHERE soldier_id = OLD.soldier_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_stats_soldier_moved
+AFTER UPDATE OF unit_id ON soldiers
+WHEN OLD.unit_id IS NOT NEW.unit_id
+BEGIN
+    UPDATE unit_stats SET
+        raw_input_count = raw_input_count - (SELECT COUNT(*) FROM soldier_raw_inputs WHERE soldier_id = NEW.soldier_id),
+        last_input_at = (SELECT MAX(i.timestamp) FROM soldiers s JOIN soldier_raw_inputs i ON i.soldier_id = s.soldier_id
+                         WHERE s.unit_id = OLD.unit_id)
+    WHERE unit_id = OLD.unit_id;
+    INSERT INTO unit_stats (unit_id, raw_input_count, last_input_at)
+    SELECT NEW.unit_id, COUNT(*), MAX(timestamp) FROM soldier_raw_inputs
+    WHERE soldier_id = NEW.soldier_id AND NEW.unit_id IS NOT NULL GROUP BY soldier_id
+    ON CONFLICT(unit_id) DO UPDATE SET
+        raw_input_count = raw_input_count + excluded.raw_input_count,
+        last_input_at = NULLIF(MAX(COALESCE(last_input_at, ''), COALESCE(excluded.last_input_at, '')), '');
+END;
+
+-- Pending suggestions
+CREATE TRIGGER IF NOT EXISTS unit_stats_suggestion_insert
+AFTER INSERT ON suggestions
+WHEN NEW.status = 'pending' AND NEW.unit_id IS NOT NULL
+BEGIN
+    INSERT INTO unit_stats (unit_id, pending_suggestions) VALUES (NEW.unit_id, 1)
+    ON CONFLICT(unit_id) DO UPDATE SET pending_suggestions = pending_suggestions + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_stats_suggestion_update
+AFTER UPDATE OF status, unit_id ON suggestions
+WHEN (OLD.status = 'pending') != (NEW.status = 'pending') OR OLD.unit_id IS NOT NEW.unit_id
+BEGIN
+    UPDATE unit_stats SET pending_suggestions = pending_suggestions - 1
+    WHERE OLD.status = 'pending' AND unit_id = OLD.unit_id;
+    INSERT INTO unit_stats (unit_id, pending_suggestions)
+    SELECT NEW.unit_id, 1 WHERE NEW.status = 'pending' AND NEW.unit_id IS NOT NULL
+    ON CONFLICT(unit_id) DO UPDATE SET pending_suggestions = pending_suggestions + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS unit_stats_suggestion_delete
+AFTER DELETE ON suggestions
+WHEN OLD.status = 'pending' AND OLD.unit_id IS NOT NULL
+BEGIN
+    UPDATE unit_stats SET pending_suggestions = pending_suggestions - 1 WHERE unit_id = OLD.unit_id;
+END;
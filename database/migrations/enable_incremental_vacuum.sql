@@ -0,0 +1,9 @@
+-- Incremental vacuum for the hot database
+-- The retention job (backend/retention.py) moves old rows into archive files
+-- and then releases the freed pages a step at a time with
+-- PRAGMA incremental_vacuum, instead of a full VACUUM that rewrites and locks
+-- the whole database. Switching auto_vacuum on an existing database needs one
+-- full VACUUM, done here once.
+
+PRAGMA auto_vacuum = INCREMENTAL;
+VACUUM;
@@ -0,0 +1,61 @@
+-- Index the values of a report's structured_json, not its JSON text
+-- reports_fts indexed structured_json as stored, keys included, so searching
+-- "description", "severity" or "location" matched nearly every report. It
+-- now has its own content: the text, number and string values of the
+-- document joined by spaces (the raw text if it is not valid JSON; a JSON
+-- string holding a JSON document, as some stored reports are, is read
+-- through), built by
+-- the triggers below. The same expression is REPORT_FIELD_TEXT in
+-- backend/search.py, used by `python backend/search.py --rebuild`.
+
+DROP TRIGGER IF EXISTS reports_fts_insert;
+DROP TRIGGER IF EXISTS reports_fts_delete;
+DROP TRIGGER IF EXISTS reports_fts_update;
+DROP TABLE IF EXISTS reports_fts;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    field_values,
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_insert
+AFTER INSERT ON reports
+BEGIN
+    INSERT INTO reports_fts (rowid, field_values)
+    VALUES (NEW.rowid, CASE WHEN json_valid(NEW.structured_json)
+        THEN (SELECT group_concat(value, ' ') FROM json_tree(
+              CASE WHEN json_type(NEW.structured_json) = 'text' AND json_valid(json_extract(NEW.structured_json, '$'))
+                   THEN json_extract(NEW.structured_json, '$') ELSE NEW.structured_json END)
+              WHERE type IN ('text', 'integer', 'real'))
+        ELSE NEW.structured_json END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_delete
+AFTER DELETE ON reports
+BEGIN
+    DELETE FROM reports_fts WHERE rowid = OLD.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reports_fts_update
+AFTER UPDATE OF structured_json ON reports
+BEGIN
+    DELETE FROM reports_fts WHERE rowid = OLD.rowid;
+    INSERT INTO reports_fts (rowid, field_values)
+    VALUES (NEW.rowid, CASE WHEN json_valid(NEW.structured_json)
+        THEN (SELECT group_concat(value, ' ') FROM json_tree(
+              CASE WHEN json_type(NEW.structured_json) = 'text' AND json_valid(json_extract(NEW.structured_json, '$'))
+                   THEN json_extract(NEW.structured_json, '$') ELSE NEW.structured_json END)
+              WHERE type IN ('text', 'integer', 'real'))
+        ELSE NEW.structured_json END);
+END;
+
+-- Index the existing rows
+INSERT INTO reports_fts (rowid, field_values)
+SELECT rowid, CASE WHEN json_valid(structured_json)
+    THEN (SELECT group_concat(value, ' ') FROM json_tree(
+              CASE WHEN json_type(structured_json) = 'text' AND json_valid(json_extract(structured_json, '$'))
+                   THEN json_extract(structured_json, '$') ELSE structured_json END)
+          WHERE type IN ('text', 'integer', 'real'))
+    ELSE structured_json END
+FROM reports;
+INSERT INTO reports_fts (reports_fts) VALUES ('optimize');
@@ -0,0 +1,99 @@
+-- Bucket soldier activity by the server's local hour
+-- The triggers in add_soldier_activity.sql took strftime('%Y-%m-%dT%H') of
+-- the timestamp as written, which SQLite converts to UTC when it carries an
+-- offset ("+02:00" or "Z"), while the backend writes naive local times and
+-- GET /soldiers/activity and recent_activity compare buckets against the
+-- local clock. Offset timestamps are now converted to local time, naive
+-- ones are taken as local, and the buckets are rebuilt.
+
+DROP TRIGGER IF EXISTS soldier_activity_input_insert;
+DROP TRIGGER IF EXISTS soldier_activity_input_delete;
+DROP TRIGGER IF EXISTS soldier_activity_report_insert;
+DROP TRIGGER IF EXISTS soldier_activity_report_delete;
+
+DELETE FROM soldier_activity_buckets;
+
+INSERT INTO soldier_activity_buckets (soldier_id, bucket, inputs)
+SELECT soldier_id, bucket, COUNT(*) FROM (
+    SELECT soldier_id,
+           CASE WHEN timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR timestamp GLOB '*[Zz]'
+                THEN strftime('%Y-%m-%dT%H', timestamp, 'localtime')
+                ELSE strftime('%Y-%m-%dT%H', timestamp) END AS bucket
+    FROM soldier_raw_inputs
+)
+WHERE bucket IS NOT NULL GROUP BY 1, 2;
+
+INSERT INTO soldier_activity_buckets (soldier_id, bucket, reports)
+SELECT soldier_id, bucket, COUNT(*) FROM (
+    SELECT soldier_id,
+           CASE WHEN timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR timestamp GLOB '*[Zz]'
+                THEN strftime('%Y-%m-%dT%H', timestamp, 'localtime')
+                ELSE strftime('%Y-%m-%dT%H', timestamp) END AS bucket
+    FROM reports
+)
+WHERE bucket IS NOT NULL GROUP BY 1, 2
+ON CONFLICT(soldier_id, bucket) DO UPDATE SET reports = excluded.reports;
+
+-- Raw inputs
+CREATE TRIGGER IF NOT EXISTS soldier_activity_input_insert
+AFTER INSERT ON soldier_raw_inputs
+BEGIN
+    INSERT INTO soldier_activity_buckets (soldier_id, bucket, inputs)
+    SELECT NEW.soldier_id, bucket, 1 FROM (
+        SELECT CASE WHEN NEW.timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR NEW.timestamp GLOB '*[Zz]'
+                    THEN strftime('%Y-%m-%dT%H', NEW.timestamp, 'localtime')
+                    ELSE strftime('%Y-%m-%dT%H', NEW.timestamp) END AS bucket
+    )
+    WHERE bucket IS NOT NULL
+    ON CONFLICT(soldier_id, bucket) DO UPDATE SET inputs = inputs + 1;
+    INSERT INTO soldier_activity (soldier_id, last_input_at) VALUES (NEW.soldier_id, NEW.timestamp)
+    ON CONFLICT(soldier_id) DO UPDATE SET
+        last_input_at = MAX(COALESCE(last_input_at, ''), excluded.last_input_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS soldier_activity_input_delete
+AFTER DELETE ON soldier_raw_inputs
+BEGIN
+    UPDATE soldier_activity_buckets SET inputs = inputs - 1
+    WHERE soldier_id = OLD.soldier_id AND bucket = (
+        CASE WHEN OLD.timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR OLD.timestamp GLOB '*[Zz]'
+             THEN strftime('%Y-%m-%dT%H', OLD.timestamp, 'localtime')
+             ELSE strftime('%Y-%m-%dT%H', OLD.timestamp) END);
+    DELETE FROM soldier_activity_buckets
+    WHERE soldier_id = OLD.soldier_id AND inputs <= 0 AND reports <= 0;
+    UPDATE soldier_activity SET
+        last_input_at = (SELECT MAX(timestamp) FROM soldier_raw_inputs WHERE soldier_id = OLD.soldier_id)
+    WHERE soldier_id = OLD.soldier_id AND OLD.timestamp >= last_input_at;
+END;
+
+-- Reports
+CREATE TRIGGER IF NOT EXISTS soldier_activity_report_insert
+AFTER INSERT ON reports
+BEGIN
+    INSERT INTO soldier_activity_buckets (soldier_id, bucket, reports)
+    SELECT NEW.soldier_id, bucket, 1 FROM (
+        SELECT CASE WHEN NEW.timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR NEW.timestamp GLOB '*[Zz]'
+                    THEN strftime('%Y-%m-%dT%H', NEW.timestamp, 'localtime')
+                    ELSE strftime('%Y-%m-%dT%H', NEW.timestamp) END AS bucket
+    )
+    WHERE bucket IS NOT NULL
+    ON CONFLICT(soldier_id, bucket) DO UPDATE SET reports = reports + 1;
+    INSERT INTO soldier_activity (soldier_id, last_report_at) VALUES (NEW.soldier_id, NEW.timestamp)
+    ON CONFLICT(soldier_id) DO UPDATE SET
+        last_report_at = MAX(COALESCE(last_report_at, ''), excluded.last_report_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS soldier_activity_report_delete
+AFTER DELETE ON reports
+BEGIN
+    UPDATE soldier_activity_buckets SET reports = reports - 1
+    WHERE soldier_id = OLD.soldier_id AND bucket = (
+        CASE WHEN OLD.timestamp GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR OLD.timestamp GLOB '*[Zz]'
+             THEN strftime('%Y-%m-%dT%H', OLD.timestamp, 'localtime')
+             ELSE strftime('%Y-%m-%dT%H', OLD.timestamp) END);
+    DELETE FROM soldier_activity_buckets
+    WHERE soldier_id = OLD.soldier_id AND inputs <= 0 AND reports <= 0;
+    UPDATE soldier_activity SET
+        last_report_at = (SELECT MAX(timestamp) FROM reports WHERE soldier_id = OLD.soldier_id)
+    WHERE soldier_id = OLD.soldier_id AND OLD.timestamp >= last_report_at;
+END;
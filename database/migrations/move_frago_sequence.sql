@@ -0,0 +1,11 @@
+-- FRAGO numbers move into report_sequences with CASEVAC and EOINCREP, so one
+-- allocator (backend/sequences.py) serves all three. Carry on from whichever
+-- is higher: the old counter or the highest FRAGO actually issued.
+
+INSERT OR IGNORE INTO report_sequences (report_type, next_number)
+SELECT 'FRAGO', MAX(
+    COALESCE((SELECT next_number FROM frago_sequence WHERE id = 1), 1),
+    COALESCE((SELECT MAX(frago_number) + 1 FROM fragos), 1)
+);
+
+DROP TABLE IF EXISTS frago_sequence;
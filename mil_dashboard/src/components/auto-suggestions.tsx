@@ -33,29 +33,52 @@ export function AutoSuggestions({
 }: AutoSuggestionsProps) {
   const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
   const [showPanel, setShowPanel] = useState(false);
-  const [lastCount, setLastCount] = useState(0);
 
-  // Poll for suggestions every 5 seconds
+  // Refresh suggestions when the backend pushes a change, with a slow poll as fallback
   useEffect(() => {
+    // After the first full fetch only ask for suggestions changed since the watermark
+    let watermark: number | null = null;
+    const seen = new Set<string>();
+
     const fetchSuggestions = async () => {
       try {
-        const url = unitId
-          ? `http://localhost:8000/api/suggestions?status=pending&unit_id=${unitId}`
-          : "http://localhost:8000/api/suggestions?status=pending";
-
-        const response = await fetch(url);
+        const params = new URLSearchParams();
+        if (watermark === null) params.set("status", "pending");
+        else params.set("since", String(watermark));
+        if (unitId) params.set("unit_id", unitId);
+
+        const response = await fetch(
+          `http://localhost:8000/api/suggestions?${params.toString()}`
+        );
         const data = await response.json();
-
-        setSuggestions(data.suggestions || []);
+        const changed: Suggestion[] = data.suggestions || [];
+        const initial = watermark === null;
+        watermark = data.watermark ?? null;
+
+        if (initial) {
+          changed.forEach((s) => seen.add(s.suggestion_id));
+          setSuggestions(changed);
+          return;
+        }
+        if (changed.length === 0) return;
+
+        // The feed is oldest change first; the panel shows newest first
+        const pending = changed.filter((s) => s.status === "pending").reverse();
+        const changedIds = new Set(changed.map((s) => s.suggestion_id));
+        setSuggestions((prev) =>
+          [
+            ...pending,
+            ...prev.filter((s) => !changedIds.has(s.suggestion_id)),
+          ].slice(0, 50)
+        );
 
         // Show notification if new suggestions arrived
-        if (data.suggestions.length > lastCount && lastCount > 0) {
-          const newSuggestion = data.suggestions[0];
-          showNotification(newSuggestion);
+        const arrived = pending.filter((s) => !seen.has(s.suggestion_id));
+        changed.forEach((s) => seen.add(s.suggestion_id));
+        if (arrived.length > 0) {
+          showNotification(arrived[0]);
           setShowPanel(true); // Auto-open panel
         }
-
-        setLastCount(data.suggestions.length);
       } catch (error) {
         console.error("Error fetching suggestions:", error);
       }
@@ -79,10 +102,22 @@ export function AutoSuggestions({
     // Initial fetch
     fetchSuggestions();
 
-    // Poll every 5 seconds
-    const interval = setInterval(fetchSuggestions, 5000);
+    const events = new EventSource("http://localhost:8000/events");
+    for (const type of [
+      "suggestion-created",
+      "suggestion-updated",
+      "suggestion-dismissed",
+    ]) {
+      events.addEventListener(type, () => fetchSuggestions());
+    }
+
+    // Fallback poll in case the event stream drops
+    const interval = setInterval(fetchSuggestions, 30000);
 
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      events.close();
+    };
   }, [unitId]);
 
   const showNotification = (suggestion: Suggestion) => {
@@ -101,27 +101,14 @@ export function DetailPanel({ selectedNode }: DetailPanelProps) {
         setRawInputs(inputsData.raw_inputs || []);
         setReports(reportsData.reports || []);
       } else {
-        // For units, fetch all reports from soldiers in that unit
-        const response = await fetch(`http://localhost:8000/units/${selectedNode.unit_id}/soldiers`);
-        const soldiersData = await response.json();
-        
-        if (soldiersData.soldiers && soldiersData.soldiers.length > 0) {
-          // Fetch reports for all soldiers in the unit
-          const reportPromises = soldiersData.soldiers.map((soldier: any) =>
-            fetch(`http://localhost:8000/soldiers/${soldier.soldier_id}/reports`)
-          );
-          
-          const reportResponses = await Promise.all(reportPromises);
-          const allReports = [];
-          
-          for (const res of reportResponses) {
-            const data = await res.json();
-            allReports.push(...(data.reports || []));
-          }
-          
-          setReports(allReports);
-          setRawInputs([]); // Units don't have direct raw inputs
-        }
+        // For units, fetch the merged reports of the unit and all its subordinate units
+        const response = await fetch(
+          `http://localhost:8000/units/${selectedNode.unit_id}/reports?recursive=true&limit=500`
+        );
+        const reportsData = await response.json();
+
+        setReports(reportsData.reports || []);
+        setRawInputs([]); // Units don't have direct raw inputs
       }
     } catch (error) {
       console.error('Error fetching node data:', error);
@@ -2,7 +2,7 @@
 
 import type React from "react";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { Card } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
@@ -47,18 +47,41 @@ export function StreamPanel({ streamId, onItemClick }: StreamPanelProps) {
   const [updates, setUpdates] = useState<BattlefieldReport[]>([]);
   const [loading, setLoading] = useState(false);
   const API_BASE = "http://localhost:8000";
+  // Delta polling: after the first full fetch only ask for reports newer than the watermark
+  const watermarkRef = useRef<number | null>(null);
+  const rawReportsRef = useRef<any[]>([]);
 
-  // Fetch existing reports on mount and periodically
+  // Fetch existing reports on mount, then whenever the backend pushes a new one
   useEffect(() => {
     fetchReports();
-    const interval = setInterval(fetchReports, 5000); // Refresh every 5 seconds
-    return () => clearInterval(interval);
+    const events = new EventSource(`${API_BASE}/events`);
+    events.addEventListener("report-created", () => fetchReports());
+    events.addEventListener("reports-created", () => fetchReports()); // batch ingestion
+    const interval = setInterval(fetchReports, 30000); // Fallback if the event stream drops
+    return () => {
+      clearInterval(interval);
+      events.close();
+    };
   }, []);
 
   const fetchReports = async () => {
     try {
-      const response = await axios.get(`${API_BASE}/reports?limit=50`);
-      const reports = response.data.reports || [];
+      const since =
+        watermarkRef.current !== null ? `&since=${watermarkRef.current}` : "";
+      const response = await axios.get(`${API_BASE}/reports?limit=50${since}`);
+      const changed = response.data.reports || [];
+      watermarkRef.current = response.data.watermark ?? null;
+      if (since && changed.length === 0) return;
+
+      // Merge changed reports into what we already have, newest first
+      const byId = new Map<string, any>();
+      for (const report of [...changed, ...rawReportsRef.current]) {
+        if (!byId.has(report.report_id)) byId.set(report.report_id, report);
+      }
+      const reports = Array.from(byId.values())
+        .sort((a, b) => (a.timestamp < b.timestamp ? 1 : -1))
+        .slice(0, 50);
+      rawReportsRef.current = reports;
 
       // Transform backend reports to BattlefieldReport format
       const transformedReports: BattlefieldReport[] = reports.map(
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Soldier activity: the old recent_activity view vs the hourly activity buckets.
+
+Fills a throwaway database with --soldiers soldiers and --days of raw inputs
+and reports (timestamps in local time, as the backend writes them), then
+times the activity summary for every soldier and for one soldier:
+
+  old view     the original recent_activity definition (two LEFT JOINs over
+               the last 24 hours, grouped per soldier)
+  buckets      GET /soldiers/activity (1h / 24h / 7d windows from
+               soldier_activity_buckets)
+
+and checks both against an exact COUNT(*) of the last 24 hours. The old view
+multiplies a soldier's input and report counts together; the buckets count
+whole hours, so they may include up to an hour more than an exact 24-hour
+cut.
+
+Usage:
+    python tests/benchmark_activity.py [--soldiers 200] [--days 30] [--per-hour 4]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 10
+
+OLD_VIEW = """
+    SELECT s.soldier_id, COUNT(r.input_id) as recent_inputs, MAX(r.timestamp) as last_input,
+           COUNT(rp.report_id) as recent_reports, MAX(rp.timestamp) as last_report
+    FROM soldiers s
+    JOIN units u ON s.unit_id = u.unit_id
+    LEFT JOIN soldier_raw_inputs r ON s.soldier_id = r.soldier_id AND r.timestamp > ?
+    LEFT JOIN reports rp ON s.soldier_id = rp.soldier_id AND rp.timestamp > ?
+    WHERE {condition}
+    GROUP BY s.soldier_id
+"""
+
+
+def populate(pool, soldiers, days, per_hour, now):
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('CO', 'Company', 'Company')")
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', 'CO')",
+                         [(f"S{i:04d}", f"Soldier {i}") for i in range(soldiers)])
+    start = now - timedelta(days=days)
+    for day in range(days):
+        inputs, reports = [], []
+        for i in range(soldiers):
+            for _ in range(24 * per_hour):
+                timestamp = (start + timedelta(days=day, seconds=random.uniform(0, 86400))).isoformat()
+                inputs.append((str(uuid.uuid4()), f"S{i:04d}", timestamp, "radio check"))
+                if random.random() < 0.25:
+                    reports.append((str(uuid.uuid4()), f"S{i:04d}", "CO", timestamp, "SITREP", "{}", 0.8))
+        with pool.write() as conn:
+            conn.executemany("INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text) "
+                             "VALUES (?, ?, ?, ?)", inputs)
+            conn.executemany(
+                "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", reports,
+            )
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+
+
+def timed(fn):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark soldier activity summaries")
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-hour", type=int, default=4)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    day_ago = (now - timedelta(hours=24)).isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        populate(pool, args.soldiers, args.days, args.per_hour, now)
+        with pool.read() as conn:
+            inputs = conn.execute("SELECT COUNT(*) FROM soldier_raw_inputs").fetchone()[0]
+            reports = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        print(f"🪖 {args.soldiers} soldiers, {inputs} raw inputs and {reports} reports over {args.days} days\n")
+
+        print(f"   {'scope':<13} {'old view':>10} {'buckets':>10}")
+        for scope, condition, params in (("all soldiers", "1", ()), ("one soldier", "s.soldier_id = ?", ("S0007",))):
+            with pool.read() as conn:
+                old_ms, old_rows = timed(lambda: conn.execute(OLD_VIEW.format(condition=condition),
+                                                              (day_ago, day_ago, *params)).fetchall())
+            new_ms, new_rows = timed(lambda: backend.read_activity(condition, params))
+            print(f"   {scope:<13} {old_ms:>7.2f} ms {new_ms:>7.2f} ms")
+
+        with pool.read() as conn:
+            exact_inputs = conn.execute("SELECT COUNT(*) FROM soldier_raw_inputs WHERE soldier_id = 'S0007' "
+                                        "AND timestamp > ?", (day_ago,)).fetchone()[0]
+            exact_reports = conn.execute("SELECT COUNT(*) FROM reports WHERE soldier_id = 'S0007' "
+                                         "AND timestamp > ?", (day_ago,)).fetchone()[0]
+        old = old_rows[0]
+        new = new_rows[0]
+        print(f"\n   S0007, last 24 h   exact: {exact_inputs} inputs / {exact_reports} reports   "
+              f"old view: {old[1]} / {old[3]}   buckets: {new['inputs']['24h']} / {new['reports']['24h']}")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
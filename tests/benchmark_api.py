@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the backend API.
+
+Run it against a live backend before and after a change and compare the
+numbers. Each scenario hammers one endpoint from several client threads
+for a fixed duration and reports requests/sec and latency percentiles.
+
+Usage:
+    python tests/benchmark_api.py [--base-url URL] [--duration SECONDS] [--threads N]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+API_BASE = "http://localhost:8000"
+SOLDIER_ID = "ALPHA_01"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_load(name, make_request, duration, threads):
+    """Call make_request(session) from `threads` workers for `duration` seconds."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = make_request(session)
+                if response.status_code >= 400:
+                    local_errors += 1
+            except requests.exceptions.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    total = len(latencies)
+    print(f"📊 {name}")
+    print(f"   requests: {total}  errors: {errors[0]}  threads: {threads}")
+    print(f"   throughput: {total / elapsed:.1f} req/s")
+    if latencies:
+        print(f"   latency ms  p50={statistics.median(latencies) * 1000:.2f}  "
+              f"p95={percentile(latencies, 95) * 1000:.2f}  "
+              f"p99={percentile(latencies, 99) * 1000:.2f}")
+    return {"name": name, "requests": total, "errors": errors[0], "rps": total / elapsed,
+            "latencies": latencies}
+
+
+def bench_get_reports(base_url, duration, threads):
+    return run_load(
+        "GET /reports",
+        lambda s: s.get(f"{base_url}/reports", timeout=30),
+        duration, threads,
+    )
+
+
+def bench_post_report(base_url, duration, threads):
+    payload = {
+        "report_type": "SITREP",
+        "structured_json": {"status": "Holding position", "location": "Grid 123-456"},
+        "text_content": "Benchmark sitrep, holding position",
+        "confidence": 0.8,
+    }
+    return run_load(
+        f"POST /soldiers/{SOLDIER_ID}/reports",
+        lambda s: s.post(f"{base_url}/soldiers/{SOLDIER_ID}/reports", json=payload, timeout=30),
+        duration, threads,
+    )
+
+
+def bench_llm_isolation(base_url, duration, threads, llm_requests=6):
+    """
+    p99 of the cheap polling endpoints with and without slow LLM requests in flight.
+    The two runs should report roughly the same latencies.
+    """
+    def cheap_request(session):
+        session.get(f"{base_url}/api/suggestions", timeout=30)
+        return session.get(f"{base_url}/hierarchy", timeout=30)
+
+    print("⏱️  Baseline: no LLM requests in flight")
+    idle = run_load("GET /hierarchy + /api/suggestions", cheap_request, duration, threads)
+
+    chat_payload = {
+        "message": "Summarize the enemy activity and recommend next steps.",
+        "context": {
+            "node": {"name": "1st Platoon"},
+            "reports": [{"report_type": "CONTACT", "soldier_name": "Benchmark", "timestamp": "now",
+                         "structured_json": {"enemy_count": 5, "location": "Grid 123-456"}}],
+        },
+    }
+    stop = threading.Event()
+
+    def llm_worker():
+        session = requests.Session()
+        while not stop.is_set():
+            try:
+                session.post(f"{base_url}/ai/chat", json=chat_payload, timeout=120)
+            except requests.exceptions.RequestException:
+                pass
+
+    llm_threads = [threading.Thread(target=llm_worker, daemon=True) for _ in range(llm_requests)]
+    for t in llm_threads:
+        t.start()
+    time.sleep(1.0)  # let the LLM calls get in flight
+
+    print(f"⏱️  Under load: {llm_requests} concurrent /ai/chat requests in flight")
+    loaded = run_load("GET /hierarchy + /api/suggestions", cheap_request, duration, threads)
+    stop.set()
+
+    idle_p99 = percentile(idle["latencies"], 99) * 1000
+    loaded_p99 = percentile(loaded["latencies"], 99) * 1000
+    print(f"   p99 idle={idle_p99:.2f} ms  loaded={loaded_p99:.2f} ms")
+    return loaded
+
+
+def bench_delta_polling(base_url, duration, threads):
+    """
+    Steady-state dashboard polling: full list every time vs the `since` delta feed.
+    With no writes in flight the delta feed should return an empty list.
+    """
+    full_bytes = []
+    delta_bytes = []
+
+    def full_poll(session):
+        session.get(f"{base_url}/api/suggestions?status=pending", timeout=30)
+        response = session.get(f"{base_url}/reports?limit=50", timeout=30)
+        full_bytes.append(len(response.content))
+        return response
+
+    watermarks = {
+        "reports": requests.get(f"{base_url}/reports?limit=1", timeout=30).json()["watermark"],
+        "suggestions": requests.get(f"{base_url}/api/suggestions", timeout=30).json()["watermark"],
+    }
+
+    def delta_poll(session):
+        session.get(f"{base_url}/api/suggestions?since={watermarks['suggestions']}", timeout=30)
+        response = session.get(f"{base_url}/reports?limit=50&since={watermarks['reports']}", timeout=30)
+        delta_bytes.append(len(response.content))
+        return response
+
+    full = run_load("Full poll: /reports?limit=50 + /api/suggestions", full_poll, duration, threads)
+    delta = run_load("Delta poll: ?since=<watermark>", delta_poll, duration, threads)
+    if full_bytes and delta_bytes:
+        print(f"   /reports bytes per poll: full={statistics.mean(full_bytes):.0f}  "
+              f"delta={statistics.mean(delta_bytes):.0f}")
+    return delta
+
+
+def bench_batch_ingest(base_url, duration, threads, batch_size=500):
+    """
+    Ingestion rate in rows/sec: one POST per report vs POST /reports/batch.
+    Both paths run trigger analysis, so the comparison is insert cost only.
+    """
+    item = {
+        "soldier_id": SOLDIER_ID,
+        "report_type": "SITREP",
+        "structured_json": {"status": "Holding position", "location": "Grid 123-456"},
+        "text_content": "Benchmark sitrep, holding position",
+        "confidence": 0.8,
+    }
+    single = bench_post_report(base_url, duration, threads)
+    batch = run_load(
+        f"POST /reports/batch ({batch_size} reports per request)",
+        lambda s: s.post(f"{base_url}/reports/batch", json={"reports": [item] * batch_size}, timeout=60),
+        duration, threads,
+    )
+    print(f"   rows/sec: single={single['rps']:.0f}  batch={batch['rps'] * batch_size:.0f}")
+    return batch
+
+
+SCENARIOS = {
+    "reports": bench_get_reports,
+    "create_report": bench_post_report,
+    "llm_isolation": bench_llm_isolation,
+    "delta_polling": bench_delta_polling,
+    "batch_ingest": bench_batch_ingest,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Military Hierarchy API")
+    parser.add_argument("--base-url", default=API_BASE)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS),
+                        help=f"Scenarios to run (default: all). Choices: {', '.join(SCENARIOS)}")
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking {args.base_url} ({args.duration:.0f}s per scenario)\n")
+    try:
+        requests.get(f"{args.base_url}/", timeout=5)
+    except requests.exceptions.ConnectionError:
+        print("❌ Cannot connect to backend server")
+        print(f"Make sure the backend is running at {args.base_url}")
+        return
+
+    for name in args.scenarios:
+        SCENARIOS[name](args.base_url, args.duration, args.threads)
+        print()
+
+
+if __name__ == "__main__":
+    main()
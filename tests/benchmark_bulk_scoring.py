@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Re-scoring every report: per-row detect_report_triggers() vs bulk_scoring.
+
+Fills a throwaway database with --reports synthetic reports (casualty,
+contact, SITREP and intelligence reports whose description mixes keywords
+and free text, plus some string, null and malformed fields) and scores them
+all three ways:
+
+  per-row     what reanalysis does: read rows in rowid batches, json.loads
+              structured_json, detect_report_triggers() per report
+  bulk        bulk_scoring.score_reports(), NumPy arrays, one process
+  bulk xN     the same sharded across --workers processes
+
+and checks that every way produces the same suggestions. It then times
+bulk_scoring.save_scores() writing them in one transaction.
+
+Usage:
+    python tests/benchmark_bulk_scoring.py [--reports 1000000] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import bulk_scoring  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+UNITS = [f"U{i}" for i in range(20)]
+PHRASES = ["holding position at checkpoint", "moving to phase line", "2x WIA from IED blast, severe bleeding",
+           "enemy infantry patrol with armor", "civilians at the market, all quiet", "possible mine on route",
+           "soldier critically injured", "determine route to the minefield edge", "resupply received",
+           "hostile contact from the treeline", "unexploded ordnance near the bridge", "visibility poor"]
+BATCH = 5000
+
+
+def make_report(i):
+    report_type = random.choice(["CASUALTY", "CONTACT", "SITREP", "SITREP", "INTELLIGENCE", "MEDEVAC"])
+    fields = {"description": f"{random.choice(PHRASES)}, {random.choice(PHRASES)} grid {random.randint(0, 99999)}"}
+    roll = random.random()
+    if report_type == "CASUALTY" or roll < 0.1:
+        fields["casualties"] = random.choice([0, 1, 2, 3, 2.0, "2"])
+        fields["severity"] = random.choice(["Critical", "severe", "minor", None])
+    if report_type in ("CONTACT", "INTELLIGENCE") or roll < 0.2:
+        fields["enemy_count"] = random.choice([0, 3, 12, "8", " 15 ", "many", None])
+        fields["vehicle_count"] = random.choice([0, 1, 4])
+    structured_json = json.dumps(fields) if roll > 0.005 else "{not json"
+    return (str(uuid.uuid4()), "S1", random.choice(UNITS), "2024-01-01T00:00:00", report_type, structured_json, 0.9)
+
+
+def populate(pool, reports):
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, level) VALUES (?, ?, 'Platoon')",
+                         [(unit, unit) for unit in UNITS])
+        conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'S1', 'Private', 'U0')")
+    for offset in range(0, reports, BATCH):
+        with pool.write() as conn:
+            conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                             "structured_json, confidence) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [make_report(i) for i in range(offset, min(offset + BATCH, reports))])
+
+
+def per_row(pool):
+    scores = []
+    position = 0
+    while True:
+        with pool.read() as conn:
+            rows = conn.execute("SELECT rowid, report_id, soldier_id, unit_id, report_type, structured_json "
+                                "FROM reports WHERE rowid > ? ORDER BY rowid LIMIT ?", (position, BATCH)).fetchall()
+        if not rows:
+            return scores
+        for _, report_id, soldier_id, unit_id, report_type, structured_json in rows:
+            try:
+                structured_json = json.loads(structured_json)
+            except ValueError:
+                structured_json = {}
+            if not isinstance(structured_json, dict):
+                structured_json = {}
+            for trigger in backend.detect_report_triggers(report_id, soldier_id, unit_id, report_type,
+                                                          structured_json):
+                scores.append((report_id, unit_id, trigger["type"], trigger["urgency"], trigger["reason"],
+                               trigger["confidence"]))
+        position = rows[-1][0]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk trigger scoring against the per-row path")
+    parser.add_argument("--reports", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        print(f"🗂️  Generating {args.reports:,} reports...")
+        populate(pool, args.reports)
+        # The per-row path logs every report with an invalid count
+        backend.logger.disabled = True
+
+        expected, elapsed = timed(per_row, pool)
+        print(f"\n   {'path':<10} {'seconds':>8} {'reports/s':>11} {'suggestions':>12}")
+        print(f"   {'per-row':<10} {elapsed:>8.2f} {args.reports / elapsed:>11,.0f} {len(expected):>12,}")
+        expected = sorted(expected)
+        for name, workers in (("bulk", 1), (f"bulk x{args.workers}", args.workers)):
+            (reports, scores), elapsed = timed(bulk_scoring.score_reports, backend.DB_PATH, workers)
+            same = "same" if sorted(scores) == expected else "DIFFERENT"
+            print(f"   {name:<10} {elapsed:>8.2f} {reports / elapsed:>11,.0f} {len(scores):>12,}  {same}")
+
+        with pool.write() as conn:
+            created, elapsed = timed(bulk_scoring.save_scores, conn, scores)
+        print(f"\n💾 save_scores: {created:,} suggestions in one transaction, {elapsed:.2f} s")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Per-message overhead of comm_log recording.
+
+Delivers heartbeat messages through backend.on_message against a throwaway
+database and measures:
+
+  record_comm     the cost of one ring-buffer record on its own
+  on_message      a full heartbeat callback with and without comm_log recording
+  lagging flusher the same callback while another writer holds the database
+                  write lock, so the buffer fills and starts sampling; the
+                  callback must stay just as cheap
+
+Usage:
+    python tests/benchmark_comm_log.py [--messages 200000] [--stall-s 2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+
+class Message:
+    def __init__(self, i):
+        self.topic = "soldiers/heartbeat"
+        self.payload = json.dumps({"soldier_id": f"S{i % 100:03d}", "device_id": f"D{i % 100:03d}",
+                                   "timestamp": "2024-01-15T14:45:00", "battery_level": 80}).encode()
+
+
+def per_message_us(fn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark comm_log recording overhead")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--stall-s", type=float, default=2.0)
+    args = parser.parse_args()
+
+    messages = [Message(i) for i in range(1000)]
+    payload = json.loads(messages[0].payload)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        get_pool(backend.DB_PATH)
+        buffer = backend.comm_log_buffer
+        buffer.start()
+        print(f"📡 {args.messages} heartbeat messages, ring buffer capacity {buffer.capacity}\n")
+
+        record_us = per_message_us(lambda i: backend.record_comm("soldiers/heartbeat", 120, payload), args.messages)
+
+        recorder = backend.record_comm
+        backend.record_comm = lambda *a, **k: None
+        bare_us = per_message_us(lambda i: backend.on_message(None, None, messages[i % 1000]), args.messages)
+        backend.record_comm = recorder
+        logged_us = per_message_us(lambda i: backend.on_message(None, None, messages[i % 1000]), args.messages)
+
+        print(f"   record_comm alone                 {record_us:>6.2f} µs/msg")
+        print(f"   on_message without comm_log       {bare_us:>6.2f} µs/msg")
+        print(f"   on_message with comm_log          {logged_us:>6.2f} µs/msg  "
+              f"(+{logged_us - bare_us:.2f} µs)")
+
+        # Hold the write lock so the flusher cannot drain the buffer
+        buffer.flush_now()
+        before = buffer.stats()
+        release = threading.Event()
+
+        def stall():
+            with backend.db_write():
+                release.wait(args.stall_s)
+
+        staller = threading.Thread(target=stall)
+        staller.start()
+        lagging_us = per_message_us(lambda i: backend.on_message(None, None, messages[i % 1000]), args.messages)
+        release.set()
+        staller.join()
+        buffer.stop()
+        after = buffer.stats()
+        print(f"   on_message, flusher stalled       {lagging_us:>6.2f} µs/msg  "
+              f"(kept {after['recorded'] - before['recorded']}, "
+              f"sampled out {after['sampled_out'] - before['sampled_out']}, "
+              f"dropped {after['dropped'] - before['dropped']})")
+
+        with backend.db_read() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM comm_log").fetchone()[0]
+        assert rows == after["flushed"]
+        print(f"\n   comm_log rows written: {rows}  flushes: {after['flushes']}  "
+              f"max flush: {after['max_flush_ms']:.1f} ms")
+        backend.heartbeat_buffer.stop()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Sustained report rates through the cross-report trigger correlator.
+
+Streams triggers from the squads of a battalion (--companies companies of 4
+platoons of 4 squads) at --rates reports per second of simulated time for
+--minutes minutes, and for each rate prints how fast Correlator.observe()
+keeps up, how many correlated suggestions it emitted and how much state it
+holds at the end. Peak memory (tracemalloc) is measured in a second run of
+--memory-minutes, which is past the point where state stops growing.
+
+For comparison, the "query" row correlates the first --query-reports
+reports of the fastest rate the way it would be done without in-memory
+state: insert each trigger into an indexed SQLite table and query the
+parent unit's last window of triggers for every report.
+
+Usage:
+    python tests/benchmark_correlation.py [--rates 10 100 1000] [--minutes 60]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import correlation  # noqa: E402
+from correlation import Correlator  # noqa: E402
+
+TRIGGERS = [
+    {"type": "EOINCREP", "urgency": "MEDIUM", "confidence": 0.85},
+    {"type": "EOINCREP", "urgency": "HIGH", "confidence": 0.9},
+    {"type": "CASEVAC", "urgency": "HIGH", "confidence": 0.9},
+    {"type": "EOINCREP_EOD", "urgency": "HIGH", "confidence": 0.85},
+]
+
+
+def hierarchy(companies):
+    parents = {"BN": None}
+    for c in range(companies):
+        parents[f"CO{c}"] = "BN"
+        for p in range(4):
+            parents[f"CO{c}-PLT{p}"] = f"CO{c}"
+            for s in range(4):
+                parents[f"CO{c}-PLT{p}-SQ{s}"] = f"CO{c}-PLT{p}"
+    return parents
+
+
+def stream(squads, rate, minutes, seed=1):
+    rng = random.Random(seed)
+    at = 1_000_000.0
+    for i in range(int(rate * minutes * 60)):
+        at += rng.expovariate(rate)
+        yield f"R{i}", rng.choice(squads), rng.choice(TRIGGERS), at
+
+
+def run_correlator(parents, squads, rate, minutes):
+    correlator = Correlator(parents.get)
+    emitted = 0
+    started = time.perf_counter()
+    for report_id, unit_id, trigger, at in stream(squads, rate, minutes):
+        emitted += len(correlator.observe(report_id, unit_id, trigger, at, at))
+    return time.perf_counter() - started, emitted, correlator.stats()
+
+
+def peak_memory(parents, squads, rate, minutes):
+    correlator = Correlator(parents.get)
+    tracemalloc.start()
+    for report_id, unit_id, trigger, at in stream(squads, rate, minutes):
+        correlator.observe(report_id, unit_id, trigger, at, at)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run_query(parents, squads, rate, reports):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE triggers (report_id TEXT, unit_id TEXT, parent_id TEXT, type TEXT, at REAL)")
+    conn.execute("CREATE INDEX idx_triggers_parent ON triggers (parent_id, type, at)")
+    window = correlation.WINDOW_SECONDS
+    started = time.perf_counter()
+    for count, (report_id, unit_id, trigger, at) in enumerate(stream(squads, rate, 24 * 60), 1):
+        parent = parents[unit_id]
+        conn.execute("INSERT INTO triggers VALUES (?, ?, ?, ?, ?)", (report_id, unit_id, parent, trigger["type"], at))
+        conn.execute("SELECT COUNT(*), COUNT(DISTINCT unit_id), group_concat(report_id) FROM triggers "
+                     "WHERE parent_id = ? AND type = ? AND at > ?", (parent, trigger["type"], at - window)).fetchone()
+        if count == reports:
+            break
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sustained report rates through the trigger correlator")
+    parser.add_argument("--rates", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--memory-minutes", type=int, default=20)
+    parser.add_argument("--companies", type=int, default=4)
+    parser.add_argument("--query-reports", type=int, default=50000)
+    args = parser.parse_args()
+
+    parents = hierarchy(args.companies)
+    squads = [unit for unit in parents if "-SQ" in unit]
+    print(f"🔗 {len(squads)} squads, {args.minutes} simulated minutes per rate, "
+          f"{correlation.WINDOW_SECONDS // 60} min window in {correlation.BUCKET_SECONDS} s buckets\n")
+    print(f"   {'reports/s':>9} {'reports':>9} {'observe/s':>10} {'emitted':>9} {'windows':>8} {'buckets':>8} "
+          f"{'peak MB':>8}")
+    for rate in args.rates:
+        elapsed, emitted, stats = run_correlator(parents, squads, rate, args.minutes)
+        peak = peak_memory(parents, squads, rate, min(args.minutes, args.memory_minutes))
+        reports = stats["observed"]
+        print(f"   {rate:>9} {reports:>9,} {reports / elapsed:>10,.0f} {emitted:>9,} {stats['windows']:>8} "
+              f"{stats['buckets']:>8} {peak / 1e6:>8.1f}")
+
+    rate = max(args.rates)
+    elapsed = run_query(parents, squads, rate, args.query_reports)
+    print(f"\n   query     {args.query_reports:>9,} {args.query_reports / elapsed:>10,.0f}   "
+          f"(insert + window query per report, {rate} reports/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Idle-cost benchmark for the /events server-sent event stream.
+
+Starts the backend on a throwaway copy of the database, opens N idle
+/events subscribers and samples the server's CPU time from /proc while
+nothing happens. Then creates one report and measures how long it takes
+to reach every subscriber. Idle CPU should stay close to zero no matter
+how many dashboards are connected.
+
+Linux only (reads /proc/<pid>/stat).
+
+Usage:
+    python tests/benchmark_events.py [--subscribers 500] [--idle 10] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+DATABASE = os.path.join(ROOT, "database", "military_hierarchy.db")
+
+SERVER_CODE = """
+import sys, logging, uvicorn
+import backend
+backend.DB_PATH = sys.argv[1]
+logging.disable(logging.WARNING)
+uvicorn.run(backend.app, host="127.0.0.1", port=int(sys.argv[2]), log_level="error")
+"""
+
+
+def cpu_seconds(pid):
+    """User + system CPU time consumed so far by a process."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(db_path, port):
+    server = subprocess.Popen([sys.executable, "-c", SERVER_CODE, db_path, str(port)], cwd=BACKEND_DIR)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/", timeout=1)
+            return server, base_url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Backend did not start")
+
+
+async def subscribe(port):
+    """Open one /events connection and wait for the stream to start."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+    await writer.drain()
+    await reader.readuntil(b"retry:")
+    return reader, writer
+
+
+async def wait_for_event(reader, event_type):
+    await reader.readuntil(f"event: {event_type}".encode())
+    return time.perf_counter()
+
+
+async def run(base_url, port, pid, subscribers, idle_seconds):
+    print(f"🔌 Opening {subscribers} /events subscribers")
+    connections = await asyncio.gather(*(subscribe(port) for _ in range(subscribers)))
+    status = requests.get(f"{base_url}/", timeout=5).json()
+    print(f"   server reports {status.get('event_subscribers')} subscribers")
+
+    await asyncio.sleep(1.0)
+    print(f"💤 Idle for {idle_seconds:.0f}s")
+    cpu_before = cpu_seconds(pid)
+    await asyncio.sleep(idle_seconds)
+    cpu_used = cpu_seconds(pid) - cpu_before
+    print(f"   server CPU while idle: {cpu_used * 1000:.0f} ms ({cpu_used / idle_seconds * 100:.2f}% of one core)")
+
+    print("📣 Creating one report")
+    waiters = [asyncio.create_task(wait_for_event(reader, "report-created")) for reader, _ in connections]
+    sent = time.perf_counter()
+    await asyncio.to_thread(
+        requests.post, f"{base_url}/soldiers/ALPHA_01/reports",
+        json={"report_type": "SITREP", "structured_json": {"status": "Holding"}}, timeout=30,
+    )
+    received = sorted(t - sent for t in await asyncio.gather(*waiters))
+    print(f"   delivered to {len(received)} subscribers  "
+          f"p50={received[len(received) // 2] * 1000:.1f} ms  max={received[-1] * 1000:.1f} ms")
+
+    for _, writer in connections:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark idle /events subscribers")
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--idle", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        shutil.copy(DATABASE, db_path)
+        server, base_url = start_server(db_path, args.port)
+        try:
+            asyncio.run(run(base_url, args.port, server.pid, args.subscribers, args.idle))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
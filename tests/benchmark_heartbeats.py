@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Heartbeat ingest benchmark for 10k devices.
+
+Registers --devices soldiers with their own devices in a throwaway database,
+then delivers --rounds heartbeats per device through backend.on_message (one
+round is what the fleet sends every 30 seconds). Compares:
+
+  per-message   upsert device_status and soldiers.last_seen in its own
+                transaction for every heartbeat, on the MQTT thread
+  coalesced     handle_soldier_heartbeat records the latest state in memory;
+                heartbeat_buffer writes one bulk upsert per flush interval
+
+It reports messages/sec on the MQTT thread, the number of write transactions
+and the cost of one interval flush covering every device.
+
+Usage:
+    python tests/benchmark_heartbeats.py [--devices 10000] [--rounds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+
+class Message:
+    def __init__(self, payload):
+        self.topic = "soldiers/heartbeat"
+        self.payload = json.dumps(payload).encode()
+
+
+def per_message_upsert(payload):
+    """The straightforward alternative: write every heartbeat as it arrives."""
+    with backend.db_write() as conn:
+        conn.execute("""
+            INSERT INTO device_status (device_id, soldier_id, last_heartbeat, battery_level, signal_strength)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(device_id) DO UPDATE SET
+                last_heartbeat = excluded.last_heartbeat,
+                battery_level = excluded.battery_level,
+                signal_strength = excluded.signal_strength,
+                updated_at = CURRENT_TIMESTAMP
+        """, (payload["device_id"], payload["soldier_id"], payload["timestamp"],
+              payload["battery_level"], payload["signal_strength"]))
+        conn.execute("UPDATE soldiers SET last_seen = ? WHERE soldier_id = ?",
+                     (payload["timestamp"], payload["soldier_id"]))
+
+
+def make_messages(devices, rounds):
+    start = datetime.now()
+    messages = []
+    for r in range(rounds):
+        for i in range(devices):
+            messages.append(Message({
+                "soldier_id": f"S{i:05d}",
+                "device_id": f"D{i:05d}",
+                "timestamp": (start + timedelta(seconds=30 * r, milliseconds=i)).isoformat(),
+                "status": "active",
+                "battery_level": random.randint(5, 100),
+                "signal_strength": random.randint(0, 100),
+                "location": {"lat": 34.0 + random.random(), "lon": -117.0 + random.random(), "accuracy": 5.0},
+            }))
+    return messages
+
+
+def deliver(messages):
+    """Feed messages through on_message; returns messages/sec."""
+    started = time.perf_counter()
+    for message in messages:
+        backend.on_message(None, None, message)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark heartbeat ingestion")
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        with get_pool(backend.DB_PATH).write() as conn:
+            conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('BDE', 'Brigade', 'Brigade')")
+            conn.executemany(
+                "INSERT INTO soldiers (soldier_id, name, rank, unit_id, device_id) VALUES (?, ?, 'Private', 'BDE', ?)",
+                [(f"S{i:05d}", f"Soldier {i}", f"D{i:05d}") for i in range(args.devices)],
+            )
+        messages = make_messages(args.devices, args.rounds)
+        print(f"💓 {args.devices} devices x {args.rounds} heartbeats = {len(messages)} messages\n")
+
+        coalesced_handler = backend.handle_soldier_heartbeat
+        backend.handle_soldier_heartbeat = per_message_upsert
+        rate = deliver(messages)
+        backend.handle_soldier_heartbeat = coalesced_handler
+        print("📊 per-message upsert")
+        print(f"   MQTT thread: {rate:>9.0f} msg/s   write transactions: {len(messages)}")
+
+        buffer = backend.heartbeat_buffer
+        rate = 0.0
+        for r in range(args.rounds):
+            # One round per flush interval, as with 30 s heartbeats and a 5 s interval
+            rate += deliver(messages[r * args.devices:(r + 1) * args.devices]) / args.rounds
+            buffer.flush_now()
+        stats = buffer.stats()
+        print("📊 coalesced")
+        print(f"   MQTT thread: {rate:>9.0f} msg/s   write transactions: {stats['flushes']}")
+        print(f"   flush of {args.devices} devices: last {stats['last_flush_ms']:.1f} ms, max {stats['max_flush_ms']:.1f} ms")
+
+        with backend.db_read() as conn:
+            rows, newest = conn.execute("SELECT COUNT(*), MAX(last_heartbeat) FROM device_status").fetchone()
+        assert rows == args.devices and newest == json.loads(messages[-1].payload)["timestamp"]
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the hierarchy read endpoints.
+
+Builds a throwaway brigade-sized database (brigade -> battalions ->
+companies -> platoons -> squads, soldiers in every squad) and compares
+answering GET /hierarchy by querying and serializing on every request (the
+old code path) with serving it from the in-memory hierarchy cache.
+
+Usage:
+    python tests/benchmark_hierarchy.py [--battalions 4] [--soldiers-per-squad 9]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 200
+
+
+def populate(db_path, battalions, soldiers_per_squad):
+    """Brigade with 4 companies per battalion, 3 platoons per company, 3 squads per platoon."""
+    units = [("BDE", "1st Brigade", None, "Brigade")]
+    soldiers = []
+    for b in range(battalions):
+        bn = f"BN{b}"
+        units.append((bn, f"Battalion {b}", "BDE", "Battalion"))
+        for c in range(4):
+            co = f"{bn}_CO{c}"
+            units.append((co, f"Company {b}-{c}", bn, "Company"))
+            for p in range(3):
+                plt = f"{co}_PLT{p}"
+                units.append((plt, f"Platoon {b}-{c}-{p}", co, "Platoon"))
+                for q in range(3):
+                    sqd = f"{plt}_SQD{q}"
+                    units.append((sqd, f"Squad {b}-{c}-{p}-{q}", plt, "Squad"))
+                    for i in range(soldiers_per_squad):
+                        soldiers.append((f"{sqd}_S{i}", f"Soldier {sqd}-{i}", "Private", sqd, f"DEV_{sqd}_{i}"))
+    with get_pool(db_path).write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)", units)
+        conn.executemany(
+            "INSERT INTO soldiers (soldier_id, name, rank, unit_id, device_id, status) VALUES (?, ?, ?, ?, ?, 'active')",
+            soldiers,
+        )
+    return len(units), len(soldiers)
+
+
+def uncached_hierarchy():
+    """GET /hierarchy as it was before the cache: two scans, dict building, JSON encoding."""
+    with backend.db_read() as conn:
+        units = conn.execute("""
+            SELECT u.unit_id, u.name, u.parent_unit_id, u.level, u.created_at
+            FROM units u ORDER BY u.level, u.name
+        """).fetchall()
+        soldiers = conn.execute("""
+            SELECT s.soldier_id, s.name, s.rank, s.unit_id, s.device_id, s.status, s.created_at, s.last_seen
+            FROM soldiers s ORDER BY s.unit_id, s.name
+        """).fetchall()
+    columns = ["soldier_id", "name", "rank", "unit_id", "device_id", "status", "created_at", "last_seen"]
+    soldiers_by_unit = {}
+    for soldier in soldiers:
+        soldiers_by_unit.setdefault(soldier[3], []).append(dict(zip(columns, soldier)))
+    hierarchy = [
+        {"unit_id": u[0], "name": u[1], "parent_unit_id": u[2], "level": u[3], "created_at": u[4],
+         "soldiers": soldiers_by_unit.get(u[0], [])}
+        for u in units
+    ]
+    return json.dumps({"hierarchy": hierarchy}).encode()
+
+
+def timed(fn, repeats=REPEATS):
+    """Median wall time of fn() in microseconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hierarchy endpoints")
+    parser.add_argument("--battalions", type=int, default=4)
+    parser.add_argument("--soldiers-per-squad", type=int, default=9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        unit_count, soldier_count = populate(backend.DB_PATH, args.battalions, args.soldiers_per_squad)
+        body = backend.get_hierarchy().body
+        print(f"🏗️  Brigade: {unit_count} units, {soldier_count} soldiers, /hierarchy body {len(body) / 1024:.0f} KB\n")
+
+        def rebuild():
+            backend.hierarchy_cache.invalidate()
+            backend.hierarchy_cache.get()
+
+        results = [
+            ("GET /hierarchy, query + serialize per request", timed(uncached_hierarchy, 50)),
+            ("Cache rebuild after a mutation", timed(rebuild, 50)),
+            ("GET /hierarchy from cache", timed(backend.get_hierarchy)),
+            ("GET /units from cache", timed(backend.get_units)),
+            ("GET /units/{id}/soldiers from cache", timed(lambda: backend.get_soldiers_by_unit("BN0_CO0_PLT0_SQD0"))),
+            ("Soldier -> unit lookup (create_report)",
+             timed(lambda: backend.hierarchy_cache.get().soldier_unit("BN0_CO0_PLT0_SQD0_S0"))),
+        ]
+        for name, micros in results:
+            print(f"   {name:<48} {micros:>10.1f} µs")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Sustained-ingest benchmark for MQTT soldier inputs.
+
+Feeds soldiers/inputs messages to backend.on_message from one thread, the way
+paho's network thread delivers them, against a throwaway database. Compares:
+
+  per-message   the old handler: one INSERT + commit inside the callback
+  write-behind  handle_soldier_input queues the row; the writer thread commits
+                in batches (soldier_input_queue)
+
+For each it reports sustained messages/sec (until every row is committed) and
+how long the callback held the network thread (p50/p99/max). Meanwhile an
+API-like writer holds the write lock for --stall-ms every 100 ms, as a burst of
+report inserts would; the per-message handler waits behind it, the queue does not.
+An unthrottled feed outruns any writer, so the queue eventually fills and put()
+blocks for back-pressure; that is where the write-behind max comes from.
+
+Usage:
+    python tests/benchmark_mqtt_ingest.py [--messages 20000] [--stall-ms 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+SOLDIERS = [f"S{i:03d}" for i in range(40)]
+
+
+class Message:
+    def __init__(self, payload):
+        self.topic = "soldiers/inputs"
+        self.payload = json.dumps(payload).encode()
+
+
+def per_message_insert(payload):
+    """handle_soldier_input as it was: one transaction per message, on the paho thread."""
+    with backend.db_write() as conn:
+        conn.execute("""
+            INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text, raw_audio_ref)
+            VALUES (?, ?, ?, ?, ?)
+        """, (str(uuid.uuid4()), payload["soldier_id"], payload.get("timestamp", datetime.now().isoformat()),
+              payload["raw_text"], payload.get("audio_file_ref")))
+
+
+def row_count():
+    with backend.db_read() as conn:
+        return conn.execute("SELECT COUNT(*) FROM soldier_raw_inputs").fetchone()[0]
+
+
+def run(name, messages, stall_ms, wait_for_writer):
+    stop = threading.Event()
+
+    def api_writer():
+        while not stop.is_set():
+            with backend.db_write():
+                time.sleep(stall_ms / 1000)
+            time.sleep(0.1)
+
+    stall = threading.Thread(target=api_writer, daemon=True)
+    stall.start()
+    before = row_count()
+    callback_times = []
+    started = time.perf_counter()
+    for message in messages:
+        t0 = time.perf_counter()
+        backend.on_message(None, None, message)
+        callback_times.append(time.perf_counter() - t0)
+    wait_for_writer()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall.join()
+    written = row_count() - before
+    assert written == len(messages), f"{written} of {len(messages)} rows written"
+
+    ordered = sorted(callback_times)
+    print(f"📊 {name}")
+    print(f"   sustained: {len(messages) / elapsed:>9.0f} msg/s  ({elapsed:.2f} s for {len(messages)})")
+    print(f"   callback µs  p50={statistics.median(ordered) * 1e6:.0f}  "
+          f"p99={ordered[int(len(ordered) * 0.99)] * 1e6:.0f}  max={ordered[-1] * 1e6:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MQTT soldier input ingestion")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--stall-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    messages = [Message({"soldier_id": SOLDIERS[i % len(SOLDIERS)], "raw_text": f"Benchmark input {i}",
+                         "timestamp": datetime.now().isoformat()})
+                for i in range(args.messages)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        with get_pool(backend.DB_PATH).write() as conn:
+            conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('PLT', 'Platoon', 'Platoon')")
+            conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', 'PLT')",
+                             [(s, s) for s in SOLDIERS])
+        print(f"🚀 {args.messages} messages, API writer holding the write lock {args.stall_ms:.0f} ms every 100 ms\n")
+
+        queued_handler = backend.handle_soldier_input
+        backend.handle_soldier_input = per_message_insert
+        run("per-message commit", messages, args.stall_ms, lambda: None)
+        backend.handle_soldier_input = queued_handler
+
+        print()
+        queue = backend.soldier_input_queue
+        queue.start()
+        run("write-behind queue", messages, args.stall_ms, queue.stop)
+        stats = queue.stats()
+        print(f"   batches: {stats['batches']}  avg size: {stats['avg_batch_size']}  "
+              f"max depth: {stats['max_depth']}  flush ms avg={stats['avg_flush_ms']} max={stats['max_flush_ms']}")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
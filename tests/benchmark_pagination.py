@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Page-fetch latency benchmark for keyset pagination on /reports.
+
+Builds throwaway databases with 10k, 100k and 1M reports and times the
+first page, a page 90% of the way down, and the same deep page fetched
+the old way (LIMIT/OFFSET). With keyset cursors the first and deep page
+should cost the same at every size.
+
+Usage:
+    python tests/benchmark_pagination.py [--sizes 10000 100000 1000000] [--page-size 100]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 20
+
+
+def populate(db_path, total_reports):
+    """Create a small hierarchy and `total_reports` reports spread over 30 days."""
+    pool = get_pool(db_path)
+    start = datetime.now() - timedelta(days=30)
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES ('BAT_1', 'Battalion', NULL, 'Battalion')")
+        soldiers = [f"S{i:03d}" for i in range(50)]
+        conn.executemany(
+            "INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', 'BAT_1')",
+            [(s, f"Soldier {s}") for s in soldiers],
+        )
+        batch = []
+        for i in range(total_reports):
+            ts = (start + timedelta(seconds=i * 2.5)).isoformat()
+            batch.append((str(uuid.uuid4()), random.choice(soldiers), "BAT_1", ts, "SITREP",
+                          '{"status": "Holding", "location": "Grid 123-456"}', 0.8))
+            if len(batch) == 50000:
+                conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        conn.execute("ANALYZE")
+
+
+def timed(fn):
+    """Median wall time of fn() in milliseconds."""
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def run(size, page_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        print(f"📦 Building database with {size:,} reports...")
+        populate(db_path, size)
+        backend.DB_PATH = db_path
+
+        depth = int(size * 0.9)
+        with get_pool(db_path).read() as conn:
+            ts, report_id = conn.execute(
+                "SELECT timestamp, report_id FROM reports ORDER BY timestamp DESC, report_id DESC LIMIT 1 OFFSET ?",
+                (depth,),
+            ).fetchone()
+        deep_cursor = backend.encode_cursor(ts, report_id)
+
+        def offset_page():
+            with get_pool(db_path).read() as conn:
+                conn.execute(backend.REPORT_LIST_QUERY + " ORDER BY r.timestamp DESC, r.report_id DESC LIMIT ? OFFSET ?",
+                             (page_size, depth)).fetchall()
+
+        first = timed(lambda: backend.get_all_reports(limit=page_size, cursor=None))
+        deep = timed(lambda: backend.get_all_reports(limit=page_size, cursor=deep_cursor))
+        offset = timed(offset_page)
+        close_pool()
+
+    print(f"📊 {size:,} reports, page size {page_size}")
+    print(f"   keyset first page:       {first:8.2f} ms")
+    print(f"   keyset page at {depth:>9,}: {deep:8.2f} ms")
+    print(f"   OFFSET page at {depth:>9,}: {offset:8.2f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyset pagination on /reports")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Report POST latency with trigger analysis inline vs on the analysis queue.
+
+Posts --reports reports (a mix that triggers CASEVAC / EOINCREP suggestions
+and plain SITREPs) from --clients threads through create_report(), first
+with analysis run inside the request as before, then with the background
+report_analysis_queue:
+
+  inline    save_report_analysis() in a second transaction in the request
+  queued    one transaction, analysis on REPORT_ANALYSIS_WORKERS threads
+
+and prints POST latency percentiles and, for the queued run, how long
+reports waited from the POST to their suggestions being saved
+(report_analysis.queued_at -> analyzed_at).
+
+Usage:
+    python tests/benchmark_report_analysis.py [--reports 2000] [--clients 8]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+SOLDIERS = [f"S{i}" for i in range(20)]
+REPORTS = [
+    ("CASUALTY", {"casualties": 2, "description": "2x WIA from IED blast, severe bleeding"}, "need CASEVAC"),
+    ("CONTACT", {"enemy_count": 12, "vehicle_count": 3, "description": "Enemy infantry patrol with armor"}, ""),
+    ("SITREP", {"description": "Holding position at checkpoint, all quiet"}, "routine"),
+    ("SITREP", {"description": "Resupply received, moving to phase line"}, ""),
+]
+
+
+def populate(pool):
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Platoon')")
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', 'U1')",
+                         [(soldier, soldier) for soldier in SOLDIERS])
+    backend.hierarchy_cache.invalidate()
+
+
+def post(i):
+    report_type, structured_json, text = REPORTS[i % len(REPORTS)]
+    started = time.perf_counter()
+    backend.create_report(random.choice(SOLDIERS), {
+        "report_type": report_type, "structured_json": dict(structured_json), "text_content": text,
+        "confidence": 0.9,
+    })
+    return (time.perf_counter() - started) * 1000
+
+
+def inline_analysis(reports):
+    with backend.db_write() as conn:
+        results = backend.save_report_analysis(conn, reports)
+    backend.publish_report_analysis(results)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return f"{statistics.median(samples):>7.2f} {pick(0.95):>7.2f} {pick(0.99):>7.2f} {samples[-1]:>8.2f}"
+
+
+def run(reports, clients, inline):
+    queue_report_analysis = backend.queue_report_analysis
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        populate(pool)
+        if inline:
+            # What create_report did before the queue
+            backend.queue_report_analysis = inline_analysis
+        else:
+            backend.report_analysis_queue.start()
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(clients) as executor:
+                latencies = list(executor.map(post, range(reports)))
+            elapsed = time.perf_counter() - started
+            delays = []
+            if not inline:
+                backend.report_analysis_queue.stop()
+                with pool.read() as conn:
+                    rows = conn.execute("SELECT queued_at, analyzed_at FROM report_analysis "
+                                        "WHERE status = 'done'").fetchall()
+                delays = [(datetime.fromisoformat(done) - datetime.fromisoformat(queued)).total_seconds() * 1000
+                          for queued, done in rows]
+            with pool.read() as conn:
+                suggestions = conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+        finally:
+            backend.queue_report_analysis = queue_report_analysis
+            close_pool()
+    return latencies, reports / elapsed, delays, suggestions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report POST latency with queued trigger analysis")
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"📨 {args.reports} report POSTs from {args.clients} threads, "
+          f"{backend.REPORT_ANALYSIS_WORKERS} analysis workers\n")
+    print(f"   {'analysis':<8} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>8} (ms) {'reports/s':>10} {'suggestions':>12}")
+    for name, inline in (("inline", True), ("queued", False)):
+        latencies, rate, delays, suggestions = run(args.reports, args.clients, inline)
+        print(f"   {name:<8} {percentiles(latencies)}      {rate:>10,.0f} {suggestions:>12}")
+        if delays:
+            print(f"   {'delay':<8} {percentiles(delays)}      POST -> suggestions saved")
+
+
+if __name__ == "__main__":
+    main()
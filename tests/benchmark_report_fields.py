@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Filtering reports on structured_json fields: Python parsing vs generated columns.
+
+Fills a throwaway database with --reports synthetic reports (a few percent
+carry casualties or an enemy count) and times "reports with casualties in
+unit X in the last hour" and "enemy sightings of 10+ across the battalion
+today" three ways:
+
+  python     fetch the candidate rows and json.loads each one to filter
+  json sql   the same filter with json_extract() in SQL, no index
+  column     the generated columns and their partial indexes (what
+             GET /reports?min_casualties=... runs)
+
+It also reports the insert rate with and without the generated-column
+indexes, since each insert now has to evaluate their WHERE clauses.
+
+Usage:
+    python tests/benchmark_report_fields.py [--reports 500000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 10
+UNITS = [f"U{i}" for i in range(40)]
+FIELD_INDEXES = ["idx_reports_casualties", "idx_reports_enemy_count", "idx_reports_severity", "idx_reports_location"]
+
+
+def make_report(i, unit, timestamp):
+    roll = random.random()
+    if roll < 0.03:
+        report_type = "CASUALTY"
+        data = {"casualties": random.randint(1, 4), "severity": random.choice(["Critical", "serious", "minor"]),
+                "location": f"Grid {random.randint(100, 999)}-{random.randint(100, 999)}"}
+    elif roll < 0.08:
+        report_type = "CONTACT"
+        data = {"enemy_count": random.randint(1, 30), "vehicle_count": random.randint(0, 4),
+                "location": f"Grid {random.randint(100, 999)}-{random.randint(100, 999)}"}
+    else:
+        report_type = "SITREP"
+        data = {"status": "Holding position", "description": "No change. " * random.randint(1, 10)}
+    return (str(uuid.uuid4()), f"S_{unit}", unit, timestamp, report_type, json.dumps(data), 0.8)
+
+
+def populate(pool, total, now, indexed):
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, level) VALUES (?, ?, 'Squad')", [(u, u) for u in UNITS])
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+                         [(f"S_{u}", f"Soldier {u}", u) for u in UNITS])
+        if not indexed:
+            for index in FIELD_INDEXES:
+                conn.execute(f"DROP INDEX {index}")
+    start = now - timedelta(days=7)
+    step = timedelta(days=7) / total
+    started = time.perf_counter()
+    for offset in range(0, total, 50000):
+        rows = [make_report(i, random.choice(UNITS), (start + step * i).isoformat())
+                for i in range(offset, min(total, offset + 50000))]
+        with pool.write() as conn:
+            conn.executemany(
+                "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+    rate = total / (time.perf_counter() - started)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+    return rate
+
+
+def timed(fn):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def python_filter(conn, sql, params, predicate):
+    return [row for row, data in ((row, json.loads(row[2])) for row in conn.execute(sql, params)) if predicate(data)]
+
+
+def count(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generated-column report filters")
+    parser.add_argument("--reports", type=int, default=500000)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    hour_ago = (now - timedelta(hours=1)).isoformat()
+    day_ago = (now - timedelta(days=1)).isoformat()
+    print(f"🧾 {args.reports} reports across {len(UNITS)} units over 7 days\n")
+
+    rates = {}
+    for indexed in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend.DB_PATH = os.path.join(tmp, "bench.db")
+            pool = get_pool(backend.DB_PATH)
+            rates[indexed] = populate(pool, args.reports, now, indexed)
+            if not indexed:
+                close_pool()
+                continue
+
+            cases = [
+                ("casualties, 1 unit, 1 h",
+                 "SELECT report_id, timestamp, structured_json FROM reports WHERE unit_id = ? AND timestamp >= ?",
+                 ("U7", hour_ago),
+                 lambda data: count(data.get("casualties", data.get("casualty_count"))) > 0,
+                 "AND COALESCE(json_extract(structured_json, '$.casualties'), "
+                 "json_extract(structured_json, '$.casualty_count')) > 0",
+                 "AND casualties > 0"),
+                ("enemy 10+, all units, 24 h",
+                 "SELECT report_id, timestamp, structured_json FROM reports WHERE timestamp >= ?",
+                 (day_ago,),
+                 lambda data: count(data.get("enemy_count")) >= 10,
+                 "AND json_extract(structured_json, '$.enemy_count') >= 10",
+                 "AND enemy_count > 0 AND enemy_count >= 10"),
+                ("critical, all units, 7 d",
+                 "SELECT report_id, timestamp, structured_json FROM reports WHERE timestamp >= ?",
+                 ((now - timedelta(days=7)).isoformat(),),
+                 lambda data: str(data.get("severity", "")).lower() == "critical",
+                 "AND lower(json_extract(structured_json, '$.severity')) = 'critical'",
+                 "AND severity = 'critical'"),
+            ]
+            print(f"   {'query':<26} {'matches':>8} {'python':>10} {'json sql':>10} {'column':>10}")
+            with pool.read() as conn:
+                for name, sql, params, predicate, json_condition, column_condition in cases:
+                    python_ms, matches = timed(lambda: python_filter(conn, sql, params, predicate))
+                    json_ms, _ = timed(lambda: conn.execute(f"{sql} {json_condition}", params).fetchall())
+                    column_ms, rows = timed(lambda: conn.execute(f"{sql} {column_condition}", params).fetchall())
+                    assert len(rows) == len(matches), (name, len(rows), len(matches))
+                    print(f"   {name:<26} {len(matches):>8} {python_ms:>7.2f} ms {json_ms:>7.2f} ms "
+                          f"{column_ms:>7.2f} ms")
+            close_pool()
+
+    print(f"\n   insert rate: {rates[False]:,.0f} rows/s without the field indexes, "
+          f"{rates[True]:,.0f} rows/s with them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and serialization time for a /reports page.
+
+Fills a throwaway database with reports, fetches one --limit page and times
+turning it into a response body the way FastAPI did before (dicts through
+jsonable_encoder + the stdlib json module) against responses.json_response()
+(orjson when installed), with and without `fields` projection, `parse_json`
+and compression:
+
+  before          every column, FastAPI's default encoder
+  orjson          every column, responses.dumps
+  parse_json      every column, structured_json sent as an object
+  fields          report_id, timestamp, report_type, unit_name only
+
+Each row also shows the gzip and brotli body size (brotli only when the
+`brotli` package is installed) and how long compressing took.
+
+Usage:
+    python tests/benchmark_responses.py [--limit 1000]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import backend  # noqa: E402
+import responses  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 20
+UNITS = [f"U{i}" for i in range(40)]
+
+
+def populate(pool, total):
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, level) VALUES (?, ?, 'Squad')",
+                         [(u, f"{u} Squad, 2nd Platoon") for u in UNITS])
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Sergeant', ?)",
+                         [(f"S_{u}", f"Sgt. Soldier {u}", u) for u in UNITS])
+        start = datetime.now() - timedelta(days=1)
+        rows = []
+        for i in range(total):
+            unit = random.choice(UNITS)
+            data = {"location": f"Grid {random.randint(100, 999)} {random.randint(100, 999)}",
+                    "enemy_count": random.randint(0, 20), "vehicle_count": random.randint(0, 3),
+                    "description": random.choice(["Enemy patrol moving north along the river",
+                                                  "Holding position at checkpoint, all quiet",
+                                                  "Requesting resupply of water and ammunition"]),
+                    "timestamp": (start + timedelta(seconds=i)).isoformat()}
+            rows.append((str(uuid.uuid4()), f"S_{unit}", unit, data["timestamp"],
+                         random.choice(["SITREP", "CONTACT", "INTELLIGENCE"]), json.dumps(data), 0.85))
+        conn.executemany(
+            "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+        )
+
+
+def timed(fn):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /reports response encoding")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        populate(pool, args.limit * 2)
+        with pool.read() as conn:
+            rows = conn.execute(backend.REPORT_LIST_QUERY + " ORDER BY r.timestamp DESC LIMIT ?",
+                                (args.limit,)).fetchall()
+        close_pool()
+
+    every = backend.report_projection(None)
+    narrow = backend.report_projection("report_id,timestamp,report_type,unit_name")
+    cases = [
+        ("before", lambda: JSONResponse(jsonable_encoder(
+            {"reports": [dict(zip(backend.REPORT_LIST_COLUMNS, row)) for row in rows]})).body),
+        ("orjson", lambda: responses.dumps({"reports": backend.report_dicts(rows, every)})),
+        ("parse_json", lambda: responses.dumps({"reports": backend.report_dicts(rows, every, parse_json=True)})),
+        ("fields", lambda: responses.dumps({"reports": backend.report_dicts(rows, narrow)})),
+    ]
+
+    print(f"📦 one page of {len(rows)} reports (orjson {'on' if responses.orjson else 'off'}, "
+          f"brotli {'on' if responses.brotli else 'not installed'})\n")
+    print(f"   {'response':<11} {'encode':>9} {'bytes':>9} {'gzip':>16} {'brotli':>16}")
+    for name, encode in cases:
+        encode_ms, body = timed(encode)
+        gzip_ms, gzipped = timed(lambda: gzip.compress(body, compresslevel=responses.GZIP_LEVEL))
+        brotli_column = "n/a"
+        if responses.brotli:
+            brotli_ms, brotlied = timed(lambda: responses.compress(body, "br"))
+            brotli_column = f"{len(brotlied):>7} {brotli_ms:>5.1f} ms"
+        print(f"   {name:<11} {encode_ms:>6.2f} ms {len(body):>9} {len(gzipped):>7} {gzip_ms:>5.1f} ms "
+              f"{brotli_column:>16}")
+
+
+if __name__ == "__main__":
+    main()
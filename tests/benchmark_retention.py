@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Hot-set query latency as history grows, with and without retention.
+
+For each history length, builds a throwaway database with --per-week reports
+per week (inserted in time order, as in production), times a few hot-set
+queries, runs the retention pass (30-day horizon, weekly archives) and times
+them again:
+
+  newest 500          the /reports first page
+  last 7 days by type  an index range scan over recent reports
+  reports per unit     a whole-table aggregate (what dashboards and the
+                       suggestion scans pay for every row kept hot)
+
+It also reports the hot database size and the time the retention pass took.
+
+Usage:
+    python tests/benchmark_retention.py [--weeks 8 32 96] [--per-week 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import retention  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 10
+UNITS = [f"U{i}" for i in range(40)]
+TYPES = ["SITREP", "CONTACT", "CASUALTY", "SUPPLY", "INTELLIGENCE", "LOGSTAT"]
+
+
+def populate(pool, weeks, per_week, now):
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, level) VALUES (?, ?, 'Squad')", [(u, u) for u in UNITS])
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+                         [(f"S_{u}", f"Soldier {u}", u) for u in UNITS])
+    start = now - timedelta(weeks=weeks)
+    step = timedelta(weeks=1) / per_week
+    total = weeks * per_week
+    for offset in range(0, total, 50000):
+        rows = []
+        for i in range(offset, min(total, offset + 50000)):
+            unit = random.choice(UNITS)
+            rows.append((str(uuid.uuid4()), f"S_{unit}", unit, (start + step * i).isoformat(),
+                         random.choice(TYPES), '{"status": "Holding"}', 0.8))
+        with pool.write() as conn:
+            conn.executemany(
+                "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+
+
+def timed(conn, sql, params=()):
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def measure(pool, db_path, now):
+    week_ago = (now - timedelta(days=7)).isoformat()
+    with pool.read() as conn:
+        newest = timed(conn, backend.REPORT_LIST_QUERY + " ORDER BY r.timestamp DESC, r.report_id DESC LIMIT 500")
+        recent = timed(conn, "SELECT report_type, COUNT(*) FROM reports WHERE timestamp >= ? GROUP BY report_type",
+                       (week_ago,))
+        per_unit = timed(conn, "SELECT unit_id, COUNT(*) FROM reports GROUP BY unit_id")
+        rows = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    size_mb = os.path.getsize(db_path) / 1e6
+    return rows, size_mb, newest, recent, per_unit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot-set latency with retention")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[8, 32, 96])
+    parser.add_argument("--per-week", type=int, default=5000)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    print(f"🗄️  {args.per_week} reports/week, retention horizon {retention.RETENTION_DAYS} days\n")
+    print(f"   {'history':>8} {'':>9} {'hot rows':>9} {'size MB':>8} {'newest 500':>11} "
+          f"{'7d by type':>11} {'per unit':>9}")
+    for weeks in args.weeks:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            backend.DB_PATH = db_path
+            pool = get_pool(db_path)
+            populate(pool, weeks, args.per_week, now)
+            for label in ("no retention", "retention"):
+                if label == "retention":
+                    started = time.perf_counter()
+                    retention.run_retention(pool.write, db_path, now=now)
+                    elapsed = time.perf_counter() - started
+                    with pool.write() as conn:
+                        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                rows, size_mb, newest, recent, per_unit = measure(pool, db_path, now)
+                print(f"   {weeks:>5} wk {label:>12} {rows:>9} {size_mb:>8.1f} {newest:>8.2f} ms "
+                      f"{recent:>8.2f} ms {per_unit:>6.2f} ms")
+            archives = retention.list_archives(db_path)
+            print(f"   {'':>8} retention pass {elapsed:.1f} s, {len(archives)} weekly archives\n")
+            close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Full-text search latency over a large raw-input history.
+
+Fills a throwaway database with --inputs synthetic soldier transmissions
+(inserted through the FTS triggers, so the insert rate includes index
+maintenance), then times /search-style queries, ranked (sort=rank) and newest
+first (sort=recent), against the newest-first LIKE '%term%' scan that is the
+only way to search the text without the index:
+
+  common term      a word in ~10% of inputs
+  rare term        a word in ~0.01% of inputs
+  phrase           a two-word phrase
+  prefix           term* over many distinct words
+  unit + since     a common term restricted to one unit's subtree and the last day
+
+Usage:
+    python tests/benchmark_search.py [--inputs 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import search  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 5
+PHRASES = [
+    "holding position at grid", "enemy contact to the north", "requesting resupply of water",
+    "moving to checkpoint", "all clear on the eastern flank", "vehicle spotted on the main road",
+    "need medical evacuation", "observed movement near the treeline", "radio check over",
+    "establishing overwatch on the ridge",
+]
+FILLER = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "ridge", "road", "village", "river",
+          "bridge", "compound", "patrol", "squad", "platoon", "convoy", "sector", "grid", "north", "south"]
+
+
+def make_text(i):
+    words = random.choice(PHRASES).split() + random.sample(FILLER, 4)
+    words.append(f"{random.randint(100, 999)}-{random.randint(100, 999)}")
+    if i % 10 == 0:
+        words.append("sniper")
+    if i % 10000 == 0:
+        words.append("minefield")
+    random.shuffle(words)
+    return " ".join(words)
+
+
+def populate(pool, total, now):
+    units = [("BN", "Battalion", None, "Battalion")] + [(f"CO{c}", f"Company {c}", "BN", "Company") for c in range(4)]
+    soldiers = [(f"S{c}_{i}", f"CO{c}") for c in range(4) for i in range(50)]
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)", units)
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+                         [(s, s, u) for s, u in soldiers])
+    start = now - timedelta(days=30)
+    step = timedelta(days=30) / total
+    started = time.perf_counter()
+    for offset in range(0, total, 50000):
+        rows = [(str(uuid.uuid4()), random.choice(soldiers)[0], (start + step * i).isoformat(), make_text(i))
+                for i in range(offset, min(total, offset + 50000))]
+        with pool.write() as conn:
+            conn.executemany(
+                "INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text) VALUES (?, ?, ?, ?)", rows
+            )
+    return total / (time.perf_counter() - started)
+
+
+def timed(fn):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search")
+    parser.add_argument("--inputs", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        rate = populate(pool, args.inputs, now)
+        print(f"🔎 {args.inputs} raw inputs, inserted at {rate:,.0f} rows/s including FTS triggers\n")
+
+        yesterday = (now - timedelta(days=1)).isoformat()
+        cases = [
+            ("common term", "sniper", "%sniper%", None),
+            ("rare term", "minefield", "%minefield%", None),
+            ("phrase", '"medical evacuation"', "%medical evacuation%", None),
+            ("prefix", "evac*", "%evac%", None),
+            ("unit + since", "sniper", "%sniper%", "CO1"),
+        ]
+        print(f"   {'query':<14} {'matches':>8} {'FTS5 rank':>10} {'FTS5 recent':>12} {'LIKE scan':>10}")
+        with pool.read() as conn:
+            for name, text, pattern, unit in cases:
+                since = yesterday if unit else None
+                unit_filter = f"IN ({backend.SUBTREE_UNITS})" if unit else None
+                unit_params = (unit,) if unit else ()
+                rank_ms, _ = timed(lambda: search.search(conn, text, ["raw_input"], unit_filter, unit_params,
+                                                         since, args.limit))
+                recent_ms, _ = timed(lambda: search.search(conn, text, ["raw_input"], unit_filter, unit_params,
+                                                           since, args.limit, sort="recent"))
+                like_sql = ("SELECT i.input_id FROM soldier_raw_inputs i LEFT JOIN soldiers s ON s.soldier_id = i.soldier_id "
+                            "WHERE i.raw_text LIKE ?")
+                like_params = [pattern]
+                if unit:
+                    like_sql += f" AND s.unit_id IN ({backend.SUBTREE_UNITS}) AND i.timestamp >= ?"
+                    like_params += [unit, since]
+                like_sql += f" ORDER BY i.timestamp DESC LIMIT {args.limit}"
+                like_ms, _ = timed(lambda: conn.execute(like_sql, like_params).fetchall())
+                count = conn.execute("SELECT COUNT(*) FROM raw_inputs_fts WHERE raw_inputs_fts MATCH ?",
+                                     (search.build_match_query(text),)).fetchone()[0]
+                print(f"   {name:<14} {count:>8} {rank_ms:>7.1f} ms {recent_ms:>9.1f} ms {like_ms:>7.1f} ms")
+        print(f"\n   Every query returns {args.limit} results; FTS5 results include snippets.")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
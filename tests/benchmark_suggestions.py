@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Pending suggestion growth: one row per trigger vs deduplication and expiry.
+
+Simulates --days days of report triggers (--rate per hour, spread over the
+squads of a battalion with a few busy squads reporting most of them) and
+saves each simulated hour's suggestions in one write transaction, either
+
+  insert    one new pending row per trigger, as the analysis workers did
+  dedup     suggestion_store.upsert_suggestions(), plus an expiry pass
+            (--ttl-hours) every simulated hour
+
+Prints the save time per trigger, the pending rows left at the end, the
+expiry time, and the median time of the dashboard's 5-second poll
+(GET /api/suggestions: newest 50 pending, parsed) for the whole list and
+for one squad.
+
+Usage:
+    python tests/benchmark_suggestions.py [--days 7] [--rate 2000] [--ttl-hours 24]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from suggestion_store import dedup_key, expire_suggestions, upsert_suggestions  # noqa: E402
+
+REPEATS = 50
+TRIGGERS = [
+    ("CASEVAC", "HIGH", "1 casualty reported", 0.9),
+    ("EOINCREP", "MEDIUM", "Enemy contact: 4 personnel", 0.8),
+    ("EOINCREP_EOD", "HIGH", "Explosive ordnance/device detected", 0.85),
+]
+POLL_QUERY = "SELECT * FROM suggestions WHERE status = 'pending' {unit} ORDER BY created_at DESC LIMIT 50"
+
+
+def build_units(pool, companies=4):
+    squads = [f"CO{c}P{p}S{s}" for c in range(companies) for p in range(3) for s in range(3)]
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, level) VALUES (?, ?, 'Squad')",
+                         [(squad, squad) for squad in squads])
+    return squads
+
+
+def triggers(squads, rate, days, start, seed=1):
+    """Yield (hour start, [suggestion dicts]) for every simulated hour."""
+    rng = random.Random(seed)
+    weights = [20 if i < 4 else 1 for i in range(len(squads))]
+    for hour in range(days * 24):
+        at = start + timedelta(hours=hour)
+        batch = []
+        for _ in range(rate):
+            suggestion_type, urgency, reason, confidence = rng.choice(TRIGGERS)
+            unit_id = rng.choices(squads, weights)[0]
+            report_id = str(uuid.uuid4())
+            timestamp = (at + timedelta(seconds=rng.randrange(3600))).isoformat()
+            batch.append({"type": suggestion_type, "urgency": urgency, "reason": reason, "confidence": confidence,
+                          "source_reports": [report_id], "unit_id": unit_id,
+                          "dedup_key": dedup_key(suggestion_type, unit_id, report_id, timestamp)})
+        yield at + timedelta(hours=1), batch
+
+
+def insert_rows(conn, batch, now):
+    stamp = now.isoformat()
+    conn.executemany("""
+        INSERT INTO suggestions
+        (suggestion_id, suggestion_type, urgency, reason, confidence,
+         source_reports, status, unit_id, created_at, refreshed_at)
+        VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)
+    """, [(str(uuid.uuid4()), s["type"], s["urgency"], s["reason"], s["confidence"],
+           json.dumps(s["source_reports"]), s["unit_id"], stamp, stamp) for s in batch])
+
+
+def poll(pool, unit_id=None):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        with pool.read() as conn:
+            cursor = conn.execute(POLL_QUERY.format(unit="AND unit_id = ?" if unit_id else ""),
+                                  (unit_id,) if unit_id else ())
+            columns = [description[0] for description in cursor.description]
+            for row in cursor.fetchall():
+                suggestion = dict(zip(columns, row))
+                suggestion["source_reports"] = json.loads(suggestion["source_reports"])
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, f"{mode}.db")
+        pool = get_pool(backend.DB_PATH)
+        try:
+            squads = build_units(pool)
+            start = datetime(2024, 1, 1)
+            save_s = expire_s = 0.0
+            saved = 0
+            for now, batch in triggers(squads, args.rate, args.days, start):
+                started = time.perf_counter()
+                with pool.write() as conn:
+                    if mode == "insert":
+                        insert_rows(conn, batch, now)
+                    else:
+                        upsert_suggestions(conn, batch, now)
+                save_s += time.perf_counter() - started
+                saved += len(batch)
+                if mode == "dedup":
+                    started = time.perf_counter()
+                    expire_suggestions(pool.write, args.ttl_hours, now=now)
+                    expire_s += time.perf_counter() - started
+            with pool.read() as conn:
+                pending = conn.execute("SELECT COUNT(*) FROM suggestions WHERE status = 'pending'").fetchone()[0]
+            return saved, save_s, expire_s, pending, poll(pool), poll(pool, squads[-1])
+        finally:
+            close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pending suggestion growth with and without deduplication")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--rate", type=int, default=2000, help="Triggers per simulated hour")
+    parser.add_argument("--ttl-hours", type=float, default=24)
+    args = parser.parse_args()
+
+    print(f"🔔 {args.days} days at {args.rate} triggers/hour, {args.ttl_hours:g} h TTL\n")
+    print(f"   {'mode':<7} {'triggers':>9} {'save µs':>8} {'expiry s':>9} {'pending':>8} "
+          f"{'poll ms':>8} {'squad ms':>9}")
+    for mode in ("insert", "dedup"):
+        saved, save_s, expire_s, pending, poll_ms, squad_ms = run(mode, args)
+        print(f"   {mode:<7} {saved:>9,} {save_s / saved * 1e6:>8.1f} {expire_s:>9.2f} {pending:>8,} "
+              f"{poll_ms:>8.2f} {squad_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
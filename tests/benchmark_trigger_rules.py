@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Keyword scanning in analyze_report_triggers: per-keyword substring checks vs
+the compiled trigger_rules matcher.
+
+Generates --reports synthetic reports whose description and text are
+--words words of free text (field-report vocabulary with a few keywords and
+look-alikes such as "determine" or "minefield" mixed in) and times finding
+the injury / urgent / enemy / EOD categories for each:
+
+  substring   what analyze_report_triggers did: lowercase both texts, rebuild
+              the keyword lists, any(keyword in text) per list
+  regex       one pass of a single alternation regex over all keywords, with
+              word boundaries (the alternative to trigger_rules considered)
+  compiled    trigger_rules.matcher.match(text, description)
+
+It also counts the reports where substring and compiled disagree (substring hits inside
+other words, mostly).
+
+Usage:
+    python tests/benchmark_trigger_rules.py [--reports 20000] [--words 50 200 1000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import trigger_rules  # noqa: E402
+
+FILLER = ("the squad moved along the ridge toward checkpoint grid north east of village road river bridge "
+          "observed vehicles civilians market quiet holding position awaiting resupply water ammunition "
+          "radio relay weather visibility summit reported compound treeline").split()
+LOOK_ALIKES = ["determine", "minefield", "examined", "contactless", "bombastic", "armored", "critically",
+               "patrols", "hostiles", "mines"]
+KEYWORDS = [keyword.rstrip("*") for keywords in trigger_rules.RULES.values() for keyword in keywords]
+
+REGEX_CATEGORIES = {}
+for _category, _keywords in trigger_rules.RULES.items():
+    for _keyword in _keywords:
+        REGEX_CATEGORIES.setdefault(_keyword.rstrip("*"), set()).add(_category)
+REGEX = re.compile(r"\b(" + "|".join(sorted(map(re.escape, REGEX_CATEGORIES), key=len, reverse=True)) + r")(?:s\b|\b|(?<=critical)\w*|(?<=armor)\w*)")
+
+
+def substring_match(text_content, description):
+    text_lower = str(text_content).lower()
+    description = str(description).lower()
+    injury_keywords = ["wounded", "injured", "casualty", "casualties", "medevac",
+                       "kia", "killed", "wia", "gunshot", "bleeding", "critical"]
+    urgent_keywords = ["critical", "severe", "life-threatening", "kia", "killed"]
+    enemy_keywords = ["enemy", "hostile", "contact", "engagement", "patrol",
+                      "infantry", "armor", "artillery"]
+    eod_keywords = ["ied", "mine", "unexploded", "booby trap", "explosive",
+                    "ordnance", "bomb", "explosive device"]
+    found = set()
+    for category, keywords in (("injury", injury_keywords), ("urgent", urgent_keywords),
+                               ("enemy", enemy_keywords), ("eod", eod_keywords)):
+        if any(keyword in text_lower or keyword in description for keyword in keywords):
+            found.add(category)
+    return found
+
+
+def regex_match(text_content, description):
+    found = set()
+    for m in REGEX.finditer(f"{text_content}\n{description}".lower()):
+        found |= REGEX_CATEGORIES[m.group(1)]
+    return found
+
+
+def make_text(words, keyword_rate):
+    out = []
+    for _ in range(words):
+        roll = random.random()
+        if roll < keyword_rate:
+            out.append(random.choice(KEYWORDS))
+        elif roll < keyword_rate * 2:
+            out.append(random.choice(LOOK_ALIKES))
+        else:
+            out.append(random.choice(FILLER))
+    text = " ".join(out)
+    return text[0].upper() + text[1:] + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report trigger keyword matching")
+    parser.add_argument("--reports", type=int, default=20000)
+    parser.add_argument("--words", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    random.seed(7)
+    print(f"🔎 {args.reports} reports, {sum(len(k) for k in trigger_rules.RULES.values())} keywords "
+          f"in {len(trigger_rules.RULES)} categories\n")
+    print(f"   {'words':>6} {'substring':>14} {'regex':>14} {'compiled':>14} {'speedup':>8} {'differ':>7}")
+    for words in args.words:
+        # Sparse keywords, like most real traffic: about one word in 200
+        corpus = [(make_text(words, 0.005), make_text(words, 0.005)) for _ in range(args.reports)]
+
+        started = time.perf_counter()
+        old = [substring_match(text, description) for text, description in corpus]
+        substring_rate = len(corpus) / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for text, description in corpus:
+            regex_match(text, description)
+        regex_rate = len(corpus) / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        new = [trigger_rules.matcher.match(text, description) for text, description in corpus]
+        compiled_rate = len(corpus) / (time.perf_counter() - started)
+
+        differ = sum(a != b for a, b in zip(old, new))
+        print(f"   {words:>6} {substring_rate:>9,.0f} r/s {regex_rate:>9,.0f} r/s {compiled_rate:>9,.0f} r/s "
+              f"{compiled_rate / substring_rate:>7.1f}x {differ:>7}")
+
+
+if __name__ == "__main__":
+    main()
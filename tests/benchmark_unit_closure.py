@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Subtree-query benchmark for the unit_closure table.
+
+Builds a throwaway hierarchy 10 levels deep (8 units under the root, then
+binary fan-out: about 4,000 units) with reports spread over the leaf units.
+For units near the root, in the middle and near the leaves it compares:
+
+  subtree ids     recursive CTE over parent_unit_id vs an indexed lookup on
+                  unit_closure
+  newest reports  the recursive-CTE report query vs the query behind
+                  GET /units/{id}/reports?recursive=true, which filters through
+                  unit_closure and picks its plan from the subtree size
+
+It also times the trigger-maintained writes: inserting a unit and moving a
+subtree.
+
+Usage:
+    python tests/benchmark_unit_closure.py [--depth 10] [--top-fan-out 8] [--fan-out 2] [--reports 200000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 20
+
+SUBTREE_CTE = """
+    WITH RECURSIVE subtree(unit_id) AS (
+        SELECT ?
+        UNION
+        SELECT u.unit_id FROM units u JOIN subtree st ON u.parent_unit_id = st.unit_id
+    )
+"""
+
+CTE_IDS = SUBTREE_CTE + "SELECT unit_id FROM subtree"
+
+CTE_REPORTS = SUBTREE_CTE + backend.REPORT_LIST_QUERY + """
+    WHERE r.unit_id IN (SELECT unit_id FROM subtree)
+    ORDER BY r.timestamp DESC, r.report_id DESC LIMIT 500
+"""
+
+CLOSURE_REPORTS = backend.REPORT_LIST_QUERY + f"""
+    WHERE {{column}} IN ({backend.SUBTREE_UNITS})
+    ORDER BY r.timestamp DESC, r.report_id DESC LIMIT 500
+"""
+
+
+def populate(pool, depth, top_fan_out, fan_out, total_reports):
+    """Complete tree of the given depth; returns unit ids per level."""
+    levels = [["U"]]
+    units = [("U", "Root", None, "Level 0")]
+    for level in range(1, depth):
+        current = []
+        for parent in levels[-1]:
+            for i in range(top_fan_out if level == 1 else fan_out):
+                unit_id = f"{parent}.{i}"
+                units.append((unit_id, unit_id, parent, f"Level {level}"))
+                current.append(unit_id)
+        levels.append(current)
+    leaves = levels[-1]
+    start = datetime.now() - timedelta(days=30)
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)", units)
+        conn.executemany(
+            "INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+            [(f"S_{u}", f"Soldier {u}", u) for u in leaves],
+        )
+        conn.executemany(
+            "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+            "VALUES (?, ?, ?, ?, 'SITREP', '{}', 0.8)",
+            [(str(uuid.uuid4()), f"S_{u}", u, (start + timedelta(seconds=i * 2.5)).isoformat())
+             for i, u in enumerate(random.choice(leaves) for _ in range(total_reports))],
+        )
+        conn.execute("ANALYZE")
+    return levels, len(units)
+
+
+def timed(fn, repeats=REPEATS):
+    """Median wall time of fn() in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unit_closure subtree queries")
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--top-fan-out", type=int, default=8)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--reports", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        pool = get_pool(backend.DB_PATH)
+        levels, unit_count = populate(pool, args.depth, args.top_fan_out, args.fan_out, args.reports)
+        print(f"🌲 {args.depth} levels, {unit_count} units, {args.reports} reports\n")
+        print(f"   {'subtree root':<12} {'units':>6}   {'ids: CTE':>10} {'closure':>9}   "
+              f"{'500 newest: CTE':>15} {'closure':>9}")
+
+        with pool.read() as conn:
+            for level in (0, 2, args.depth // 2, args.depth - 2):
+                unit_id = levels[level][0]
+                size = len(conn.execute(backend.SUBTREE_UNITS, (unit_id,)).fetchall())
+                cte_ids_ms = timed(lambda: conn.execute(CTE_IDS, (unit_id,)).fetchall())
+                closure_ids_ms = timed(lambda: conn.execute(backend.SUBTREE_UNITS, (unit_id,)).fetchall())
+                cte_ms = timed(lambda: conn.execute(CTE_REPORTS, (unit_id,)).fetchall())
+
+                def closure_reports():
+                    column = "+r.unit_id" if backend.subtree_is_large(unit_id, 500) else "r.unit_id"
+                    return conn.execute(CLOSURE_REPORTS.format(column=column), (unit_id,)).fetchall()
+
+                closure_ms = timed(closure_reports)
+                print(f"   level {level:<6} {size:>6}   {cte_ids_ms:>7.2f} ms {closure_ids_ms:>6.2f} ms   "
+                      f"{cte_ms:>12.2f} ms {closure_ms:>6.2f} ms")
+
+        counter = iter(range(10 ** 6))
+
+        def insert_leaf():
+            with pool.write() as conn:
+                conn.execute("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, 'New', ?, 'Leaf')",
+                             (f"NEW{next(counter)}", levels[-1][0]))
+
+        moving = levels[2][0]
+        targets = iter([levels[1][1], levels[1][0]] * REPEATS)
+
+        def move_subtree():
+            with pool.write() as conn:
+                conn.execute("UPDATE units SET parent_unit_id = ? WHERE unit_id = ?", (next(targets), moving))
+
+        print(f"\n   insert unit (depth {args.depth})          {timed(insert_leaf):>7.2f} ms")
+        with pool.read() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM unit_closure WHERE ancestor_id = ?", (moving,)).fetchone()[0]
+        print(f"   move a {size}-unit subtree            {timed(move_subtree):>7.2f} ms")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
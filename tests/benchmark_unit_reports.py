@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for a unit's report view.
+
+Builds a throwaway battalion (4 companies x 3 platoons x 3 squads, soldiers in
+every squad) with reports spread over all soldiers, then times opening the
+battalion view two ways:
+
+  fan-out   GET /units/{id}/soldiers for every unit in the subtree, then one
+            GET /soldiers/{id}/reports per soldier, merged client-side
+  subtree   a single GET /units/{id}/reports?recursive=true
+
+Requests go through FastAPI's in-process TestClient, so the numbers leave out
+network round trips. Over a real network the fan-out only gets worse.
+
+Usage:
+    python tests/benchmark_unit_reports.py [--reports 100000] [--soldiers-per-squad 9] [--limit 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+REPEATS = 10
+
+
+def populate(db_path, soldiers_per_squad, total_reports):
+    units = [("BN", "1st Battalion", None, "Battalion")]
+    soldiers = []
+    for c in range(4):
+        co = f"CO{c}"
+        units.append((co, f"Company {c}", "BN", "Company"))
+        for p in range(3):
+            plt = f"{co}_PLT{p}"
+            units.append((plt, f"Platoon {c}-{p}", co, "Platoon"))
+            for q in range(3):
+                sqd = f"{plt}_SQD{q}"
+                units.append((sqd, f"Squad {c}-{p}-{q}", plt, "Squad"))
+                soldiers.extend((f"{sqd}_S{i}", sqd) for i in range(soldiers_per_squad))
+    start = datetime.now() - timedelta(days=30)
+    with get_pool(db_path).write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)", units)
+        conn.executemany(
+            "INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+            [(s, f"Soldier {s}", u) for s, u in soldiers],
+        )
+        reports = []
+        for i in range(total_reports):
+            soldier_id, unit_id = random.choice(soldiers)
+            reports.append((str(uuid.uuid4()), soldier_id, unit_id, (start + timedelta(seconds=i * 2.5)).isoformat(),
+                            "SITREP", '{"status": "Holding"}', 0.8))
+        conn.executemany(
+            "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", reports,
+        )
+        conn.execute("ANALYZE")
+    return [u[0] for u in units], len(soldiers)
+
+
+def timed(fn):
+    """Median wall time of fn() in milliseconds, plus its last result."""
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unit report views")
+    parser.add_argument("--reports", type=int, default=100000)
+    parser.add_argument("--soldiers-per-squad", type=int, default=9)
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bench.db")
+        unit_ids, soldier_count = populate(backend.DB_PATH, args.soldiers_per_squad, args.reports)
+        client = TestClient(backend.app)
+        print(f"🏗️  Battalion: {len(unit_ids)} units, {soldier_count} soldiers, {args.reports} reports\n")
+
+        def fan_out():
+            requests_made = 0
+            merged = []
+            for unit_id in unit_ids:
+                soldiers = client.get(f"/units/{unit_id}/soldiers").json()["soldiers"]
+                requests_made += 1
+                for soldier in soldiers:
+                    merged.extend(client.get(f"/soldiers/{soldier['soldier_id']}/reports?limit={args.limit}").json()["reports"])
+                    requests_made += 1
+            merged.sort(key=lambda r: (r["timestamp"], r["report_id"]), reverse=True)
+            return requests_made, merged[:args.limit]
+
+        def subtree():
+            reports = client.get(f"/units/BN/reports?recursive=true&limit={args.limit}").json()["reports"]
+            return 1, reports
+
+        fan_out_ms, (fan_out_requests, fan_out_reports) = timed(fan_out)
+        subtree_ms, (_, subtree_reports) = timed(subtree)
+        assert [r["report_id"] for r in fan_out_reports] == [r["report_id"] for r in subtree_reports]
+
+        print(f"   fan-out  {fan_out_requests:>5} requests  {fan_out_ms:>9.1f} ms")
+        print(f"   subtree  {1:>5} request   {subtree_ms:>9.1f} ms")
+        print(f"   speedup  {fan_out_ms / subtree_ms:.1f}x")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-unit statistics: trigger-maintained unit_stats vs aggregating raw rows.
+
+For each size, builds a throwaway database with a battalion > company >
+platoon > squad hierarchy and --sizes reports (plus a raw input per five
+reports), then times the stats a dashboard tile needs (report counts by
+type, latest report, raw input count, pending suggestions) for one squad and
+for the whole battalion:
+
+  aggregate    COUNT / MAX over reports, raw inputs and suggestions
+  unit_stats   what GET /units/{id}/stats reads
+
+It also reports the report insert rate with and without the stats triggers.
+
+Usage:
+    python tests/benchmark_unit_stats.py [--sizes 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPEATS = 10
+TYPES = ["SITREP", "CONTACT", "CASUALTY", "SUPPLY", "INTELLIGENCE"]
+STATS_TRIGGERS = ["unit_stats_report_insert", "unit_stats_report_delete", "unit_stats_report_update",
+                  "unit_stats_raw_input_insert"]
+
+AGGREGATE_QUERIES = [
+    "SELECT report_type, COUNT(*), MAX(timestamp) FROM reports WHERE unit_id IN ({units}) GROUP BY report_type",
+    "SELECT COUNT(*), MAX(i.timestamp) FROM soldier_raw_inputs i JOIN soldiers s ON s.soldier_id = i.soldier_id "
+    "WHERE s.unit_id IN ({units})",
+    "SELECT COUNT(*) FROM suggestions WHERE status = 'pending' AND unit_id IN ({units})",
+]
+
+
+def build_hierarchy(pool):
+    units = [("BN", None, "Battalion")]
+    for c in range(4):
+        units.append((f"CO{c}", "BN", "Company"))
+        for p in range(3):
+            units.append((f"CO{c}P{p}", f"CO{c}", "Platoon"))
+            for s in range(3):
+                units.append((f"CO{c}P{p}S{s}", f"CO{c}P{p}", "Squad"))
+    squads = [unit_id for unit_id, _, level in units if level == "Squad"]
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)",
+                         [(unit_id, unit_id, parent, level) for unit_id, parent, level in units])
+        conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Private', ?)",
+                         [(f"S_{squad}_{i}", f"S_{squad}_{i}", squad) for squad in squads for i in range(8)])
+    return squads
+
+
+def populate(pool, squads, total, now):
+    start = now - timedelta(days=30)
+    step = timedelta(days=30) / total
+    started = time.perf_counter()
+    for offset in range(0, total, 50000):
+        reports, inputs = [], []
+        for i in range(offset, min(total, offset + 50000)):
+            squad = random.choice(squads)
+            soldier = f"S_{squad}_{random.randrange(8)}"
+            timestamp = (start + step * i).isoformat()
+            reports.append((str(uuid.uuid4()), soldier, squad, timestamp, random.choice(TYPES), "{}", 0.8))
+            if i % 5 == 0:
+                inputs.append((str(uuid.uuid4()), soldier, timestamp, "radio check"))
+        with pool.write() as conn:
+            conn.executemany(
+                "INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, structured_json, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", reports,
+            )
+            conn.executemany("INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text) "
+                             "VALUES (?, ?, ?, ?)", inputs)
+    return total / (time.perf_counter() - started)
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-unit statistics")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    now = datetime.now()
+    print(f"📊 unit stats, {len(TYPES)} report types, 1 raw input per 5 reports\n")
+    print(f"   {'reports':>8} {'scope':<10} {'aggregate':>10} {'unit_stats':>11}")
+    for total in args.sizes:
+        rates = {}
+        for triggers in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                backend.DB_PATH = os.path.join(tmp, "bench.db")
+                pool = get_pool(backend.DB_PATH)
+                squads = build_hierarchy(pool)
+                if not triggers:
+                    with pool.write() as conn:
+                        for trigger in STATS_TRIGGERS:
+                            conn.execute(f"DROP TRIGGER {trigger}")
+                rates[triggers] = populate(pool, squads, total, now)
+                if not triggers:
+                    close_pool()
+                    continue
+
+                with pool.write() as conn:
+                    conn.execute("ANALYZE")
+                with pool.read() as conn:
+                    for scope, units, unit_id in (("squad", "?", squads[0]), ("battalion", backend.SUBTREE_UNITS, "BN")):
+                        aggregate_ms = timed(lambda: [conn.execute(query.format(units=units), (unit_id,)).fetchall()
+                                                      for query in AGGREGATE_QUERIES])
+                        stats_ms = timed(lambda: backend.read_unit_stats(conn, units, unit_id))
+                        print(f"   {total:>8} {scope:<10} {aggregate_ms:>7.2f} ms {stats_ms:>8.3f} ms")
+                close_pool()
+        print(f"   {'':>8} inserts: {rates[False]:,.0f} reports/s without the triggers, "
+              f"{rates[True]:,.0f} with them\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Tests for the batch ingestion endpoints.
+
+Checks that items with missing or wrongly typed fields become error results
+while the rest of the batch is inserted, and that a row the database
+rejects is written again on its own so only that row is lost. No server
+needed.
+
+    python tests/test_batch_ingestion.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+
+def setup_database(tmp):
+    backend.DB_PATH = os.path.join(tmp, "batch.db")
+    pool = get_pool(backend.DB_PATH)
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+        conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'S1', 'Private', 'U1')")
+    backend.hierarchy_cache.invalidate()
+    return pool
+
+
+def statuses(response):
+    return [result["status"] for result in response["results"]]
+
+
+def test_invalid_items_do_not_fail_the_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        try:
+            response = backend.create_raw_inputs_batch({"raw_inputs": [
+                {"soldier_id": "S1", "raw_text": "Moving to checkpoint"},
+                {"soldier_id": "S1", "raw_text": None},
+                {"soldier_id": ["x"], "raw_text": "text"},
+                {"soldier_id": "S1", "raw_text": "text", "confidence": "high"},
+                {"soldier_id": "S1", "raw_text": "text", "timestamp": [1]},
+                {"soldier_id": "S1", "raw_text": "text", "input_type": 5},
+                {"soldier_id": "S1", "raw_text": "At the bridge", "timestamp": 1700000000, "confidence": 1},
+            ]})
+            assert statuses(response) == ["created"] + ["error"] * 5 + ["created"], response
+            assert response["created"] == 2 and response["failed"] == 5
+
+            response = backend.create_reports_batch({"reports": [
+                {"soldier_id": "S1", "report_type": "SITREP", "confidence": 0.9},
+                {"soldier_id": "S1", "report_type": "SITREP", "confidence": None},
+                {"soldier_id": "S1", "confidence": 0.9},
+                {"soldier_id": "S1", "report_type": "SITREP", "text_content": {"a": 1}},
+                {"soldier_id": "UNKNOWN", "report_type": "SITREP"},
+            ]})
+            assert statuses(response) == ["created"] + ["error"] * 4, response
+            with pool.read() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM soldier_raw_inputs").fetchone()[0] == 2
+                assert conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0] == 1
+        finally:
+            close_pool()
+
+
+def test_rejected_row_is_the_only_one_lost():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        try:
+            with pool.write() as conn:
+                conn.execute("CREATE TRIGGER reject_input BEFORE INSERT ON soldier_raw_inputs "
+                             "WHEN NEW.raw_text = 'bad' BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+            response = backend.create_raw_inputs_batch({"raw_inputs": [
+                {"soldier_id": "S1", "raw_text": text} for text in ["a", "bad", "c"]
+            ]})
+            assert statuses(response) == ["created", "error", "created"], response
+            assert response["results"][1]["error"] == "rejected" and "input_id" not in response["results"][1]
+            with pool.read() as conn:
+                assert sorted(row[0] for row in conn.execute("SELECT raw_text FROM soldier_raw_inputs")) == ["a", "c"]
+        finally:
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_invalid_items_do_not_fail_the_batch()
+    test_rejected_row_is_the_only_one_lost()
+    print("✅ batch ingestion tests passed")
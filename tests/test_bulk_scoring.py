@@ -0,0 +1,113 @@
+"""
+Tests for bulk trigger scoring.
+
+Checks that bulk_scoring.score_chunk() gives exactly the suggestions
+detect_report_triggers() gives report by report, including string, null and
+malformed fields and keyword look-alikes, that the counts the rules compare
+are the reports table's generated columns, and that save_scores() merges
+repeat reports and does not save a report twice. No server needed.
+
+    python tests/test_bulk_scoring.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import bulk_scoring  # noqa: E402
+import trigger_rules  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPORTS = [
+    ("CASUALTY", {"casualties": 2, "severity": "Critical"}),
+    ("CASUALTY", {"casualties": 2.0, "description": "two wounded"}),
+    ("CASUALTY", {"casualties": "2", "description": "soldier injured"}),
+    ("CASUALTY", {"casualties": None}),
+    ("CASUALTY", {"casualty_count": 3}),
+    ("CASUALTY", {"casualties": "3 wounded", "casualty_count": 1}),
+    ("CASUALTY", {"casualties": "several", "description": "two wounded"}),
+    ("SITREP", {"description": "Patient critically hurt, MEDEVAC requested"}),
+    ("SITREP", {"description": "determine route past the minefield"}),
+    ("SITREP", {"description": "(IED) found; mines cleared, booby trap"}),
+    ("SITREP", {"description": "Convoy ambushed while patrolling, one bled out; road bombed"}),
+    ("CONTACT", {"enemy_count": 12, "vehicle_count": 1}),
+    ("CONTACT", {"enemy_count": " 8 ", "vehicle_count": 3}),
+    ("CONTACT", {"enemy_count": "many", "description": "enemy patrol"}),
+    ("INTELLIGENCE", {"enemy_count": 0, "description": "hostiles sighted, ARMORED column"}),
+    ("INTELLIGENCE", {"enemy_count": 3.7}),
+    ("MEDEVAC", {"casualties": 4, "description": "unexploded ordnance"}),
+    ("SITREP", {"description": None}),
+    ("SITREP", {"description": 42}),
+    ("SITREP", {"description": "contactless delivery " * 100 + "enemy"}),
+    ("SITREP", "{not json"),
+    ("CONTACT", ["enemy"]),
+]
+
+
+def rows():
+    for index, (report_type, fields) in enumerate(REPORTS, 1):
+        structured_json = fields if isinstance(fields, str) else json.dumps(fields)
+        yield index, f"R{index}", "U1", report_type, structured_json
+
+
+def expected_scores():
+    scores = []
+    for _, report_id, unit_id, report_type, structured_json in rows():
+        fields = bulk_scoring._load(structured_json)
+        for trigger in backend.detect_report_triggers(report_id, "S1", unit_id, report_type, fields):
+            scores.append((report_id, unit_id, trigger["type"], trigger["urgency"], trigger["reason"],
+                           trigger["confidence"]))
+    return sorted(scores)
+
+
+def test_bulk_scores_match_per_report_analysis():
+    long_text_limit = bulk_scoring.ARRAY_TEXT_LIMIT
+    try:
+        for limit in (long_text_limit, 0):
+            # limit 0 sends every description through KeywordMatcher.match()
+            bulk_scoring.ARRAY_TEXT_LIMIT = limit
+            assert sorted(bulk_scoring.score_chunk(list(rows()))) == expected_scores()
+    finally:
+        bulk_scoring.ARRAY_TEXT_LIMIT = long_text_limit
+
+
+def test_save_scores_skips_existing_suggestions():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "bulk.db")
+        pool = get_pool(backend.DB_PATH)
+        try:
+            with pool.write() as conn:
+                conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+                conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'S1', 'Private', 'U1')")
+                conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                                 "structured_json, confidence) VALUES (?, 'S1', ?, '2024-01-01T00:00:00', ?, ?, 0.9)",
+                                 [(report_id, unit_id, report_type, structured_json)
+                                  for _, report_id, unit_id, report_type, structured_json in rows()])
+            with pool.read() as conn:
+                columns = conn.execute("SELECT report_id, casualties, enemy_count FROM reports").fetchall()
+            for report_id, casualties, enemy_count in columns:
+                fields = bulk_scoring._load(dict((row[1], row[4]) for row in rows())[report_id])
+                assert (casualties or 0) == trigger_rules.report_count(fields, *trigger_rules.CASUALTY_FIELDS)
+                assert (enemy_count or 0) == trigger_rules.report_count(fields, "enemy_count")
+
+            reports, scores = bulk_scoring.score_reports(backend.DB_PATH, chunk_size=5)
+            assert reports == len(REPORTS) and sorted(scores) == expected_scores()
+            with pool.write() as conn:
+                # One unit, one hour: one suggestion per type
+                assert bulk_scoring.save_scores(conn, scores) == len({score[2] for score in scores})
+                assert bulk_scoring.save_scores(conn, scores) == 0
+                saved = conn.execute("SELECT source_reports FROM suggestions").fetchall()
+            assert sorted(report_id for row in saved for report_id in json.loads(row[0])) == \
+                sorted(report_id for report_id, *_ in scores)
+        finally:
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_bulk_scores_match_per_report_analysis()
+    test_save_scores_skips_existing_suggestions()
+    print("✅ bulk scoring tests passed")
@@ -0,0 +1,118 @@
+"""
+Tests for cross-report trigger correlation.
+
+Checks that triggers from different units under one parent within the
+window combine into one suggestion that later reports update, that the
+reporting unit alone, old reports and repeats do not, that state expires
+after a quiet window, and that three CONTACT reports from different squads
+end up as one correlated EOINCREP suggestion for their platoon.
+
+    python tests/test_correlation.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from correlation import Correlator  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+PARENTS = {"SQ1": "PLT1", "SQ2": "PLT1", "SQ3": "PLT1", "PLT1": "CO1", "CO1": None}
+CONTACT = {"type": "EOINCREP", "urgency": "MEDIUM", "confidence": 0.8, "source_reports": []}
+WAIT = 5.0  # seconds
+
+
+def test_triggers_from_different_units_correlate():
+    correlator = Correlator(PARENTS.get)
+    start = 1_000_000.0
+    assert correlator.observe("R1", "SQ1", CONTACT, start, start) == []
+    assert correlator.observe("R2", "SQ1", CONTACT, start + 10, start + 10) == []   # one unit so far
+    first, = correlator.observe("R3", "SQ2", CONTACT, start + 20, start + 20)
+    assert first["created"] and first["unit_id"] == "PLT1" and first["type"] == "EOINCREP"
+    assert first["source_reports"] == ["R1", "R2", "R3"]
+    assert first["urgency"] == "HIGH" and first["confidence"] == 0.99     # 1 - 0.2 ** 3, capped
+
+    # Repeats change nothing; the next report updates the same suggestion
+    assert correlator.observe("R3", "SQ2", CONTACT, start + 20, start + 30) == []
+    second, = correlator.observe("R4", "SQ3", CONTACT, start + 100, start + 100)
+    assert not second["created"] and second["suggestion_id"] == first["suggestion_id"]
+    assert second["source_reports"] == ["R1", "R2", "R3", "R4"]
+
+    # Too old for the window
+    assert correlator.observe("R0", "SQ1", CONTACT, start - 1000, start + 100) == []
+
+    # After a quiet window the next burst is a new suggestion
+    later = start + 2000
+    correlator.observe("R5", "SQ1", CONTACT, later, later)
+    correlator.observe("R6", "SQ2", CONTACT, later, later)
+    third, = correlator.observe("R7", "SQ2", CONTACT, later, later)
+    assert third["created"] and third["suggestion_id"] != first["suggestion_id"]
+    assert third["source_reports"] == ["R5", "R6", "R7"]
+
+
+def test_state_stays_bounded():
+    correlator = Correlator(PARENTS.get, max_bucket_reports=5, max_source_reports=8)
+    start = 1_000_000.0
+    for i in range(10000):
+        at = start + i
+        correlations = correlator.observe(f"R{i}", f"SQ{i % 3 + 1}", CONTACT, at, at)
+    assert len(correlations) == 1 and len(correlations[0]["source_reports"]) == 8
+    stats = correlator.stats()
+    # (3 squads + the platoon) x (10 minute window / 1 minute buckets + 1)
+    assert stats["windows"] <= 4 and stats["buckets"] <= 4 * 11
+
+
+def test_contact_reports_from_squads_make_one_platoon_suggestion():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "correlation.db")
+        pool = get_pool(backend.DB_PATH)
+        correlator = backend.report_correlator
+        backend.report_correlator = Correlator(backend.unit_parent)
+        backend.report_analysis_queue.start()
+        try:
+            with pool.write() as conn:
+                conn.executemany("INSERT INTO units (unit_id, name, parent_unit_id, level) VALUES (?, ?, ?, ?)", [
+                    ("PLT1", "1st Platoon", None, "Platoon"),
+                    ("SQ1", "1st Squad", "PLT1", "Squad"),
+                    ("SQ2", "2nd Squad", "PLT1", "Squad"),
+                    ("SQ3", "3rd Squad", "PLT1", "Squad"),
+                ])
+                conn.executemany("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES (?, ?, 'Sergeant', ?)",
+                                 [(f"S{i}", f"S{i}", f"SQ{i}") for i in (1, 2, 3)])
+            backend.hierarchy_cache.invalidate()
+
+            report_ids = [backend.create_report(f"S{i}", {
+                "report_type": "CONTACT",
+                "structured_json": {"enemy_count": 4, "description": "Enemy patrol to the north"},
+            })["report_id"] for i in (1, 2, 3)]
+
+            deadline = time.monotonic() + WAIT
+            row = None
+            while time.monotonic() < deadline and row is None:
+                with pool.read() as conn:
+                    row = conn.execute("SELECT suggestion_type, urgency, source_reports FROM suggestions "
+                                       "WHERE unit_id = 'PLT1'").fetchone()
+                time.sleep(0.01)
+            assert row is not None, "no correlated suggestion"
+            suggestion_type, urgency, source_reports = row
+            assert suggestion_type == "EOINCREP" and urgency == "HIGH"
+            assert sorted(json.loads(source_reports)) == sorted(report_ids)
+            with pool.read() as conn:
+                # One per report, plus the correlated one
+                assert conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0] == 4
+        finally:
+            backend.report_analysis_queue.stop()
+            backend.report_correlator = correlator
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_triggers_from_different_units_correlate()
+    test_state_stays_bounded()
+    test_contact_reports_from_squads_make_one_platoon_suggestion()
+    print("✅ correlation tests passed")
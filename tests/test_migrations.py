@@ -0,0 +1,57 @@
+"""
+Tests for schema migrations.
+
+Checks that a migration failing part way leaves neither its earlier
+statements nor a schema_migrations record behind, so it is applied in full
+on the next start. No server needed.
+
+    python tests/test_migrations.py
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import db  # noqa: E402
+
+
+def test_failed_migration_is_rolled_back():
+    migrations, migrations_dir = db.MIGRATIONS, db.MIGRATIONS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        db.MIGRATIONS_DIR = os.path.join(tmp, "migrations")
+        shutil.copytree(migrations_dir, db.MIGRATIONS_DIR)
+        db.MIGRATIONS = [*migrations, "add_test_table.sql"]
+        path = os.path.join(db.MIGRATIONS_DIR, "add_test_table.sql")
+        conn = sqlite3.connect(os.path.join(tmp, "migrations.db"))
+        try:
+            with open(path, "w") as f:
+                f.write("CREATE TABLE test_table (x INTEGER);\nINSERT INTO missing_table VALUES (1);\n")
+            try:
+                db.apply_migrations(conn)
+            except sqlite3.OperationalError:
+                pass
+            else:
+                raise AssertionError("the broken migration was applied")
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            applied = {row[0] for row in conn.execute("SELECT name FROM schema_migrations")}
+            assert "units" in tables and "test_table" not in tables
+            assert applied == set(migrations)
+
+            with open(path, "w") as f:
+                f.write("CREATE TABLE test_table (x INTEGER);\nINSERT INTO test_table VALUES (1);\n")
+            db.apply_migrations(conn)
+            assert conn.execute("SELECT x FROM test_table").fetchall() == [(1,)]
+            assert conn.execute("SELECT COUNT(*) FROM schema_migrations WHERE name = 'add_test_table.sql'"
+                                ).fetchone()[0] == 1
+        finally:
+            conn.close()
+            db.MIGRATIONS, db.MIGRATIONS_DIR = migrations, migrations_dir
+
+
+if __name__ == "__main__":
+    test_failed_migration_is_rolled_back()
+    print("✅ migration tests passed")
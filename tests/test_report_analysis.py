@@ -0,0 +1,153 @@
+"""
+Tests for the background report analysis queue.
+
+Checks that a report POST leaves its analysis 'queued' and the workers then
+save its suggestions and mark it 'done', that a job retries while another
+connection holds the database write lock, and that other errors fail the job
+without retrying, and that background reanalysis picks up reports the queue
+missed without duplicating suggestions on a second or full pass. Runs against a throwaway database; no server needed.
+
+    python tests/test_report_analysis.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import db  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from jobs import JobQueue  # noqa: E402
+
+WAIT = 5.0  # seconds
+
+
+def setup_database(tmp):
+    backend.DB_PATH = os.path.join(tmp, "analysis.db")
+    pool = get_pool(backend.DB_PATH)
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+        conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'Soldier 1', 'Private', 'U1')")
+    backend.hierarchy_cache.invalidate()
+    return pool
+
+
+def wait_for_status(pool, report_id, status):
+    deadline = time.monotonic() + WAIT
+    while time.monotonic() < deadline:
+        with pool.read() as conn:
+            row = conn.execute("SELECT status, attempts, suggestions FROM report_analysis WHERE report_id = ?",
+                               (report_id,)).fetchone()
+        if row and row[0] == status:
+            return row
+        time.sleep(0.01)
+    raise AssertionError(f"report {report_id} analysis still {row} after {WAIT} s")
+
+
+def test_report_is_analysed_after_post():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        backend.report_analysis_queue.start()
+        try:
+            report_id = backend.create_report("S1", {
+                "report_type": "CASUALTY",
+                "structured_json": {"casualties": 1, "description": "1x WIA, gunshot wound"},
+            })["report_id"]
+            _, attempts, suggestions = wait_for_status(pool, report_id, "done")
+            assert attempts == 1 and suggestions == 1
+            with pool.read() as conn:
+                count = conn.execute("SELECT COUNT(*) FROM suggestions WHERE source_reports LIKE ?",
+                                     (f"%{report_id}%",)).fetchone()[0]
+            assert count == 1
+        finally:
+            backend.report_analysis_queue.stop()
+            close_pool()
+
+
+def test_analysis_retries_while_database_is_locked():
+    busy_timeout = db.BUSY_TIMEOUT_MS
+    db.BUSY_TIMEOUT_MS = 50
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = setup_database(tmp)
+            report = {"report_id": "R1", "soldier_id": "S1", "unit_id": "U1", "report_type": "CONTACT",
+                      "structured_json": {"enemy_count": 4}, "text_content": ""}
+            with pool.write() as conn:
+                conn.execute("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                             "structured_json, confidence) VALUES ('R1', 'S1', 'U1', '2024-01-01T00:00:00', "
+                             "'CONTACT', '{}', 0.9)")
+                backend.mark_analysis_queued(conn, ["R1"])
+
+            # Another process's writer, holding the lock for a while
+            other = sqlite3.connect(backend.DB_PATH, timeout=0, isolation_level=None, check_same_thread=False)
+            other.execute("BEGIN IMMEDIATE")
+            release = threading.Timer(0.3, other.execute, ("COMMIT",))
+            release.start()
+
+            queue = JobQueue("test-analysis", backend.run_report_analysis, backend.report_analysis_failed,
+                             workers=1, max_attempts=6)
+            queue.put(report)
+            _, attempts, suggestions = wait_for_status(pool, "R1", "done")
+            queue.stop()
+            release.join()
+            other.close()
+            close_pool()
+            assert attempts > 1 and queue.retries == attempts - 1 and suggestions == 1
+    finally:
+        db.BUSY_TIMEOUT_MS = busy_timeout
+
+
+def test_other_errors_fail_without_retrying():
+    failures = []
+
+    def run(jobs, attempt):
+        raise ValueError("bad report")
+
+    queue = JobQueue("test-failures", run, lambda jobs, error, attempts: failures.append((jobs, str(error), attempts)))
+    queue.put("job")
+    queue.stop()
+    assert failures == [(["job"], "bad report", 1)]
+    assert queue.stats()["failed"] == 1 and queue.retries == 0
+
+
+def test_reanalysis_is_incremental_and_does_not_duplicate():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        with pool.write() as conn:
+            conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                             "structured_json, confidence) VALUES (?, 'S1', 'U1', '2024-01-01T00:00:00', "
+                             "'CASUALTY', '{\"casualties\": 1}', 0.9)", [(f"R{i}",) for i in range(25)])
+        job = backend.ReanalysisJob(pool.read, pool.write, backend.save_report_analysis,
+                                    lambda results: None, batch_size=10)
+        try:
+            # Same unit, same hour: one suggestion the later reports merge into
+            first = job.run_pass()
+            assert first["reports_analyzed"] == 25 and first["suggestions_created"] == 1
+            assert first["suggestions_updated"] == 24
+            assert first["batches"] == 3 and first["watermark"] == 25
+
+            second = job.run_pass()
+            assert second["reports_analyzed"] == 0 and second["suggestions_created"] == 0
+
+            full = job.run_pass(full=True)
+            assert full["reports_analyzed"] == 25
+            assert full["suggestions_created"] == 0 and full["suggestions_updated"] == 0
+            with pool.read() as conn:
+                rows = conn.execute("SELECT source_reports FROM suggestions").fetchall()
+            assert len(rows) == 1 and len(json.loads(rows[0][0])) == 25
+        finally:
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_report_is_analysed_after_post()
+    test_analysis_retries_while_database_is_locked()
+    test_other_errors_fail_without_retrying()
+    test_reanalysis_is_incremental_and_does_not_duplicate()
+    print("✅ report analysis queue tests passed")
@@ -0,0 +1,120 @@
+"""
+Concurrency test for FRAGO / CASEVAC / EOINCREP number allocation.
+
+Hammers the three generators from many threads at once and then several
+processes reserving numbers from the same database file, and checks that no
+number is handed out twice and that the only gaps are the unused ends of
+reserved blocks. Runs against a throwaway database; no server needed.
+
+    python tests/test_report_numbers.py
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from sequences import SequenceAllocator  # noqa: E402
+
+THREADS = 16
+PER_GENERATOR = 60
+PROCESSES = 4
+PER_PROCESS = 500
+BLOCK_SIZE = 7
+
+
+def generate(kind, i):
+    if kind == "FRAGO":
+        result = backend.generate_frago(backend.FRAGOGenerateRequest(
+            unit_id="U1", unit_name="Unit 1", frago_fields={"mission": f"Task {i}"}, source_report_ids=[]
+        ))
+        return result["frago_number"]
+    if kind == "CASEVAC":
+        result = backend.generate_casevac({"unit_id": "U1", "unit_name": "Unit 1", "casevac_fields": {}})
+        return result["casevac_number"]
+    result = backend.generate_eoincrep({"unit_id": "U1", "unit_name": "Unit 1", "eoincrep_fields": {}})
+    return result["eoincrep_number"]
+
+
+def check_numbers(numbers, allowed_gaps):
+    """No duplicates, and at most allowed_gaps numbers skipped below the highest one."""
+    assert len(numbers) == len(set(numbers)), f"duplicate numbers: {sorted(numbers)}"
+    missing = set(range(1, max(numbers) + 1)) - set(numbers)
+    assert len(missing) <= allowed_gaps, f"{len(missing)} numbers skipped: {sorted(missing)[:20]}"
+    return len(missing)
+
+
+def test_generators_from_many_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "numbers.db")
+        pool = get_pool(backend.DB_PATH)
+        with pool.write() as conn:
+            conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+        backend.report_numbers = SequenceAllocator(pool.write, BLOCK_SIZE)
+
+        jobs = [(kind, i) for i in range(PER_GENERATOR) for kind in ("FRAGO", "CASEVAC", "EOINCREP")]
+        with ThreadPoolExecutor(THREADS) as executor:
+            numbers = list(executor.map(lambda job: (job[0], generate(*job)), jobs))
+
+        for kind in ("FRAGO", "CASEVAC", "EOINCREP"):
+            issued = [number for k, number in numbers if k == kind]
+            # One process: numbers are handed out in order, so no gaps at all
+            check_numbers(issued, allowed_gaps=0)
+            assert sorted(issued) == list(range(1, PER_GENERATOR + 1))
+
+        with pool.read() as conn:
+            stored = [row[0] for row in conn.execute("SELECT frago_number FROM fragos")]
+            casevacs = [json.loads(row[0])["casevac_number"] for row in conn.execute(
+                "SELECT structured_json FROM reports WHERE report_type = 'CASEVAC'")]
+        check_numbers(stored, allowed_gaps=0)
+        check_numbers(casevacs, allowed_gaps=0)
+
+        backend.report_numbers.release()
+        with pool.read() as conn:
+            next_numbers = dict(conn.execute("SELECT report_type, next_number FROM report_sequences"))
+        assert next_numbers == {"FRAGO": PER_GENERATOR + 1, "CASEVAC": PER_GENERATOR + 1,
+                                "EOINCREP": PER_GENERATOR + 1}, next_numbers
+        close_pool()
+    print(f"✅ {len(jobs)} documents from {THREADS} threads: no duplicates, no gaps")
+
+
+def allocate_in_process(db_path, count, barrier):
+    pool = get_pool(db_path)
+    allocator = SequenceAllocator(pool.write, BLOCK_SIZE)
+    barrier.wait()
+    numbers = [allocator.next(kind) for _ in range(count) for kind in ("FRAGO", "CASEVAC")]
+    allocator.release()
+    close_pool()
+    return numbers
+
+
+def test_allocators_in_many_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "numbers.db")
+        get_pool(db_path)
+        close_pool()
+
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager, context.Pool(PROCESSES) as processes:
+            # Start allocating together so the processes' reservations interleave
+            barrier = manager.Barrier(PROCESSES)
+            results = processes.starmap(allocate_in_process, [(db_path, PER_PROCESS, barrier)] * PROCESSES)
+
+        for offset, kind in enumerate(("FRAGO", "CASEVAC")):
+            issued = [number for numbers in results for number in numbers[offset::2]]
+            assert len(issued) == PROCESSES * PER_PROCESS
+            # Only a block that another process reserved after cannot be given back
+            skipped = check_numbers(issued, allowed_gaps=PROCESSES * (BLOCK_SIZE - 1))
+            print(f"✅ {kind}: {len(issued)} numbers from {PROCESSES} processes, "
+                  f"no duplicates, {skipped} skipped (blocks of {BLOCK_SIZE})")
+
+
+if __name__ == "__main__":
+    test_generators_from_many_threads()
+    test_allocators_in_many_processes()
@@ -0,0 +1,75 @@
+"""
+Tests for full-text search over reports.
+
+Checks that reports are found by the values in their structured_json but
+not by its keys, also when it was stored encoded twice, that updates and deletes keep the index in step, and that
+search.py --rebuild indexes the same text. No server needed.
+
+    python tests/test_search.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import search  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+REPORTS = [
+    ("R1", {"description": "Bridge damaged near checkpoint", "severity": "high", "location": "Grid 1234"}),
+    ("R2", {"description": "Convoy delayed", "casualties": 3, "details": {"notes": "flat tyre"}}),
+    ("R3", "not json: smoke on the ridge"),
+    ("R4", json.dumps(json.dumps({"description": "Sniper fire from the tower"}))),
+]
+
+
+def found(conn, text):
+    return sorted(result["id"] for result in search.search(conn, text, ["report"]))
+
+
+def test_reports_are_indexed_by_field_values():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "search.db")
+        pool = get_pool(backend.DB_PATH)
+        try:
+            with pool.write() as conn:
+                conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+                conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'S1', 'Private', 'U1')")
+                conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                                 "structured_json, confidence) VALUES (?, 'S1', 'U1', '2024-01-01T00:00:00', "
+                                 "'SITREP', ?, 0.9)",
+                                 [(report_id, fields if isinstance(fields, str) else json.dumps(fields))
+                                  for report_id, fields in REPORTS])
+
+            for rebuilt in (False, True):
+                if rebuilt:
+                    with pool.write() as conn:
+                        search.rebuild(conn)
+                with pool.read() as conn:
+                    for key in ("description", "severity", "location", "casualties"):
+                        assert found(conn, key) == [], key
+                    assert found(conn, "bridge") == ["R1"]
+                    assert found(conn, "high") == ["R1"]
+                    assert found(conn, "tyre") == ["R2"]       # nested values
+                    assert found(conn, "3") == ["R2"]
+                    assert found(conn, "ridge") == ["R3"]      # not JSON: the raw text
+                    assert found(conn, "sniper") == ["R4"]     # JSON encoded twice
+
+            with pool.write() as conn:
+                conn.execute("UPDATE reports SET structured_json = ? WHERE report_id = 'R1'",
+                             (json.dumps({"description": "Bridge repaired"}),))
+                conn.execute("DELETE FROM reports WHERE report_id = 'R2'")
+            with pool.read() as conn:
+                assert found(conn, "repaired") == ["R1"]
+                assert found(conn, "checkpoint") == [] and found(conn, "tyre") == []
+        finally:
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_reports_are_indexed_by_field_values()
+    print("✅ search tests passed")
@@ -0,0 +1,61 @@
+"""
+Tests for the per-soldier activity buckets.
+
+Checks that raw inputs and reports count in the window of the server's
+local clock whether their timestamp is naive local time or carries a UTC
+offset, and that deleting them empties the buckets again. No server needed.
+
+    python tests/test_soldier_activity.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+
+
+def test_offset_timestamps_count_in_the_local_hour():
+    tz = os.environ.get("TZ")
+    os.environ["TZ"] = "Etc/GMT-5"      # UTC+5, so UTC and local hours differ
+    time.tzset()
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "activity.db")
+        pool = get_pool(backend.DB_PATH)
+        try:
+            local = datetime.now().isoformat()
+            utc = datetime.now(timezone.utc).isoformat()
+            zulu = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            with pool.write() as conn:
+                conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+                conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id) VALUES ('S1', 'S1', 'Private', 'U1')")
+                conn.executemany("INSERT INTO soldier_raw_inputs (input_id, soldier_id, timestamp, raw_text) "
+                                 "VALUES (?, 'S1', ?, 'text')", [("I1", local), ("I2", utc), ("I3", zulu)])
+                conn.executemany("INSERT INTO reports (report_id, soldier_id, unit_id, timestamp, report_type, "
+                                 "structured_json, confidence) VALUES (?, 'S1', 'U1', ?, 'SITREP', '{}', 0.9)",
+                                 [("R1", local), ("R2", utc)])
+
+            soldier, = backend.read_activity("s.soldier_id = ?", ("S1",))
+            assert soldier["inputs"]["1h"] == 3 and soldier["reports"]["1h"] == 2, soldier
+
+            with pool.write() as conn:
+                conn.execute("DELETE FROM soldier_raw_inputs")
+                conn.execute("DELETE FROM reports")
+                assert conn.execute("SELECT COUNT(*) FROM soldier_activity_buckets").fetchone()[0] == 0
+        finally:
+            close_pool()
+            if tz is None:
+                os.environ.pop("TZ")
+            else:
+                os.environ["TZ"] = tz
+            time.tzset()
+
+
+if __name__ == "__main__":
+    test_offset_timestamps_count_in_the_local_hour()
+    print("✅ soldier activity tests passed")
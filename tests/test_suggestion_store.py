@@ -0,0 +1,122 @@
+"""
+Tests for suggestion deduplication and expiry.
+
+Checks that repeat reports from one unit in the same hour merge into one
+pending suggestion that gains urgency and confidence, that reports already
+recorded are skipped even once the suggestion is dismissed, and that the
+expiry pass dismisses stale pending suggestions in batches while keeping
+unit_stats in step. No server needed.
+
+    python tests/test_suggestion_store.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+import suggestion_store  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from suggestion_store import dedup_key, expire_suggestions, upsert_suggestions  # noqa: E402
+
+
+def casevac(report_id, timestamp="2024-01-01T10:05:00", unit_id="U1", urgency="MEDIUM", confidence=0.5):
+    return {"type": "CASEVAC", "urgency": urgency, "reason": "1 casualty reported", "confidence": confidence,
+            "source_reports": [report_id], "unit_id": unit_id,
+            "dedup_key": dedup_key("CASEVAC", unit_id, report_id, timestamp)}
+
+
+def setup_database(tmp):
+    backend.DB_PATH = os.path.join(tmp, "suggestions.db")
+    pool = get_pool(backend.DB_PATH)
+    with pool.write() as conn:
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+        conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U2', 'Unit 2', 'Squad')")
+    return pool
+
+
+def test_dedup_key_buckets_by_report_hour():
+    assert dedup_key("CASEVAC", "U1", "R1", "2024-01-01T10:05:00") == \
+        dedup_key("CASEVAC", "U1", "R2", "2024-01-01 10:59:59.5")
+    assert dedup_key("CASEVAC", "U1", "R1", "2024-01-01T10:05:00") != \
+        dedup_key("CASEVAC", "U1", "R1", "2024-01-01T11:00:00")
+    assert dedup_key("CASEVAC", "U1", "R1", "2024-01-01T12:05:00+02:00") == \
+        dedup_key("CASEVAC", "U1", "R1", "2024-01-01T10:05:00")
+    assert dedup_key("CASEVAC", "U1", "R1", None) == "CASEVAC:U1:report:R1"
+
+
+def test_repeat_reports_merge_into_one_pending_suggestion():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        try:
+            with pool.write() as conn:
+                results = upsert_suggestions(conn, [casevac("R1"), casevac("R2", confidence=0.6)])
+            (first, created), (second, merged) = results
+            assert created and not merged and first == second
+
+            with pool.write() as conn:
+                # R2 again changes nothing; R3 is the third report and raises urgency
+                assert upsert_suggestions(conn, [casevac("R2"), casevac("R3")]) == [None, (first, False)]
+                # Another hour and another unit are other suggestions
+                (other_hour, created_hour), (other_unit, created_unit) = upsert_suggestions(
+                    conn, [casevac("R4", "2024-01-01T11:05:00"), casevac("R5", unit_id="U2")])
+            assert created_hour and created_unit and len({first, other_hour, other_unit}) == 3
+
+            with pool.read() as conn:
+                urgency, confidence, reason, source_reports = conn.execute(
+                    "SELECT urgency, confidence, reason, source_reports FROM suggestions WHERE suggestion_id = ?",
+                    (first,)).fetchone()
+                assert conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0] == 3
+            assert urgency == "HIGH" and confidence == 0.9    # 1 - 0.5 * 0.4 * 0.5
+            assert reason == "1 casualty reported (3 reports)"
+            assert json.loads(source_reports) == ["R1", "R2", "R3"]
+
+            # A dismissed suggestion is not re-opened by its own reports, but a
+            # new report in the same hour starts a new pending one
+            backend.dismiss_suggestion(first)
+            with pool.write() as conn:
+                assert upsert_suggestions(conn, [casevac("R1"), casevac("R3")]) == [None, None]
+                (newer, created), = upsert_suggestions(conn, [casevac("R6")])
+            assert created and newer != first
+        finally:
+            close_pool()
+
+
+def test_stale_pending_suggestions_expire_in_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(tmp)
+        try:
+            with pool.write() as conn:
+                saved = upsert_suggestions(conn, [casevac(f"R{hour}", f"2024-01-01T{hour:02d}:00:00")
+                                                  for hour in range(7)])
+                stale = [suggestion_id for suggestion_id, _ in saved[:5]]
+                conn.execute(f"UPDATE suggestions SET refreshed_at = ? WHERE suggestion_id IN ({','.join('?' * 5)})",
+                             [(datetime.now() - timedelta(hours=30)).isoformat(), *stale])
+
+            batches = []
+            assert expire_suggestions(pool.write, ttl_hours=24, batch_size=2, publish=batches.append) == 5
+            assert [len(batch) for batch in batches] == [2, 2, 1]
+            assert sorted(suggestion_id for batch in batches for suggestion_id, _ in batch) == sorted(stale)
+            assert expire_suggestions(pool.write, ttl_hours=24, batch_size=2) == 0
+
+            with pool.read() as conn:
+                rows = dict(conn.execute("SELECT status, COUNT(*) FROM suggestions "
+                                         "GROUP BY status").fetchall())
+                assert rows == {"dismissed": 5, "pending": 2}
+                assert conn.execute("SELECT COUNT(*) FROM suggestions WHERE dismissed_by = ?",
+                                    (suggestion_store.EXPIRED_BY,)).fetchone()[0] == 5
+                assert conn.execute("SELECT pending_suggestions FROM unit_stats "
+                                    "WHERE unit_id = 'U1'").fetchone()[0] == 2
+        finally:
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_dedup_key_buckets_by_report_hour()
+    test_repeat_reports_merge_into_one_pending_suggestion()
+    test_stale_pending_suggestions_expire_in_batches()
+    print("✅ suggestion store tests passed")
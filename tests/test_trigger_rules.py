@@ -0,0 +1,45 @@
+"""
+Tests for the trigger keyword rules.
+
+Checks that keywords match whole words with their plurals and listed
+inflections, and not inside other words. No server needed.
+
+    python tests/test_trigger_rules.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from trigger_rules import matcher  # noqa: E402
+
+
+def test_verb_inflections_match():
+    for text, category in [
+        ("Squad patrolling north of the village", "enemy"),
+        ("Patrolled the ridge overnight", "enemy"),
+        ("Convoy ambushed at the bridge", "enemy"),
+        ("Ambushes reported along the route", "enemy"),
+        ("Second squad contacted at 0400", "enemy"),
+        ("Engaged by small arms fire", "enemy"),
+        ("Market bombing reported", "eod"),
+        ("Checkpoint bombed overnight", "eod"),
+        ("Door was booby-trapped", "eod"),
+        ("Two injuries, one soldier bled heavily", "injury"),
+        ("Patient critically hurt", "injury"),
+        ("Multiple mines on the road", "eod"),
+    ]:
+        assert category in matcher.match(text), text
+
+
+def test_keywords_do_not_match_inside_other_words():
+    for text in ["determine the route", "contactless delivery", "disengage", "bombastic briefing",
+                 "patrolman on leave"]:
+        assert matcher.match(text) == set(), text
+
+
+if __name__ == "__main__":
+    test_verb_inflections_match()
+    test_keywords_do_not_match_inside_other_words()
+    print("✅ trigger rules tests passed")
@@ -0,0 +1,128 @@
+"""
+Tests for the write-behind queue used for MQTT soldier inputs.
+
+Checks that a batch failing on one bad item is written again item by item,
+so only that item is lost, that "database is locked" failures are retried,
+and that malformed soldier inputs are rejected, and heartbeat timestamps
+normalised to strings, before they are queued, and that a heartbeat flush
+updates last_seen in the cached hierarchy without rebuilding it.
+No server needed.
+
+    python tests/test_write_behind.py
+"""
+
+import os
+import json
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import backend  # noqa: E402
+from db import close_pool, get_pool  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+
+def test_bad_item_does_not_lose_its_batch():
+    written = []
+
+    def flush(items):
+        if "bad" in items:
+            raise sqlite3.InterfaceError("Error binding parameter 2")
+        written.extend(items)
+
+    queue = WriteBehindQueue("test-bad-item", flush, max_delay=0.05)
+    for item in ["a", "b", "bad", "c"]:
+        queue.put(item)
+    queue.stop()
+    assert written == ["a", "b", "c"]
+    assert queue.flushed == 3 and queue.failed == 1
+
+
+def test_locked_database_is_retried():
+    written = []
+    failures = [sqlite3.OperationalError("database is locked")] * 2
+
+    def flush(items):
+        if failures:
+            raise failures.pop()
+        written.extend(items)
+
+    queue = WriteBehindQueue("test-locked", flush, max_delay=0.05, retry_delay=0.001)
+    for item in ["a", "b"]:
+        queue.put(item)
+    queue.stop()
+    assert written == ["a", "b"]
+    assert queue.retries == 2 and queue.failed == 0
+
+
+def test_malformed_soldier_inputs_are_rejected():
+    for payload in [
+        {"soldier_id": {"id": 1}, "raw_text": "contact"},
+        {"soldier_id": "S1", "raw_text": ["contact"]},
+        {"soldier_id": "S1", "raw_text": "contact", "timestamp": {"t": 1}},
+        {"soldier_id": "S1", "raw_text": "contact", "audio_file_ref": 5},
+        ["S1", "contact"],
+    ]:
+        try:
+            backend.handle_soldier_input(payload)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {payload!r}")
+    assert backend.message_timestamp(86400 * 10).startswith("1970-01-1")
+
+
+def test_heartbeat_timestamps_are_strings():
+    buffer = backend.heartbeat_buffer
+    backend.heartbeat_buffer = backend.CoalescingBuffer("test-heartbeats", lambda entries: None)
+    try:
+        backend.handle_soldier_heartbeat({"device_id": "D1", "timestamp": 1700000000})
+        backend.handle_soldier_heartbeat({"device_id": "D2", "timestamp": "2024-01-01T00:00:00"})
+        backend.handle_soldier_heartbeat({"device_id": "D3"})
+        assert all(isinstance(values[0], str) for values in backend.heartbeat_buffer._pending.values())
+        try:
+            backend.handle_soldier_heartbeat({"device_id": "D4", "timestamp": [1]})
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("accepted a list timestamp")
+    finally:
+        backend.heartbeat_buffer = buffer
+    assert backend.message_timestamp("2024-01-01T00:00:00") == "2024-01-01T00:00:00"
+
+
+def test_heartbeat_flush_keeps_the_hierarchy_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "heartbeats.db")
+        pool = get_pool(backend.DB_PATH)
+        try:
+            with pool.write() as conn:
+                conn.execute("INSERT INTO units (unit_id, name, level) VALUES ('U1', 'Unit 1', 'Squad')")
+                conn.execute("INSERT INTO soldiers (soldier_id, name, rank, unit_id, device_id) "
+                             "VALUES ('S1', 'S1', 'Private', 'U1', 'D1')")
+            backend.hierarchy_cache.invalidate()
+            snapshot = backend.hierarchy_cache.get()
+            assert snapshot.soldiers["S1"]["last_seen"] is None
+            snapshot.hierarchy_body    # encoded before the flush
+
+            backend.save_heartbeats({("D1", "S1"): ("2024-01-01T10:00:00", 80, None, None, None, None)})
+            assert backend.hierarchy_cache.get() is snapshot
+            unit, = json.loads(snapshot.hierarchy_body)["hierarchy"]
+            assert unit["soldiers"][0]["last_seen"] == "2024-01-01T10:00:00"
+
+            # An older heartbeat does not move it back
+            backend.save_heartbeats({("D1", "S1"): ("2024-01-01T09:00:00", 80, None, None, None, None)})
+            assert snapshot.soldiers["S1"]["last_seen"] == "2024-01-01T10:00:00"
+        finally:
+            backend.hierarchy_cache.invalidate()
+            close_pool()
+
+
+if __name__ == "__main__":
+    test_bad_item_does_not_lose_its_batch()
+    test_locked_database_is_retried()
+    test_malformed_soldier_inputs_are_rejected()
+    test_heartbeat_timestamps_are_strings()
+    test_heartbeat_flush_keeps_the_hierarchy_cache()
+    print("✅ write-behind tests passed")